@@ -1,4 +1,3 @@
-
 from flask import Blueprint, render_template, session, redirect, url_for, jsonify, request
 import datetime
 import csv
@@ -9,14 +8,51 @@ StockScreening = models.StockScreening
 User = models.User
 Watchlist = models.Watchlist
 import json
-import tempfile
+import base64
+import binascii
+import numpy as np
+from sqlalchemy.orm import undefer
+from symbol_index import get_symbol_index
+from csv_ingest import ingest_stocks, iter_chunks
+from universe_snapshot import SharedUniverse
+from chart_payload import bars_payload, chart_options
+from fast_json import json_response, stored_json
+from universe_query import QueryError, parse_query, query_universe
+from industry_tree import ADMIN_VIEW, industry_tree
 
 # Blueprint must be defined before any route decorators
 admin_bp = Blueprint('admin', __name__)
 
-# In-memory storage for uploaded screening stocks (for demo; replace with DB for production)
-SCREENING_STOCKS = []
+# Page size for screenings stored as screening_rows
+SCREENING_PAGE_SIZE = 100
+MAX_SCREENING_PAGE_SIZE = 1000
+# Screenings per summary listing page, and on the dashboard
+SCREENING_LIST_SIZE = 50
 
+def require_admin_session():
+    """Check if user is logged in as admin in session"""
+    user_data = session.get('mock_user_data')
+    if not user_data or not user_data.get('is_admin', False):
+        return False
+    return True
+
+def _row_page_args(default_limit=SCREENING_PAGE_SIZE):
+    """(after position, limit) from ?cursor=&limit=; raises ValueError"""
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit')
+    after = int(cursor) if cursor else None
+    limit = int(limit) if limit else default_limit
+    if limit is not None and not 1 <= limit <= MAX_SCREENING_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_SCREENING_PAGE_SIZE}')
+    return after, limit
+
+def _row_page(screening_id, after, limit):
+    """Stock dicts of one page of screening rows, the next cursor and whether more rows follow"""
+    rows = models.ScreeningRow.page(screening_id, after, limit + 1 if limit else None)
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if has_more else rows
+    next_cursor = str(rows[-1].position) if has_more else None
+    return [row.stock for row in rows], next_cursor, has_more
 
 # Admin-only endpoint for CSV upload for screening (only admin can upload industry CSVs)
 @admin_bp.route('/admin/api/screening-csv-upload', methods=['POST'])
@@ -30,76 +66,50 @@ def screening_csv_upload():
     if not file.filename.endswith('.csv'):
         return jsonify({'success': False, 'error': 'Invalid file type'}), 400
     try:
-        stream = io.StringIO(file.stream.read().decode('utf-8'))
-        reader = csv.DictReader(stream)
-        new_stocks = []
-        for row in reader:
-            stock = {
-                'symbol': row.get('symbol', '').upper(),
-                'name': row.get('name', ''),
-                'sector': row.get('sector', ''),
-                'price': row.get('price', ''),
-                'industry': row.get('industry', ''),
-                'market_cap': row.get('market_cap', ''),
-                'latest_volume': row.get('latest_volume', ''),
-            }
-            new_stocks.append(stock)
-        # Store in-memory for demo (replace with DB in production)
-        global SCREENING_STOCKS
-        SCREENING_STOCKS = new_stocks
-
-        # Also create a StockScreening record for this upload
-
-        try:
-            StockScreening = models.StockScreening
-            User = models.User
-            admin_user = User.query.filter_by(is_admin=True).first()
-            if not admin_user:
-                print("[ERROR] No admin user found in database. Cannot create StockScreening with correct created_by.")
-            else:
-                print(f"[DEBUG] Found admin user: {admin_user.id} {admin_user.email}")
-            screening = StockScreening(
-                name=f"CSV Upload {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                criteria={},
-                results={'stocks': new_stocks},
-                created_by=admin_user.id if admin_user else '1'
-            )
-            screening.save()
-            print(f"[DEBUG] Created StockScreening: {screening.id}, name={screening.name}, count={len(new_stocks)}")
-        except Exception as e:
-            # Log but don't block CSV upload if screening creation fails
-            import sys
-            print(f"[ERROR] Could not create StockScreening: {e}", file=sys.stderr)
-
-        return jsonify({'success': True, 'count': len(new_stocks)})
+        admin_user = User.query.filter_by(is_admin=True).first()
+        if not admin_user:
+            print("[ERROR] No admin user found in database. Creating StockScreening with created_by='1'.")
+        # The rows are the screening's universe; results stays an empty stub instead of a JSON copy
+        screening = StockScreening(
+            name=f"CSV Upload {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            criteria={},
+            results={'stocks': []},
+            created_by=admin_user.id if admin_user else '1'
+        )
+        db.session.add(screening)
+        db.session.flush()
+        # Stream the upload in chunks, each stored with batched inserts
+        count = 0
+        leading = []
+        symbol_index = get_symbol_index()
+        for chunk in iter_chunks(file.stream):
+            stocks = [models.ScreeningRow.values(row) for _, row in chunk]
+            count = models.ScreeningRow.bulk_insert(screening.id, stocks, start=count)
+            symbol_index.add({key: s[key] for key in ('symbol', 'name', 'sector', 'industry')} for s in stocks)
+            leading = leading or stocks
+        screening.summarize(leading, screening.results_size, row_count=count)
+        db.session.commit()
+        print(f"[DEBUG] Created StockScreening: {screening.id}, name={screening.name}, count={count}")
+        return jsonify({'success': True, 'count': count, 'screening_id': screening.id})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
-# Endpoint to get uploaded screening stocks
+# Endpoint to page through uploaded screening stocks (?screening_id=, default: the latest upload)
 @admin_bp.route('/admin/api/screening-uploaded-stocks', methods=['GET'])
 def get_screening_uploaded_stocks():
     if not require_admin_session():
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
-    return jsonify({'success': True, 'stocks': SCREENING_STOCKS})
-
-from flask import Blueprint, render_template, session, redirect, url_for, jsonify, request
-import datetime
-import csv
-import io
-import models
-User = models.User
-Watchlist = models.Watchlist
-import json
-
-# Blueprint must be defined before any route decorators
-admin_bp = Blueprint('admin', __name__)
-
-def require_admin_session():
-    """Check if user is logged in as admin in session"""
-    user_data = session.get('mock_user_data')
-    if not user_data or not user_data.get('is_admin', False):
-        return False
-    return True
+    try:
+        after, limit = _row_page_args()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    screening_id = request.args.get('screening_id') or models.ScreeningRow.latest_screening_id()
+    if screening_id is None:
+        return jsonify({'success': True, 'stocks': [], 'next_cursor': None, 'has_more': False})
+    stocks, next_cursor, has_more = _row_page(screening_id, after, limit)
+    return json_response({'success': True, 'screening_id': screening_id, 'stocks': stocks,
+                          'next_cursor': next_cursor, 'has_more': has_more})
 
 # TEMPORARY: Public test endpoint to list all users
 @admin_bp.route('/admin/api/test-all-users', methods=['GET'])
@@ -136,17 +146,15 @@ def test_all_watchlists():
 def get_entry_zone_stocks():
     if not require_admin_session():
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
-    entry_lists = Watchlist.query.filter_by(watchlist_type='entry').all()
     stocks = []
-    for wl in entry_lists:
-        for s in wl.stocks:
-            stocks.append({
-                'symbol': s.get('symbol'),
-                'industry': s.get('industry'),
-                'latest_volume': s.get('latest_volume'),
-                'market_cap': s.get('market_cap', 0),
-                'total_market_cap_formatted': s.get('total_market_cap_formatted')
-            })
+    for s in models.WatchlistItem.stocks_for_type('entry'):
+        stocks.append({
+            'symbol': s.get('symbol'),
+            'industry': s.get('industry'),
+            'latest_volume': s.get('latest_volume'),
+            'market_cap': s.get('market_cap', 0),
+            'total_market_cap_formatted': s.get('total_market_cap_formatted')
+        })
     
     # If no stocks in watchlists, return mock data for demo purposes
     if not stocks:
@@ -166,17 +174,15 @@ def get_entry_zone_stocks():
 def get_breakout_stocks():
     if not require_admin_session():
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
-    breakout_lists = Watchlist.query.filter_by(watchlist_type='breakout').all()
     stocks = []
-    for wl in breakout_lists:
-        for s in wl.stocks:
-            stocks.append({
-                'symbol': s.get('symbol'),
-                'industry': s.get('industry'),
-                'latest_volume': s.get('latest_volume'),
-                'market_cap': s.get('market_cap', 0),
-                'total_market_cap_formatted': s.get('total_market_cap_formatted')
-            })
+    for s in models.WatchlistItem.stocks_for_type('breakout'):
+        stocks.append({
+            'symbol': s.get('symbol'),
+            'industry': s.get('industry'),
+            'latest_volume': s.get('latest_volume'),
+            'market_cap': s.get('market_cap', 0),
+            'total_market_cap_formatted': s.get('total_market_cap_formatted')
+        })
     
     # If no stocks in watchlists, return mock data for demo purposes
     if not stocks:
@@ -241,6 +247,10 @@ MOCK_STOCKS = [
     {'id': '3', 'symbol': 'MSFT', 'industry': 'Technology', 'market_cap': '2300000000000', 'market_cap_formatted': '$2.3T', 'latest_volume': '75000000', 'mrs_current': '1.3', 'weekly_growth': '+1.8%', 'total_stocks': '500', 'total_market_cap_formatted': '$10T', 'price_vs_sma_pct': '9.00%'}
 ]
 
+# Typed, symbol-indexed stock universe shared by all workers through a
+# memory-mapped snapshot; MOCK_STOCKS above is only its seed data
+STOCK_UNIVERSE = SharedUniverse('stocks', seed=MOCK_STOCKS)
+
 MOCK_SUBSCRIPTION_REQUESTS = [
     {
         'id': '1',
@@ -331,18 +341,54 @@ def create_stock_screening():
         'created_at': screening.created_at.isoformat() + 'Z'
     }})
 
-# List all screenings (for admin dashboard)
+def _encode_screening_cursor(created_at, screening_id):
+    payload = json.dumps([created_at.isoformat(), screening_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def _screening_page_args():
+    """((created_at, id) or None, limit) from ?cursor=&limit=; raises ValueError"""
+    limit = int(request.args.get('limit') or SCREENING_LIST_SIZE)
+    if not 1 <= limit <= MAX_SCREENING_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_SCREENING_PAGE_SIZE}')
+    cursor = request.args.get('cursor')
+    if not cursor:
+        return None, limit
+    try:
+        created_at, screening_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return (datetime.datetime.fromisoformat(created_at), str(screening_id)), limit
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Malformed cursor')
+
+# List all screenings (for admin dashboard); ?limit=&cursor= pages through summaries only
 @admin_bp.route('/admin/api/stock-screenings', methods=['GET'])
 def list_stock_screenings():
     if not require_admin_session():
         return jsonify({'success': False, 'error': 'Unauthorized'}), 401
-    screenings = StockScreening.query.order_by(StockScreening.created_at.desc()).all()
-    return jsonify({'success': True, 'screenings': [
+    if 'limit' in request.args or 'cursor' in request.args:
+        # Keyset-paginated summaries (row count, size, top symbols) that never load the results column
+        try:
+            after, limit = _screening_page_args()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        screenings = StockScreening.page(after, limit + 1)
+        has_more = len(screenings) > limit
+        screenings = screenings[:limit]
+        last = screenings[-1] if has_more else None
+        return json_response({
+            'success': True,
+            'screenings': [s.summary for s in screenings],
+            'next_cursor': _encode_screening_cursor(last.created_at, last.id) if last else None,
+            'has_more': has_more
+        })
+    screenings = (StockScreening.query.options(undefer(StockScreening.results))
+                  .order_by(StockScreening.created_at.desc()).all())
+    # Stored criteria/results JSON is sent as-is rather than decoded and re-encoded
+    return json_response({'success': True, 'screenings': [
         {
             'id': s.id,
             'name': s.name,
-            'criteria_data': s.criteria_data,
-            'results_data': s.results_data,
+            'criteria_data': stored_json(s.criteria),
+            'results_data': stored_json(s.results),
             'created_at': s.created_at.isoformat() + 'Z'
         } for s in screenings
     ]})
@@ -356,19 +402,30 @@ def get_stock_screening(screening_id):
     if not screening:
         return jsonify({'success': False, 'error': 'Screening not found'}), 404
 
-    # Enrich each stock with historical price data for charting
-    results_data = screening.results_data.copy() if isinstance(screening.results_data, dict) else {}
-    stocks = results_data.get('stocks', [])
+    try:
+        after, limit = _row_page_args(default_limit=None)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    # Uploaded universes are paged from screening_rows (?cursor=&limit=); others keep their results JSON
+    stocks, next_cursor, has_more = _row_page(screening.id, after, limit)
+    if stocks or after is not None:
+        results_data = {'stocks': stocks}
+    else:
+        results_data = screening.results_data.copy() if isinstance(screening.results_data, dict) else {}
+        stocks = [dict(stock) for stock in results_data.get('stocks', [])]
+
+    # Enrich each stock with chart bars from one batched, cached history load
     if stocks:
+        results_data['stocks'] = stocks
         try:
-            from financial_data_service import FinancialDataService
-            fds = FinancialDataService()
+            from financial_data_service import financial_service
+            symbols = list(dict.fromkeys(stock['symbol'] for stock in stocks if stock.get('symbol')))
+            # ?chart_format=columnar returns parallel arrays instead of one dict per bar
+            chart = chart_options(request.args)
+            charts = financial_service.get_chart_histories(symbols, period='6mo', **chart)
             for stock in stocks:
-                symbol = stock.get('symbol')
-                if symbol:
-                    stock_data = fds.get_stock_data(symbol, period='6mo')
-                    # Attach historical data for charting
-                    stock['historical_data'] = stock_data.get('historical_data', [])
+                if stock.get('symbol'):
+                    stock['historical_data'] = charts.get(stock['symbol']) or bars_payload(None, **chart)
         except Exception as e:
             import sys
             print(f"[ERROR] Could not enrich stocks with historical data: {e}", file=sys.stderr)
@@ -378,15 +435,72 @@ def get_stock_screening(screening_id):
         'name': screening.name,
         'criteria_data': screening.criteria_data,
         'results_data': results_data,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
         'created_at': screening.created_at.isoformat() + 'Z'
     }})
 
+# Re-run a saved screening's criteria against the current stock universe
+@admin_bp.route('/admin/api/stock-screenings/<screening_id>/run', methods=['POST'])
+def run_stock_screening(screening_id):
+    if not require_admin_session():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    screening = StockScreening.get(screening_id)
+    if not screening:
+        return jsonify({'success': False, 'error': 'Screening not found'}), 404
+    try:
+        plan = screening.criteria_plan
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid criteria: {str(e)}'}), 400
+
+    universe = STOCK_UNIVERSE.current()
+    columns = universe.numeric_columns()
+    universe_symbols = universe.symbols()
+    try:
+        if plan.needs_indicators:
+            from bar_store import bar_store
+            from screening_engine import compute_indicators
+            histories = bar_store.get_histories(universe_symbols, period='1y')
+            symbols, indicators = compute_indicators(histories, plan.sma_windows)
+            positions = {symbol: i for i, symbol in enumerate(symbols.tolist())}
+            rows = [positions[symbol] for symbol in universe_symbols]
+            columns.update({name: values[rows] for name, values in indicators.items()})
+        mask = plan.evaluate(columns, len(universe_symbols))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    matched = universe.to_records(np.flatnonzero(mask))
+    screening.results = json.dumps({'stocks': matched})
+    screening.updated_at = datetime.datetime.utcnow()
+    screening.save()
+    return jsonify({'success': True, 'screening_id': screening.id, 'count': len(matched), 'stocks': matched})
+
+# Rebuild the daily industry benchmark / MRS history from the bar store
+@admin_bp.route('/admin/api/industry-history/rebuild', methods=['POST'])
+def rebuild_industry_history():
+    if not require_admin_session():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    from bar_store import bar_store
+    from industry_history import build_industry_history, industry_history_store
+    universe = STOCK_UNIVERSE.current()
+    symbols = universe.symbols()
+    if request.args.get('fetch') == '1':
+        # Fill in missing or stale bars from the provider first
+        bar_store.get_histories(symbols, period='1y')
+    categories = universe.categories('industry')
+    industries = [categories[code] if code >= 0 else None for code in universe.column('industry').tolist()]
+    history = build_industry_history(symbols, industries, universe.column('market_cap'))
+    industry_history_store.publish(history)
+    return jsonify({'success': True, 'days': len(history.days), 'industries': len(history.industries),
+                    'symbols': len(history.symbols)})
+
 @admin_bp.route('/admin/api/dashboard-data')
 def admin_dashboard_data():
     """Get admin dashboard statistics"""
     if not require_admin_session():
         return jsonify({'error': 'Unauthorized'}), 401
-    screenings = StockScreening.query.order_by(StockScreening.created_at.desc()).all()
+    # A COUNT and the most recent summaries; results are never loaded
+    screenings = StockScreening.page(limit=SCREENING_LIST_SIZE)
     return jsonify({
         'success': True,
         'data': {
@@ -395,13 +509,13 @@ def admin_dashboard_data():
                 'pro_users': len([u for u in MOCK_USERS if u['subscription_tier'] == 'pro']),
                 'medium_users': len([u for u in MOCK_USERS if u['subscription_tier'] == 'medium']),
                 'free_users': len([u for u in MOCK_USERS if u['subscription_tier'] == 'free']),
-                'total_screenings': len(screenings)
+                'total_screenings': StockScreening.query.count()
             },
             'screenings': [
                 {
                     'id': s.id,
                     'name': s.name,
-                    'results_count': len(s.results_data.get('stocks', [])),
+                    'results_count': s.row_count or 0,
                     'created_at': s.created_at.isoformat() + 'Z'
                 } for s in screenings
             ]
@@ -552,10 +666,9 @@ def get_all_or_single_stock():
     """Get all stocks for management, or a single stock if symbol is provided"""
     symbol = request.args.get('symbol')
     if symbol:
-        stock = next((s for s in MOCK_STOCKS if s['symbol'].upper() == symbol.upper()), None)
+        stock = STOCK_UNIVERSE.current().get(symbol)
         if stock:
             # Add mock price history, bullish reasons, and screening info for demo
-            stock = dict(stock)  # Copy to avoid mutating MOCK_STOCKS
             stock['priceHistory'] = stock.get('priceHistory', [170, 172, 175, 178, 180.5])
             stock['priceHistoryDates'] = stock.get('priceHistoryDates', [
                 "2025-09-20", "2025-09-21", "2025-09-22", "2025-09-23", "2025-09-24"
@@ -572,39 +685,37 @@ def get_all_or_single_stock():
             return jsonify({'success': True, 'stock': stock})
         else:
             return jsonify({'success': False, 'error': 'Stock not found'}), 404
-    return jsonify({
+    if 'limit' in request.args or 'cursor' in request.args:
+        # Keyset-paginated page: ?limit=&cursor=&sort=&direction=&industry=&market_cap_band=&min/max_price_vs_sma=
+        try:
+            page = query_universe(STOCK_UNIVERSE.current(), **parse_query(request.args))
+        except QueryError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return json_response({'success': True, **page})
+    return json_response({
         'success': True,
-        'stocks': MOCK_STOCKS
+        'stocks': STOCK_UNIVERSE.current().to_records()
     })
 
 @admin_bp.route('/admin/api/stocks/by-industry', methods=['GET'])
 def get_stocks_by_industry():
     """Get stocks organized by industry"""
-    industry_groups = {}
-    
-    for stock in MOCK_STOCKS:
-        industry_type = stock.get('industry_type', 'Other')
-        industry_code = stock.get('industry_code', 'N/A')
-        sector = stock.get('sector', 'Other')
-        
-        # Group by sector first, then by industry type
-        if sector not in industry_groups:
-            industry_groups[sector] = {}
-        
-        if industry_type not in industry_groups[sector]:
-            industry_groups[sector][industry_type] = {
-                'industry_code': industry_code,
-                'stocks': []
-            }
-        
-        industry_groups[sector][industry_type]['stocks'].append(stock)
-    
-    return jsonify({
+    # Grouped once per universe version; ?stocks=0 returns only the per-industry aggregates
+    tree = industry_tree(STOCK_UNIVERSE.current(), ADMIN_VIEW)
+    return json_response({
         'success': True,
-        'industries': industry_groups,
-        'total_stocks': len(MOCK_STOCKS)
+        'industries': tree.industries(include_stocks=request.args.get('stocks') != '0'),
+        'total_stocks': tree.total_stocks
     })
 
+@admin_bp.route('/admin/api/stocks/by-industry/<path:industry>', methods=['GET'])
+def get_industry_stocks(industry):
+    """One industry's subtree, {sector: node}, with full stock records"""
+    subtree = industry_tree(STOCK_UNIVERSE.current(), ADMIN_VIEW).subtree(industry)
+    if subtree is None:
+        return jsonify({'success': False, 'error': f'Unknown industry: {industry}'}), 404
+    return json_response({'success': True, 'industry': industry, 'sectors': subtree})
+
 
 @admin_bp.route('/admin/api/stocks', methods=['POST'])
 def add_stock():
@@ -670,8 +781,7 @@ def delete_stock(stock_id):
     if not require_admin_session():
         return jsonify({'error': 'Unauthorized'}), 401
     
-    global MOCK_STOCKS
-    MOCK_STOCKS = [s for s in MOCK_STOCKS if s['id'] != stock_id]
+    STOCK_UNIVERSE.mutate(lambda universe: universe.delete_id(stock_id))
     
     return jsonify({
         'success': True,
@@ -687,16 +797,20 @@ def update_stock_price(stock_id):
     data = request.get_json()
     new_price = float(data.get('price', 0))
     
-    for stock in MOCK_STOCKS:
-        if stock['id'] == stock_id:
-            old_price = stock['price']
-            stock['price'] = new_price
-            # Calculate change percentage
-            if old_price > 0:
-                stock['change_percent'] = ((new_price - old_price) / old_price) * 100
-            return jsonify({'success': True, 'message': 'Stock price updated'})
-    
-    return jsonify({'error': 'Stock not found'}), 404
+    def apply(universe):
+        row = universe.row_of_id(stock_id)
+        if row is None:
+            return False
+        old_price = universe.column('price')[row]
+        universe.set_value(row, 'price', new_price)
+        # Calculate change percentage
+        if old_price > 0:
+            universe.set_value(row, 'change_percent', ((new_price - old_price) / old_price) * 100)
+        return True
+    
+    if STOCK_UNIVERSE.current().row_of_id(stock_id) is None or not STOCK_UNIVERSE.mutate(apply):
+        return jsonify({'error': 'Stock not found'}), 404
+    return jsonify({'success': True, 'message': 'Stock price updated'})
 
 @admin_bp.route('/admin/api/stocks/bulk-upload', methods=['POST'])
 def bulk_upload_stocks():
@@ -714,63 +828,21 @@ def bulk_upload_stocks():
     if not file.filename or not file.filename.endswith('.csv'):
         return jsonify({'error': 'File must be a CSV file'}), 400
     
-    global MOCK_STOCKS, MOCK_SCREENINGS
+    global MOCK_SCREENINGS
     try:
-        # Read CSV file content
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-        processed_count = 0
-        error_count = 0
-        errors = []
-        # Clear all existing stocks before adding new ones from CSV
-        MOCK_STOCKS.clear()
-        new_stocks = []
-        entry_stocks = []
-        breakout_stocks = []
-        for row_num, row in enumerate(csv_reader, start=2):  # Start from 2 to account for header
-            try:
-                # Validate required fields
-                required_fields = ['symbol', 'industry', 'market_cap', 'market_cap_formatted', 'latest_volume', 'mrs_current', 'weekly_growth', 'total_stocks', 'total_market_cap_formatted', 'price_vs_sma_pct', 'watchlist_type']
-                missing_fields = [field for field in required_fields if not row.get(field, '').strip()]
-                if missing_fields:
-                    error_count += 1
-                    errors.append(f"Row {row_num}: Missing required fields: {', '.join(missing_fields)}")
-                    continue
-                # Process the stock data
-                stock_data = {
-                    'id': str(len(MOCK_STOCKS) + processed_count + 1),
-                    'symbol': row['symbol'].strip().upper(),
-                    'industry': row['industry'].strip(),
-                    'market_cap': float(row['market_cap']),
-                    'market_cap_formatted': row['market_cap_formatted'].strip(),
-                    'latest_volume': int(row['latest_volume']),
-                    'mrs_current': float(row['mrs_current']),
-                    'weekly_growth': float(row['weekly_growth']),
-                    'total_stocks': int(row['total_stocks']),
-                    'total_market_cap_formatted': row['total_market_cap_formatted'].strip(),
-                    'price_vs_sma_pct': float(row['price_vs_sma_pct']),
-                    'watchlist_type': row['watchlist_type'].strip().lower()
-                }
-                # Check for duplicate symbols
-                existing_stock = next((s for s in MOCK_STOCKS if s['symbol'] == stock_data['symbol']), None)
-                if existing_stock:
-                    existing_stock.update(stock_data)
-                    existing_stock['id'] = existing_stock['id']
-                else:
-                    MOCK_STOCKS.append(stock_data)
-                    new_stocks.append(stock_data)
-                # Split by watchlist_type
-                if stock_data['watchlist_type'] == 'entry':
-                    entry_stocks.append(stock_data)
-                elif stock_data['watchlist_type'] == 'breakout':
-                    breakout_stocks.append(stock_data)
-                processed_count += 1
-            except ValueError as e:
-                error_count += 1
-                errors.append(f"Row {row_num}: Invalid data format - {str(e)}")
-            except Exception as e:
-                error_count += 1
-                errors.append(f"Row {row_num}: Error processing row - {str(e)}")
+        # Stream the upload; duplicates are resolved through a symbol index.
+        # The upload replaces all existing stocks.
+        result = ingest_stocks(file.stream)
+        STOCK_UNIVERSE.replace(result.stocks)
+        processed_count = result.processed
+        error_count = result.error_count
+        errors = result.errors
+        new_stocks = result.new_stocks
+        entry_stocks = result.entry_stocks
+        breakout_stocks = result.breakout_stocks
+        
+        # Make the uploaded symbols searchable right away
+        get_symbol_index().add({'symbol': s['symbol'], 'industry': s['industry']} for s in result.stocks)
         
         # Update admin's entry zone and breakout watchlists
         admin_user = User.query.filter_by(email='admin@tradinggrow.com').first()
@@ -820,7 +892,7 @@ def bulk_upload_stocks():
             'message': f'CSV processed successfully! {processed_count} stocks processed.',
             'processed': processed_count,
             'errors': error_count,
-            'total_stocks': len(MOCK_STOCKS)
+            'total_stocks': len(STOCK_UNIVERSE.current())
         }
         if errors:
             response_data['error_details'] = errors[:10]  # Limit to first 10 errors
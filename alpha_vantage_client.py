@@ -0,0 +1,256 @@
+"""
+Alpha Vantage Provider Client for TradingGrow
+Async httpx client with a pooled connection, timeouts, jittered retries and a
+token-bucket limiter matching the API quota, plus a sync facade for Flask code
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Optional import for the async HTTP client
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ALPHA_VANTAGE_URL = os.getenv('ALPHA_VANTAGE_URL', 'https://www.alphavantage.co')
+# Free-tier quota; raise for premium keys. The limit applies per process.
+REQUESTS_PER_MINUTE = float(os.getenv('ALPHA_VANTAGE_REQUESTS_PER_MINUTE', '5'))
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+REQUEST_TIMEOUT = 10.0
+
+
+class AlphaVantageError(Exception):
+    """Raised when Alpha Vantage keeps failing after retries"""
+
+
+class RetryableError(Exception):
+    """A failure worth retrying (throttling, 5xx, transport errors)"""
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncAlphaVantageClient:
+    """Async Alpha Vantage client; create and use it on a single event loop"""
+
+    def __init__(self, api_key: str, base_url: str = ALPHA_VANTAGE_URL,
+                 requests_per_minute: float = REQUESTS_PER_MINUTE, timeout: float = REQUEST_TIMEOUT,
+                 max_retries: int = MAX_RETRIES):
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.limiter = TokenBucket(rate=requests_per_minute / 60.0, capacity=max(1.0, requests_per_minute / 60.0 * 5))
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=min(3.0, timeout)),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+
+    async def query(self, function: str, **params) -> Dict:
+        """Call /query with retry on throttling and transient failures"""
+        params = {'function': function, 'apikey': self.api_key, **params}
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            try:
+                response = await self.http.get('/query', params=params)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RetryableError(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                data = response.json()
+                # Alpha Vantage reports throttling with a 200 and a 'Note'/'Information' message
+                if 'Note' in data or ('Information' in data and len(data) == 1):
+                    raise RetryableError(data.get('Note') or data.get('Information'))
+                return data
+            except (RetryableError, httpx.TransportError) as e:
+                if attempt == self.max_retries:
+                    raise AlphaVantageError(f"{function} failed after {attempt + 1} attempts: {e}")
+                # Full jitter exponential backoff
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+                logger.warning(f"Alpha Vantage {function} attempt {attempt + 1} failed ({e}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def symbol_search(self, keywords: str) -> List[Dict]:
+        """Raw SYMBOL_SEARCH matches"""
+        data = await self.query('SYMBOL_SEARCH', keywords=keywords)
+        return data.get('bestMatches', [])
+
+    async def sector_performance(self) -> Dict:
+        """Raw SECTOR performance payload"""
+        return await self.query('SECTOR')
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+class AlphaVantageClient:
+    """Sync facade that runs the async client on a dedicated event-loop thread
+
+    All callers in the process share one connection pool and one rate limiter.
+    """
+
+    def __init__(self, api_key: str, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='alpha-vantage-loop', daemon=True)
+        self._thread.start()
+        self.aio = self._run(self._create(api_key, kwargs))
+
+    @staticmethod
+    async def _create(api_key: str, kwargs) -> AsyncAlphaVantageClient:
+        return AsyncAlphaVantageClient(api_key, **kwargs)
+
+    def _run(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def symbol_search(self, keywords: str) -> List[Dict]:
+        """Raw SYMBOL_SEARCH matches"""
+        return self._run(self.aio.symbol_search(keywords))
+
+    def sector_performance(self) -> Dict:
+        """Raw SECTOR performance payload"""
+        return self._run(self.aio.sector_performance())
+
+    def close(self):
+        self._run(self.aio.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> AlphaVantageClient:
+    """Process-wide sync client per API key, so service instances share the pool and quota"""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = AlphaVantageClient(api_key)
+        return client
+
+
+class StubAlphaVantageServer:
+    """Local HTTP server imitating Alpha Vantage, for tests and benchmarks"""
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    failing = stub.requests <= stub.fail_first
+                time.sleep(stub.latency)
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                if failing:
+                    status, body = 503, {'error': 'unavailable'}
+                elif params.get('function') == 'SYMBOL_SEARCH':
+                    keyword = params.get('keywords', '').upper()
+                    status, body = 200, {'bestMatches': [{
+                        '1. symbol': keyword, '2. name': f"{keyword} Inc.", '3. type': 'Equity',
+                        '4. region': 'United States', '8. currency': 'USD'
+                    }]}
+                elif params.get('function') == 'SECTOR':
+                    status, body = 200, {'Rank A: Real-Time Performance': {'Information Technology': '1.25%', 'Energy': '-0.40%'}}
+                else:
+                    status, body = 200, {'Error Message': 'Invalid API call'}
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    # Latency benchmark: 100 concurrent searches against a stub with 50ms latency
+    import requests
+
+    queries = [f"Q{i}" for i in range(100)]
+    with StubAlphaVantageServer(latency=0.05) as stub:
+        started = time.perf_counter()
+        for query in queries[:20]:
+            requests.get(f"{stub.url}/query", params={'function': 'SYMBOL_SEARCH', 'keywords': query, 'apikey': 'demo'}).json()
+        sequential = (time.perf_counter() - started) / 20
+
+        async def concurrent_searches():
+            client = AsyncAlphaVantageClient('demo', base_url=stub.url, requests_per_minute=60000)
+            latencies = []
+
+            async def timed(query):
+                t0 = time.perf_counter()
+                await client.symbol_search(query)
+                latencies.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(timed(q) for q in queries))
+            total = time.perf_counter() - t0
+            await client.aclose()
+            return total, sorted(latencies)
+
+        total, latencies = asyncio.run(concurrent_searches())
+        print(f"requests.get, no session: {sequential * 1000:7.1f} ms per search (sequential)")
+        print(f"async client, 100 concurrent: {total * 1000:7.1f} ms total, "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+    with StubAlphaVantageServer(fail_first=2) as stub:
+        client = AlphaVantageClient('demo', base_url=stub.url, requests_per_minute=6000)
+        print(f"retry check: {client.symbol_search('aapl')[0]['1. symbol']} after {stub.requests} requests")
+        client.close()
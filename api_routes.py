@@ -3,8 +3,11 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from flask_login import login_user, logout_user, current_user, login_required
 from app import db
 from models import User, Watchlist
+from watchlist_feed import feeds
+from fast_json import json_response
+from universe_query import QueryError, parse_query, query_universe
+from industry_tree import USER_VIEW, industry_tree
 import uuid
-from collections import defaultdict
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
@@ -12,21 +15,13 @@ api = Blueprint('api', __name__, url_prefix='/api')
 # Entry Zone and Breakout Stocks endpoints (user-facing)
 @api.route('/stocks/entry-zone', methods=['GET'])
 def get_entry_zone_stocks_user():
-    # Get all watchlists of type 'entry' (Entry Zone) from DB
-    entry_lists = Watchlist.query.filter_by(watchlist_type='entry').all()
-    stocks = []
-    for wl in entry_lists:
-        stocks.extend(wl.stocks)
-    return jsonify({'success': True, 'stocks': stocks})
+    # Served from the materialized feed of all 'entry' (Entry Zone) watchlists
+    return feeds['entry'].response()
 
 @api.route('/stocks/breakout', methods=['GET'])
 def get_breakout_stocks_user():
-    # Get all watchlists of type 'breakout' from DB
-    breakout_lists = Watchlist.query.filter_by(watchlist_type='breakout').all()
-    stocks = []
-    for wl in breakout_lists:
-        stocks.extend(wl.stocks)
-    return jsonify({'success': True, 'stocks': stocks})
+    # Served from the materialized feed of all 'breakout' watchlists
+    return feeds['breakout'].response()
 
 @api.route('/auth/me', methods=['GET'])
 def get_current_user():
@@ -320,42 +315,39 @@ def reject_subscription_request(request_id):
 
 # Stock screening and watchlist endpoints can be added here as needed
 
+@api.route('/stocks/query', methods=['GET'])
+def query_stocks():
+    """Sorted, filtered page of the stock universe with a cursor to the next page"""
+    from admin_routes import STOCK_UNIVERSE
+    try:
+        page = query_universe(STOCK_UNIVERSE.current(), **parse_query(request.args))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    return json_response(page)
+
+
 @api.route('/stocks/by-industry', methods=['GET'])
 def get_stocks_by_industry():
     """Get stocks organized by sector and industry - user accessible"""
     try:
-        from admin_routes import MOCK_STOCKS
-        industries = defaultdict(lambda: defaultdict(lambda: {'industry_code': '', 'stocks': []}))
-        for stock in MOCK_STOCKS:
-            # Defensive: handle missing fields gracefully
-            sector = stock.get('sector') or stock.get('industry') or 'Unknown'
-            industry_type = stock.get('industry_type') or stock.get('industry') or 'Unknown'
-            industry_code = stock.get('industry_code', 'N/A')
-            symbol = stock.get('symbol', '')
-            name = stock.get('name', symbol)
-            price = stock.get('price', stock.get('market_cap', 0))
-            change_percent = stock.get('change_percent', stock.get('weekly_growth', 0))
-            if not industries[sector][industry_type]['industry_code']:
-                industries[sector][industry_type]['industry_code'] = industry_code
-            industries[sector][industry_type]['stocks'].append({
-                'symbol': symbol,
-                'name': name,
-                'price': price,
-                'change_percent': change_percent
-            })
-        result = {}
-        for sector, sector_industries in industries.items():
-            result[sector] = {}
-            for industry, industry_data in sector_industries.items():
-                result[sector][industry] = {
-                    'industry_code': industry_data['industry_code'],
-                    'stocks': industry_data['stocks']
-                }
-        return jsonify({'industries': result})
+        from admin_routes import STOCK_UNIVERSE
+        # Grouped once per universe version; ?stocks=0 returns only the per-industry aggregates
+        tree = industry_tree(STOCK_UNIVERSE.current(), USER_VIEW)
+        return json_response({'industries': tree.industries(include_stocks=request.args.get('stocks') != '0')})
     except Exception as e:
         import traceback
         return jsonify({
             'error': f'Failed to load industry data: {str(e)}',
             'trace': traceback.format_exc(),
             'industries': {}
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+@api.route('/stocks/by-industry/<path:industry>', methods=['GET'])
+def get_industry_stocks(industry):
+    """One industry's subtree, {sector: node}, for clients that expand the tree lazily"""
+    from admin_routes import STOCK_UNIVERSE
+    subtree = industry_tree(STOCK_UNIVERSE.current(), USER_VIEW).subtree(industry)
+    if subtree is None:
+        return jsonify({'error': f'Unknown industry: {industry}'}), 404
+    return json_response({'industry': industry, 'sectors': subtree})
\ No newline at end of file
@@ -49,7 +49,7 @@ if microsoft_bp:
 
 # Initialize models with database
 from models import init_models
-User, Watchlist, StockScreening, SubscriptionRequest = init_models(db)
+User, Watchlist, StockScreening, SubscriptionRequest, WatchlistItem, ScreeningRow = init_models(db)
 
 # Set models in the models module for other imports
 import models
@@ -57,6 +57,8 @@ models.User = User
 models.Watchlist = Watchlist
 models.StockScreening = StockScreening
 models.SubscriptionRequest = SubscriptionRequest
+models.WatchlistItem = WatchlistItem
+models.ScreeningRow = ScreeningRow
 
 # Register admin blueprint
 from admin_routes import admin_bp
@@ -77,6 +79,13 @@ from routes import *
 with app.app_context():
     db.create_all()
     logging.info("Database tables created successfully")
+    from migrations import run_migrations
+    run_migrations(db)
 # Register industry API blueprint for frontend dropdowns
 from industry_api import industry_api
 app.register_blueprint(industry_api)
+
+# Keep sector and market overview data warm so requests never wait on providers
+from financial_data_service import financial_service
+from background_refresher import start_refresher
+start_refresher(financial_service)
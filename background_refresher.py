@@ -0,0 +1,105 @@
+"""
+Background Refresh Scheduler for TradingGrow
+Re-fetches slow provider datasets (sector performance, market overview)
+before their cache entries expire so requests never wait on the provider
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import List
+
+from cache_layer import CACHE_STALE_SECONDS, CACHE_TTLS, make_key
+
+logger = logging.getLogger(__name__)
+
+# Refresh once this fraction of the TTL has elapsed
+REFRESH_AHEAD = 0.8
+# While the market is closed the data barely moves; refresh this rarely
+CLOSED_MARKET_INTERVAL = 1800
+TICK_SECONDS = 5
+
+
+class RefreshJob:
+    """A cached, argument-less service method kept warm by the scheduler"""
+
+    def __init__(self, service, attr: str):
+        self.service = service
+        self.attr = attr
+        self.wrapper = getattr(type(service), attr)
+        self.method = self.wrapper.cache_method
+        self.key = make_key(self.method, (), {})
+        self.next_run = 0.0
+
+    def interval(self, market_open: bool) -> float:
+        if market_open:
+            return CACHE_TTLS[self.method] * REFRESH_AHEAD
+        return CLOSED_MARKET_INTERVAL
+
+    def run(self, market_open: bool):
+        """Reload the dataset unless another worker refreshed it recently"""
+        cache = self.service.cache
+        interval = self.interval(market_open)
+        # The entry must outlive the gap until the next scheduled refresh
+        ttl = max(CACHE_TTLS[self.method], int(interval / REFRESH_AHEAD))
+        entry = cache.get_entry(self.method, self.key)
+        if entry is not None and entry.expires_at - time.time() > ttl - interval:
+            return
+        cache.load(self.method, self.key, ttl, lambda: self.wrapper.__wrapped__(self.service),
+                   self.wrapper.cache_if, CACHE_STALE_SECONDS.get(self.method, 0))
+
+
+class RefreshScheduler:
+    """Daemon thread that runs RefreshJobs on a market-hours-aware schedule"""
+
+    def __init__(self, service, attrs: List[str], tick: float = TICK_SECONDS):
+        self.service = service
+        self.jobs = [RefreshJob(service, attr) for attr in attrs]
+        self.tick = tick
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='background-refresher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_pending(self):
+        """Run every job that is due; returns the number of jobs run"""
+        market_open = self.service._get_market_status() == 'open'
+        now = time.time()
+        ran = 0
+        for job in self.jobs:
+            if now < job.next_run:
+                continue
+            try:
+                job.run(market_open)
+                ran += 1
+            except Exception as e:
+                logger.error(f"Background refresh of {job.attr} failed: {e}")
+            job.next_run = now + job.interval(market_open)
+        return ran
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.tick)
+
+
+_scheduler = None
+
+
+def start_refresher(service) -> RefreshScheduler:
+    """Start the process-wide refresher for a FinancialDataService (BACKGROUND_REFRESH=0 disables)"""
+    global _scheduler
+    if os.getenv('BACKGROUND_REFRESH', '1') == '0':
+        return None
+    if _scheduler is None:
+        _scheduler = RefreshScheduler(service, ['get_sector_performance', 'get_market_overview'])
+    return _scheduler.start()
@@ -0,0 +1,234 @@
+"""
+Local OHLC Bar Store for TradingGrow
+Keeps daily/intraday bars on disk as memory-mapped NumPy partitions per
+symbol/interval and only asks the provider for bars newer than what is stored
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Optional imports for heavy data libraries
+try:
+    import numpy as np
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    np = None
+    pd = None
+    PANDAS_AVAILABLE = False
+
+from bulk_fetcher import BulkFetcher, YahooProvider, YFINANCE_AVAILABLE, OHLC_COLUMNS, PERIOD_DAYS, split_history
+
+logger = logging.getLogger(__name__)
+
+BAR_STORE_DIR = os.getenv('BAR_STORE_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'bars'))
+
+BAR_FIELDS = ['ts', 'open', 'high', 'low', 'close', 'volume']
+BAR_DTYPE = [('ts', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'), ('volume', '<f8')]
+
+# Stored history may start a few days after the requested start (weekends, holidays)
+COVERAGE_SLACK_NS = 5 * 86400 * 10**9
+DAY_NS = 86400 * 10**9
+# How long a request waits for another request's fetch of the same symbols
+FETCH_WAIT_SECONDS = 60
+
+
+class BarStore:
+    """On-disk bar store with incremental top-up from a provider"""
+
+    def __init__(self, root: str = BAR_STORE_DIR, refresh_interval: int = 60):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        # (symbol, interval) -> Event set when the fetch that claimed it finishes
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, interval: str, ext: str) -> str:
+        safe_symbol = symbol.upper().replace('/', '_').replace('\\', '_')
+        return os.path.join(self.root, interval, f"{safe_symbol}.{ext}")
+
+    def read(self, symbol: str, interval: str = '1d'):
+        """Memory-map the stored bars for a symbol, or None if nothing is stored"""
+        try:
+            return np.load(self._path(symbol, interval, 'npy'), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def read_meta(self, symbol: str, interval: str = '1d') -> Dict:
+        """Get coverage/refresh metadata for a symbol"""
+        try:
+            with open(self._path(symbol, interval, 'json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write(self, symbol: str, interval: str, bars, meta: Dict):
+        """Atomically replace the stored bars and metadata for a symbol"""
+        os.makedirs(os.path.join(self.root, interval), exist_ok=True)
+        self._atomic_write(self._path(symbol, interval, 'npy'), lambda f: np.save(f, bars))
+        self.write_meta(symbol, interval, meta)
+
+    def write_meta(self, symbol: str, interval: str, meta: Dict):
+        """Atomically replace the metadata for a symbol"""
+        os.makedirs(os.path.join(self.root, interval), exist_ok=True)
+        self._atomic_write(self._path(symbol, interval, 'json'), lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+    @staticmethod
+    def _atomic_write(path: str, writer):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                writer(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def merge(self, symbol: str, interval: str, hist, meta: Dict):
+        """Merge newly fetched bars into storage, newer bars winning on overlap"""
+        new_bars = frame_to_bars(hist)
+        if not len(new_bars):
+            self.write_meta(symbol, interval, meta)
+            return
+        stored = self.read(symbol, interval)
+        if stored is not None and len(stored):
+            keep = stored[stored['ts'] < new_bars['ts'][0]]
+            new_bars = np.concatenate([keep, new_bars])
+        self.write(symbol, interval, new_bars, meta)
+
+    def get_history(self, symbol: str, period: str = '1y', interval: str = '1d', fetcher: Optional[BulkFetcher] = None):
+        """Get an OHLC frame for one symbol, topping up from the provider as needed"""
+        return self.get_histories([symbol], period, interval, fetcher).get(symbol, bars_to_frame(None))
+
+    def get_histories(self, symbols: List[str], period: str = '1y', interval: str = '1d',
+                      fetcher: Optional[BulkFetcher] = None) -> Dict:
+        """Get OHLC frames for many symbols with at most one batched top-up per start date"""
+        symbols = list(dict.fromkeys(symbols))
+        now_ns = time.time_ns()
+        period_start_ns = now_ns - PERIOD_DAYS.get(period, 366) * DAY_NS
+        fetcher = fetcher or default_fetcher()
+
+        if fetcher is not None:
+            pending = symbols
+            # A second pass re-checks symbols that another request was fetching
+            for _ in range(2):
+                pending = self._top_up(fetcher, pending, period, interval, now_ns, period_start_ns)
+                if not pending:
+                    break
+
+        results = {}
+        for symbol in symbols:
+            bars = self.read(symbol, interval)
+            if bars is not None and len(bars):
+                bars = bars[np.searchsorted(bars['ts'], period_start_ns):]
+            results[symbol] = bars_to_frame(bars)
+        return results
+
+    def _top_up(self, fetcher: BulkFetcher, symbols: List[str], period: str, interval: str, now_ns: int,
+                period_start_ns: int) -> List[str]:
+        """Fetch what the store lacks for symbols; returns the symbols another request was already fetching
+
+        Each symbol is claimed before its fetch, so concurrent requests never
+        download or write the same symbol twice, while fetches for different
+        symbols run in parallel. The lock only guards the claims.
+        """
+        full_fetch = []
+        top_ups = {}
+        for symbol in symbols:
+            meta = self.read_meta(symbol, interval)
+            stored = self.read(symbol, interval)
+            if stored is None or not len(stored) or meta.get('covered_from', now_ns) > period_start_ns + COVERAGE_SLACK_NS:
+                full_fetch.append(symbol)
+            elif now_ns - meta.get('checked_at', 0) > self.refresh_interval * 10**9:
+                start = pd.Timestamp(int(stored['ts'][-1]), tz='UTC').strftime('%Y-%m-%d')
+                top_ups.setdefault(start, []).append(symbol)
+
+        claimed, others, waits = set(), [], []
+        with self._lock:
+            for symbol in full_fetch + [symbol for batch in top_ups.values() for symbol in batch]:
+                event = self._inflight.get((symbol, interval))
+                if event is None:
+                    self._inflight[(symbol, interval)] = threading.Event()
+                    claimed.add(symbol)
+                else:
+                    others.append(symbol)
+                    waits.append(event)
+
+        try:
+            full_fetch = [symbol for symbol in full_fetch if symbol in claimed]
+            if full_fetch:
+                self._fetch_and_merge(fetcher, full_fetch, interval, now_ns,
+                                      period=period, covered_from=period_start_ns)
+            for start, batch in top_ups.items():
+                batch = [symbol for symbol in batch if symbol in claimed]
+                if batch:
+                    self._fetch_and_merge(fetcher, batch, interval, now_ns, start=start)
+        finally:
+            with self._lock:
+                for symbol in claimed:
+                    self._inflight.pop((symbol, interval)).set()
+
+        for event in waits:
+            event.wait(FETCH_WAIT_SECONDS)
+        return others
+
+    def _fetch_and_merge(self, fetcher: BulkFetcher, symbols: List[str], interval: str, now_ns: int,
+                         period: Optional[str] = None, start: Optional[str] = None, covered_from: Optional[int] = None):
+        frame = fetcher.fetch_history(symbols, period=period or '5d', interval=interval, start=start)
+        for symbol in symbols:
+            hist = split_history(frame, symbol).dropna(subset=['Close'])
+            if hist.empty and start is None:
+                continue
+            meta = self.read_meta(symbol, interval)
+            meta['checked_at'] = now_ns
+            if covered_from is not None:
+                meta['covered_from'] = min(covered_from, meta.get('covered_from', covered_from))
+            try:
+                self.merge(symbol, interval, hist, meta)
+            except Exception as e:
+                logger.error(f"Error storing bars for {symbol}: {e}")
+
+
+def frame_to_bars(hist):
+    """Convert an OHLC DataFrame into the structured on-disk bar layout"""
+    if hist is None or hist.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+    index = pd.DatetimeIndex(hist.index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    bars = np.empty(len(hist), dtype=BAR_DTYPE)
+    bars['ts'] = index.tz_convert('UTC').values.astype('datetime64[ns]').astype('int64')
+    for field, column in zip(BAR_FIELDS[1:], OHLC_COLUMNS):
+        bars[field] = hist[column].to_numpy(dtype='float64', na_value=np.nan)
+    return np.sort(bars, order='ts')
+
+
+def bars_to_frame(bars):
+    """Convert stored bars back into an OHLC DataFrame indexed by UTC timestamp"""
+    if bars is None or not len(bars):
+        return pd.DataFrame(columns=OHLC_COLUMNS, index=pd.DatetimeIndex([], tz='UTC'))
+    index = pd.DatetimeIndex(pd.to_datetime(np.asarray(bars['ts']), utc=True))
+    return pd.DataFrame({
+        column: np.asarray(bars[field]) for field, column in zip(BAR_FIELDS[1:], OHLC_COLUMNS)
+    }, index=index)
+
+
+_default_fetcher = None
+
+
+def default_fetcher() -> Optional[BulkFetcher]:
+    """Shared Yahoo-backed fetcher, or None when yfinance is unavailable"""
+    global _default_fetcher
+    if _default_fetcher is None and YFINANCE_AVAILABLE:
+        _default_fetcher = BulkFetcher(YahooProvider())
+    return _default_fetcher
+
+
+# Global instance
+bar_store = BarStore() if PANDAS_AVAILABLE else None
@@ -0,0 +1,236 @@
+"""
+Bulk OHLC Downloader for TradingGrow
+Fetches history for many symbols with a bounded worker pool, per-provider
+concurrency limits and one multi-symbol history request per chunk
+"""
+
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Optional imports for heavy data libraries
+try:
+    import numpy as np
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    np = None
+    pd = None
+    PANDAS_AVAILABLE = False
+
+try:
+    import yfinance as yf
+    YFINANCE_AVAILABLE = True
+except ImportError:
+    yf = None
+    YFINANCE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+OHLC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Approximate calendar days covered by a yfinance period string
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183,
+    '1y': 366, '2y': 731, '5y': 1827, '10y': 3653, 'ytd': 366, 'max': 36500
+}
+
+# Shared per-provider semaphores so every fetcher respects the same limit
+_provider_limits = {}
+_provider_limits_lock = threading.Lock()
+
+
+def _provider_semaphore(provider) -> threading.BoundedSemaphore:
+    """Get the process-wide concurrency limiter for a provider
+
+    Keyed on the provider name and its limit, so fetchers over the same
+    provider share one semaphore while differently configured instances
+    (e.g. stubs in tests and benchmarks) each get their own limit.
+    """
+    key = (provider.name, provider.max_concurrency)
+    with _provider_limits_lock:
+        semaphore = _provider_limits.get(key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(provider.max_concurrency)
+            _provider_limits[key] = semaphore
+        return semaphore
+
+
+def normalize_history_frame(frame, symbols: List[str]):
+    """Shape a provider history frame into (symbol, field) wide columns"""
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=['symbol', 'field']))
+    if not isinstance(frame.columns, pd.MultiIndex):
+        frame = pd.concat({symbols[0]: frame}, axis=1)
+    elif frame.columns.get_level_values(0).isin(OHLC_COLUMNS).all():
+        # Newer yfinance releases put the field first when group_by is ignored
+        frame = frame.swaplevel(axis=1)
+    frame = frame.loc[:, frame.columns.get_level_values(1).isin(OHLC_COLUMNS)]
+    frame.columns = frame.columns.set_names(['symbol', 'field'])
+    return frame.dropna(axis=1, how='all')
+
+
+def split_history(frame, symbol: str):
+    """Extract one symbol's OHLC frame from a wide history frame"""
+    if frame is None or symbol not in frame.columns.get_level_values(0):
+        return pd.DataFrame(columns=OHLC_COLUMNS)
+    hist = frame[symbol].dropna(how='all')
+    return hist.reindex(columns=OHLC_COLUMNS)
+
+
+class YahooProvider:
+    """Yahoo Finance history/info provider"""
+
+    name = 'yahoo_finance'
+    max_concurrency = 4
+    chunk_size = 100
+
+    def history(self, symbols: List[str], period: str = '5d', interval: str = '1d', start=None):
+        """Download history for several symbols in a single request"""
+        frame = yf.download(
+            symbols,
+            period=None if start is not None else period,
+            start=start,
+            interval=interval,
+            group_by='ticker',
+            auto_adjust=True,
+            threads=False,
+            progress=False
+        )
+        return normalize_history_frame(frame, symbols)
+
+    def info(self, symbol: str) -> Dict:
+        """Get company metadata for a symbol"""
+        return yf.Ticker(symbol).info or {}
+
+
+class StubProvider:
+    """Local provider that synthesizes deterministic bars, for tests and benchmarks"""
+
+    name = 'stub'
+
+    def __init__(self, history_latency: float = 0.0, info_latency: float = 0.0,
+                 max_concurrency: int = 4, chunk_size: int = 100, missing: Optional[List[str]] = None):
+        self.history_latency = history_latency
+        self.info_latency = info_latency
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.missing = set(missing or [])
+        self.history_calls = 0
+        self.info_calls = 0
+        self._lock = threading.Lock()
+
+    def history(self, symbols: List[str], period: str = '5d', interval: str = '1d', start=None):
+        """Return synthetic daily bars for every known symbol"""
+        with self._lock:
+            self.history_calls += 1
+        time.sleep(self.history_latency)
+        end = pd.Timestamp.now().normalize()
+        if start is not None:
+            index = pd.bdate_range(start=pd.Timestamp(start).normalize(), end=end)
+        else:
+            index = pd.bdate_range(end=end, periods=max(1, PERIOD_DAYS.get(period, 366) * 5 // 7))
+        frames = {}
+        for symbol in symbols:
+            if symbol in self.missing:
+                continue
+            frames[symbol] = self.bars(symbol, index)
+        if not frames:
+            return normalize_history_frame(None, symbols)
+        return pd.concat(frames, axis=1).rename_axis(columns=['symbol', 'field'])
+
+    def info(self, symbol: str) -> Dict:
+        """Return synthetic company metadata"""
+        with self._lock:
+            self.info_calls += 1
+        time.sleep(self.info_latency)
+        if symbol in self.missing:
+            return {}
+        return {'longName': f"{symbol} Inc.", 'marketCap': 1000000000, 'sector': 'Technology'}
+
+    @staticmethod
+    def bars(symbol: str, index):
+        """Random-walk OHLC bars seeded by the symbol so repeated calls agree"""
+        seed = zlib.crc32(symbol.encode('utf-8'))
+        # Seed off the absolute date so overlapping ranges produce the same bars
+        days = (index.values.astype('datetime64[D]').astype('int64') + seed) % 9973
+        close = 50 + 10 * np.sin(days / 40.0) + (seed % 200)
+        return pd.DataFrame({
+            'Open': close * 0.995,
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Close': close,
+            'Volume': (days * 1000 + 100000).astype('int64')
+        }, index=index)
+
+
+class BulkFetcher:
+    """Fetches OHLC history and metadata for many symbols concurrently"""
+
+    def __init__(self, provider=None, max_workers: int = 8):
+        self.provider = provider or YahooProvider()
+        self.max_workers = max_workers
+        self._limit = _provider_semaphore(self.provider)
+
+    def fetch_history(self, symbols: List[str], period: str = '5d', interval: str = '1d', start=None):
+        """Get a wide (symbol, field) history frame for all symbols"""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return normalize_history_frame(None, symbols)
+        chunk_size = getattr(self.provider, 'chunk_size', 100)
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+            frames = list(pool.map(
+                lambda chunk: self._history_chunk(chunk, period, interval, start), chunks
+            ))
+
+        frames = [frame for frame in frames if frame is not None and not frame.empty]
+        if not frames:
+            return normalize_history_frame(None, symbols)
+        return pd.concat(frames, axis=1).sort_index()
+
+    def fetch_info(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get company metadata for all symbols; failed lookups map to {}"""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as pool:
+            infos = list(pool.map(self._info_one, symbols))
+        return dict(zip(symbols, infos))
+
+    def _history_chunk(self, chunk: List[str], period: str, interval: str, start):
+        with self._limit:
+            try:
+                return self.provider.history(chunk, period=period, interval=interval, start=start)
+            except Exception as e:
+                logger.error(f"Error fetching history chunk {chunk[0]}..{chunk[-1]}: {e}")
+                return None
+
+    def _info_one(self, symbol: str) -> Dict:
+        with self._limit:
+            try:
+                return self.provider.info(symbol) or {}
+            except Exception as e:
+                logger.error(f"Error fetching info for {symbol}: {e}")
+                return {}
+
+
+if __name__ == "__main__":
+    # Throughput benchmark against the local stub provider
+    for count in (50, 500, 5000):
+        stub = StubProvider(history_latency=0.05, info_latency=0.005, max_concurrency=8)
+        fetcher = BulkFetcher(stub, max_workers=8)
+        symbols = [f"S{i:05d}" for i in range(count)]
+
+        started = time.perf_counter()
+        frame = fetcher.fetch_history(symbols, period='5d')
+        infos = fetcher.fetch_info(symbols)
+        elapsed = time.perf_counter() - started
+
+        print(f"{count:>5} symbols: {elapsed:7.3f}s  {count / elapsed:9.1f} symbols/sec  "
+              f"({stub.history_calls} history calls, {stub.info_calls} info calls, "
+              f"{frame.columns.get_level_values(0).nunique()} symbols returned)")
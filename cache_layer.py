@@ -0,0 +1,317 @@
+"""
+Multi-Tier TTL Cache for TradingGrow
+In-process LRU in front of an optional shared backend (Redis), with per-method
+TTLs, single-flight loading of concurrent misses and hit/miss counters
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+# Optional import for the shared Redis backend
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Seconds each FinancialDataService method result stays fresh
+CACHE_TTLS = {
+    'sector_performance': 300,
+    'stock_data': 300,
+    'chart_histories': 300,
+    'market_overview': 60,
+    'search_stocks': 3600,
+}
+
+# Seconds past expiry a value may still be served while it is refreshed
+CACHE_STALE_SECONDS = {
+    'sector_performance': 3600,
+    'market_overview': 3600,
+}
+
+# How long a single-flight follower waits for the leader's load
+LOAD_WAIT_SECONDS = 60
+
+
+class CacheEntry:
+    """Cached value with its freshness window"""
+
+    __slots__ = ('value', 'stored_at', 'expires_at')
+
+    def __init__(self, value, stored_at: float, expires_at: float):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def usable(self, stale_seconds: float = 0) -> bool:
+        """Fresh, or expired for no longer than `stale_seconds`"""
+        return time.time() < self.expires_at + stale_seconds
+
+
+class LRUTTLCache:
+    """Thread-safe in-process LRU cache of CacheEntry objects"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class InMemoryBackend:
+    """Shared-backend stand-in kept in process memory, for tests"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.time():
+                self._data.pop(key, None)
+                return None
+            return item[1]
+
+    def set(self, key: str, value: bytes, ttl: int):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    """Shared backend on Redis so all gunicorn workers see the same entries"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisBackend':
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self.client.set(key, value, ex=max(1, int(ttl)))
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+
+class TieredCache:
+    """Local LRU + optional shared backend with single-flight loads
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, local_maxsize: int = 1024, shared=None, namespace: str = 'tradinggrow'):
+        self.local = LRUTTLCache(local_maxsize)
+        self.shared = shared
+        self.namespace = namespace
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats = defaultdict(lambda: defaultdict(int))
+        self._stats_lock = threading.Lock()
+
+    def _count(self, method: str, counter: str):
+        with self._stats_lock:
+            self._stats[method][counter] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters per cached method"""
+        with self._stats_lock:
+            return {method: dict(counters) for method, counters in self._stats.items()}
+
+    def get_entry(self, method: str, key: str, stale_seconds: float = 0) -> Optional[CacheEntry]:
+        """Look a key up locally, then in the shared backend; may return a stale entry"""
+        entry = self.local.get(key)
+        if entry is not None and entry.fresh:
+            self._count(method, 'local_hits')
+            return entry
+        if self.shared is not None:
+            try:
+                raw = self.shared.get(f"{self.namespace}:{key}")
+            except Exception as e:
+                self._count(method, 'shared_errors')
+                logger.warning(f"Shared cache read failed for {key}: {e}")
+                raw = None
+            if raw is not None:
+                stored = json.loads(raw)
+                shared_entry = CacheEntry(stored['value'], stored['stored_at'], stored['expires_at'])
+                if entry is None or shared_entry.stored_at > entry.stored_at:
+                    self.local.set(key, shared_entry)
+                    entry = shared_entry
+                if entry.fresh:
+                    self._count(method, 'shared_hits')
+                    return entry
+        if entry is not None and entry.usable(stale_seconds):
+            self._count(method, 'stale_hits')
+            return entry
+        return None
+
+    def set(self, method: str, key: str, value, ttl: int, stale_seconds: float = 0) -> CacheEntry:
+        """Store a value in both tiers"""
+        now = time.time()
+        entry = CacheEntry(value, now, now + ttl)
+        self.local.set(key, entry)
+        if self.shared is not None:
+            try:
+                raw = json.dumps({'value': value, 'stored_at': now, 'expires_at': now + ttl}, default=str)
+                self.shared.set(f"{self.namespace}:{key}", raw.encode('utf-8'), ttl + stale_seconds)
+            except Exception as e:
+                self._count(method, 'shared_errors')
+                logger.warning(f"Shared cache write failed for {key}: {e}")
+        return entry
+
+    def invalidate(self, key: str):
+        """Drop a key from both tiers"""
+        self.local.delete(key)
+        if self.shared is not None:
+            try:
+                self.shared.delete(f"{self.namespace}:{key}")
+            except Exception as e:
+                logger.warning(f"Shared cache delete failed for {key}: {e}")
+
+    def get_or_load(self, method: str, key: str, ttl: int, loader: Callable,
+                    cache_if: Optional[Callable] = None, stale_seconds: float = 0):
+        """Return a cached value or load it once, however many callers miss together
+
+        With `stale_seconds`, an expired value is returned immediately while a
+        background thread refreshes it.
+        """
+        entry = self.get_entry(method, key, stale_seconds)
+        if entry is not None:
+            if not entry.fresh:
+                self.refresh_async(method, key, ttl, loader, cache_if, stale_seconds)
+            return entry.value
+        return self.load(method, key, ttl, loader, cache_if, stale_seconds)
+
+    def refresh_async(self, method: str, key: str, ttl: int, loader: Callable,
+                      cache_if: Optional[Callable] = None, stale_seconds: float = 0):
+        """Reload a key on a background thread unless a load is already running"""
+        with self._inflight_lock:
+            if key in self._inflight:
+                return
+
+        def run():
+            try:
+                self.load(method, key, ttl, loader, cache_if, stale_seconds)
+            except Exception as e:
+                logger.error(f"Background refresh of {key} failed: {e}")
+
+        threading.Thread(target=run, name=f"cache-refresh-{method}", daemon=True).start()
+
+    def load(self, method: str, key: str, ttl: int, loader: Callable,
+             cache_if: Optional[Callable] = None, stale_seconds: float = 0):
+        """Run the loader under single-flight and cache its result"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            self._count(method, 'coalesced')
+            return future.result(timeout=LOAD_WAIT_SECONDS)
+
+        self._count(method, 'misses')
+        try:
+            value = loader()
+            if cache_if is None or cache_if(value):
+                self.set(method, key, value, ttl, stale_seconds)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+
+def make_key(method: str, args, kwargs) -> str:
+    """Stable cache key for a method call"""
+    return f"{method}:{json.dumps([list(args), sorted(kwargs.items())], default=str)}"
+
+
+def cached(method: str, cache_if: Optional[Callable] = None):
+    """Cache a service method's result in `self.cache` using CACHE_TTLS[method]
+
+    Methods listed in CACHE_STALE_SECONDS serve stale values while refreshing.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return fn(self, *args, **kwargs)
+            key = make_key(method, args, kwargs)
+            return cache.get_or_load(method, key, CACHE_TTLS[method], lambda: fn(self, *args, **kwargs),
+                                     cache_if, CACHE_STALE_SECONDS.get(method, 0))
+        wrapper.cache_method = method
+        wrapper.cache_if = cache_if
+        return wrapper
+    return decorator
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache() -> TieredCache:
+    """Process-wide cache, backed by Redis when REDIS_URL is configured"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            shared = None
+            redis_url = os.getenv('REDIS_URL')
+            if redis_url and REDIS_AVAILABLE:
+                try:
+                    shared = RedisBackend.from_url(redis_url)
+                except Exception as e:
+                    logger.warning(f"Redis cache unavailable, using local cache only: {e}")
+            _default_cache = TieredCache(shared=shared)
+        return _default_cache
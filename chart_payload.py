@@ -0,0 +1,184 @@
+"""
+Compact Chart Payloads for TradingGrow
+Columnar encodings of OHLC bars and value series: parallel arrays, epoch-day
+or delta-encoded dates and optional float32-precision rounding, each built
+with whole-column NumPy ops instead of one dict per bar
+"""
+
+import logging
+from typing import Dict, List, Mapping
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHART_FORMATS = ('rows', 'columnar')
+# epoch: days since 1970-01-01; delta: first epoch day, then day gaps; iso: YYYY-MM-DD strings
+DATE_ENCODINGS = ('epoch', 'delta', 'iso')
+PRICE_DECIMALS = 2
+# Significant digits a float32 carries
+FLOAT32_DIGITS = 7
+
+
+def chart_options(args: Mapping) -> Dict:
+    """Chart payload options negotiated through ?chart_format=&chart_dates=&chart_precision="""
+    chart_format = args.get('chart_format', 'rows')
+    date_encoding = args.get('chart_dates', 'epoch')
+    return {
+        'chart_format': chart_format if chart_format in CHART_FORMATS else 'rows',
+        'date_encoding': date_encoding if date_encoding in DATE_ENCODINGS else 'epoch',
+        'float32': args.get('chart_precision') == 'float32',
+    }
+
+
+def frame_days(hist_df) -> np.ndarray:
+    """Epoch days of a history frame's DatetimeIndex, by its local calendar date"""
+    index = hist_df.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[D]').astype(np.int64)
+
+
+def encode_days(days: np.ndarray, date_encoding: str = 'epoch') -> List:
+    """Dates of a series in the requested encoding"""
+    days = np.asarray(days, dtype=np.int64)
+    if date_encoding == 'iso':
+        return np.datetime_as_string(days.astype('datetime64[D]')).tolist()
+    if date_encoding == 'delta' and len(days):
+        return np.concatenate([days[:1], np.diff(days)]).tolist()
+    return days.tolist()
+
+
+def round_float32(values: np.ndarray) -> np.ndarray:
+    """Round to the significant digits a float32 holds, so each value serializes short"""
+    values = np.asarray(values, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponent = np.floor(np.log10(np.abs(values)))
+    decimals = np.where(np.isfinite(exponent), FLOAT32_DIGITS - 1 - exponent, 0)
+    # Divide by an exact power of ten so the result is the nearest double to the decimal
+    up = 10.0 ** np.maximum(decimals, 0)
+    down = 10.0 ** np.maximum(-decimals, 0)
+    return np.round(values * up / down) * down / up
+
+
+def json_floats(values: np.ndarray) -> List:
+    """Float list with None for NaN, in one tolist call"""
+    values = np.asarray(values, dtype='float64')
+    missing = np.isnan(values)
+    if not missing.any():
+        return values.tolist()
+    boxed = values.astype(object)
+    boxed[missing] = None
+    return boxed.tolist()
+
+
+def _prices(values: np.ndarray, float32: bool) -> List:
+    values = np.asarray(values, dtype='float64').round(PRICE_DECIMALS)
+    return json_floats(round_float32(values) if float32 else values)
+
+
+def row_bars(hist_df) -> List[Dict]:
+    """One {'date', 'open', 'high', 'low', 'close', 'volume'} dict per bar"""
+    dates = encode_days(frame_days(hist_df), 'iso')
+    ohlc = hist_df[['Open', 'High', 'Low', 'Close']].round(PRICE_DECIMALS).to_numpy().tolist()
+    volumes = hist_df['Volume'].fillna(0).astype('int64').tolist()
+    return [
+        {'date': date, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': volume}
+        for date, (o, h, l, c), volume in zip(dates, ohlc, volumes)
+    ]
+
+
+def columnar_bars(hist_df, date_encoding: str = 'epoch', float32: bool = False) -> Dict:
+    """Parallel date/open/high/low/close/volume arrays for a history frame"""
+    payload = {'format': 'columnar', 'date_encoding': date_encoding,
+               'dates': encode_days(frame_days(hist_df), date_encoding)}
+    for column in ('Open', 'High', 'Low', 'Close'):
+        payload[column.lower()] = _prices(hist_df[column].to_numpy(), float32)
+    payload['volume'] = np.nan_to_num(hist_df['Volume'].to_numpy(dtype='float64')).astype(np.int64).tolist()
+    return payload
+
+
+def empty_columnar_bars(date_encoding: str = 'epoch') -> Dict:
+    return {'format': 'columnar', 'date_encoding': date_encoding, 'dates': [],
+            'open': [], 'high': [], 'low': [], 'close': [], 'volume': []}
+
+
+def bars_payload(hist_df, chart_format: str = 'rows', date_encoding: str = 'epoch', float32: bool = False):
+    """Chart bars of a history frame in the negotiated format"""
+    if hist_df is None or hist_df.empty:
+        return [] if chart_format == 'rows' else empty_columnar_bars(date_encoding)
+    if chart_format == 'columnar':
+        return columnar_bars(hist_df, date_encoding, float32)
+    return row_bars(hist_df)
+
+
+def has_bars(payload) -> bool:
+    """Whether a bars payload of either format holds any bars"""
+    return bool(payload['dates'] if isinstance(payload, dict) else payload)
+
+
+def columnar_series(days: np.ndarray, values: np.ndarray, date_encoding: str = 'epoch',
+                    float32: bool = False) -> Dict:
+    """Parallel dates/values arrays for a single value series"""
+    values = np.asarray(values, dtype='float64')
+    return {'format': 'columnar', 'date_encoding': date_encoding, 'dates': encode_days(days, date_encoding),
+            'values': json_floats(round_float32(values) if float32 else values)}
+
+
+def _legacy_rows(hist_df) -> List[Dict]:
+    """The previous iterrows formatter, for benchmarking"""
+    data = []
+    for date, row in hist_df.iterrows():
+        data.append({
+            'date': date.strftime('%Y-%m-%d'),
+            'open': round(row['Open'], 2),
+            'high': round(row['High'], 2),
+            'low': round(row['Low'], 2),
+            'close': round(row['Close'], 2),
+            'volume': int(row['Volume'])
+        })
+    return data
+
+
+if __name__ == "__main__":
+    # Benchmark: build time and JSON size of the row and columnar formats
+    import json
+    import time
+
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+
+    def timed(fn, repeat: int = 20):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return result, (time.perf_counter() - started) / repeat
+
+    for label, bars in (('6mo', 126), ('1y', 252), ('5y', 1260)):
+        closes = 150 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+        frame = pd.DataFrame({'Open': closes * 0.99, 'High': closes * 1.01, 'Low': closes * 0.98,
+                              'Close': closes, 'Volume': rng.integers(1e5, 1e7, bars).astype(float)},
+                             index=pd.date_range('2020-01-01', periods=bars, freq='B', tz='America/New_York'))
+        legacy, legacy_time = timed(lambda: _legacy_rows(frame))
+        rows, rows_time = timed(lambda: row_bars(frame))
+        assert rows == legacy
+        legacy_size = len(json.dumps(legacy, separators=(',', ':')))
+        line = f"{label:>4} ({bars} bars)  iterrows {legacy_time * 1e3:6.2f} ms {legacy_size / 1e3:6.1f} KB"
+        line += f" | vectorized rows {rows_time * 1e3:5.2f} ms"
+        for encoding, float32 in (('epoch', False), ('delta', False), ('delta', True)):
+            payload, build_time = timed(lambda: columnar_bars(frame, encoding, float32))
+            size = len(json.dumps(payload, separators=(',', ':')))
+            line += (f" | columnar {encoding}{'/f32' if float32 else ''} {build_time * 1e3:4.2f} ms "
+                     f"{size / 1e3:5.1f} KB ({legacy_size / size:.1f}x)")
+        print(line)
+
+    # Value series (benchmark / MRS) keep full float64 digits unless rounded to float32 precision
+    days = np.arange(18000, 18366)
+    values = np.cumsum(rng.normal(0, 0.01, len(days)))
+    legacy_size = len(json.dumps({'dates': encode_days(days, 'iso'), 'values': values.tolist()}, separators=(',', ':')))
+    line = f"1y value series  iso/float64 {legacy_size / 1e3:5.1f} KB"
+    for encoding, float32 in (('delta', False), ('delta', True)):
+        size = len(json.dumps(columnar_series(days, values, encoding, float32), separators=(',', ':')))
+        line += f" | {encoding}{'/f32' if float32 else ''} {size / 1e3:5.1f} KB ({legacy_size / size:.1f}x)"
+    print(line)
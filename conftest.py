@@ -0,0 +1,61 @@
+"""
+Shared pytest fixtures for TradingGrow
+Points the app at a throwaway SQLite database, bar store and snapshot
+directory before anything imports it, and keeps background threads off
+"""
+
+import os
+import tempfile
+
+import pytest
+
+_ROOT = tempfile.mkdtemp(prefix='tradinggrow-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_ROOT, 'test.db')}"
+os.environ['BAR_STORE_DIR'] = os.path.join(_ROOT, 'bars')
+os.environ['UNIVERSE_SNAPSHOT_DIR'] = os.path.join(_ROOT, 'snapshots')
+os.environ['BACKGROUND_REFRESH'] = '0'
+os.environ.pop('REDIS_URL', None)
+
+# test_admin_api.py is a manual script against a running server, not a pytest module
+collect_ignore = ['test_admin_api.py']
+
+ADMIN_SESSION = {'id': 'admin-user-1', 'email': 'admin@tradinggrow.com', 'is_admin': True}
+USER_SESSION = {'id': 'user-1', 'email': 'user@tradinggrow.com', 'is_admin': False}
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+def _client(app, user_data):
+    client = app.test_client()
+    if user_data is not None:
+        with client.session_transaction() as session:
+            session['mock_user_data'] = dict(user_data)
+    return client
+
+
+@pytest.fixture
+def admin_client(app):
+    return _client(app, ADMIN_SESSION)
+
+
+@pytest.fixture
+def user_client(app):
+    return _client(app, USER_SESSION)
+
+
+@pytest.fixture
+def anonymous_client(app):
+    return _client(app, None)
+
+
+@pytest.fixture
+def stock_universe(app):
+    """The shared admin stock universe, reset to its mock seed stocks"""
+    from admin_routes import MOCK_STOCKS, STOCK_UNIVERSE
+    STOCK_UNIVERSE.replace(MOCK_STOCKS)
+    return STOCK_UNIVERSE
@@ -0,0 +1,170 @@
+"""
+Streaming Stock CSV Ingestion for TradingGrow
+Decodes admin stock uploads incrementally, validates rows in chunks and
+dedupes by symbol through a hash index instead of rescanning the list
+"""
+
+import csv
+import io
+import logging
+import time
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ['symbol', 'industry', 'market_cap', 'market_cap_formatted', 'latest_volume', 'mrs_current',
+                   'weekly_growth', 'total_stocks', 'total_market_cap_formatted', 'price_vs_sma_pct', 'watchlist_type']
+CHUNK_ROWS = 1000
+# Error messages kept for the response; the count covers every bad row
+MAX_ERRORS = 100
+
+
+class IngestResult:
+    """Outcome of one upload"""
+
+    def __init__(self):
+        self.stocks = []
+        self.new_stocks = []
+        self.entry_stocks = []
+        self.breakout_stocks = []
+        self.processed = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+
+
+def iter_chunks(binary_stream: BinaryIO, chunk_rows: int = CHUNK_ROWS, encoding: str = 'utf-8') -> Iterator[List]:
+    """Yield lists of (row_num, row) read incrementally from an uploaded file"""
+    text = io.TextIOWrapper(binary_stream, encoding=encoding, newline='')
+    try:
+        rows = enumerate(csv.DictReader(text), start=2)  # Row 1 is the header
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        # Leave the underlying upload open for the request to clean up
+        text.detach()
+
+
+def parse_row(row: Dict) -> Dict:
+    """Convert a validated CSV row into a stock record (raises ValueError)"""
+    return {
+        'symbol': row['symbol'].strip().upper(),
+        'industry': row['industry'].strip(),
+        'market_cap': float(row['market_cap']),
+        'market_cap_formatted': row['market_cap_formatted'].strip(),
+        'latest_volume': int(row['latest_volume']),
+        'mrs_current': float(row['mrs_current']),
+        'weekly_growth': float(row['weekly_growth']),
+        'total_stocks': int(row['total_stocks']),
+        'total_market_cap_formatted': row['total_market_cap_formatted'].strip(),
+        'price_vs_sma_pct': float(row['price_vs_sma_pct']),
+        'watchlist_type': row['watchlist_type'].strip().lower()
+    }
+
+
+def ingest_stocks(binary_stream: BinaryIO, chunk_rows: int = CHUNK_ROWS) -> IngestResult:
+    """Stream an uploaded stock CSV into a deduplicated list of stock records
+
+    A repeated symbol updates the earlier record in place; every valid row is
+    also listed under its watchlist type.
+    """
+    result = IngestResult()
+    by_symbol = {}
+    for chunk in iter_chunks(binary_stream, chunk_rows):
+        for row_num, row in chunk:
+            try:
+                missing_fields = [field for field in REQUIRED_FIELDS if not (row.get(field) or '').strip()]
+                if missing_fields:
+                    result.add_error(f"Row {row_num}: Missing required fields: {', '.join(missing_fields)}")
+                    continue
+                stock_data = {'id': str(len(result.stocks) + result.processed + 1), **parse_row(row)}
+            except ValueError as e:
+                result.add_error(f"Row {row_num}: Invalid data format - {str(e)}")
+                continue
+            except Exception as e:
+                result.add_error(f"Row {row_num}: Error processing row - {str(e)}")
+                continue
+
+            existing_stock = by_symbol.get(stock_data['symbol'])
+            if existing_stock is not None:
+                existing_stock.update(stock_data)
+            else:
+                by_symbol[stock_data['symbol']] = stock_data
+                result.stocks.append(stock_data)
+                result.new_stocks.append(stock_data)
+            if stock_data['watchlist_type'] == 'entry':
+                result.entry_stocks.append(stock_data)
+            elif stock_data['watchlist_type'] == 'breakout':
+                result.breakout_stocks.append(stock_data)
+            result.processed += 1
+    logger.info(f"Ingested {result.processed} rows ({len(result.stocks)} symbols, {result.error_count} errors)")
+    return result
+
+
+def _legacy_ingest(binary_stream: BinaryIO) -> List[Dict]:
+    """The previous read-everything, linear-dedupe handler body, for benchmarking"""
+    stream = io.StringIO(binary_stream.read().decode("UTF8"), newline=None)
+    stocks = []
+    processed_count = 0
+    for row in csv.DictReader(stream):
+        missing_fields = [field for field in REQUIRED_FIELDS if not row.get(field, '').strip()]
+        if missing_fields:
+            continue
+        stock_data = {'id': str(len(stocks) + processed_count + 1), **parse_row(row)}
+        existing_stock = next((s for s in stocks if s['symbol'] == stock_data['symbol']), None)
+        if existing_stock:
+            existing_stock.update(stock_data)
+        else:
+            stocks.append(stock_data)
+        processed_count += 1
+    return stocks
+
+
+if __name__ == "__main__":
+    # Benchmark: rows/sec and peak Python memory against the previous handler
+    import tempfile
+    import tracemalloc
+
+    def write_csv(path: str, rows: int):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(REQUIRED_FIELDS)
+            for i in range(rows):
+                # Roughly one row in ten repeats an earlier symbol
+                symbol = f"S{i % (rows - rows // 10 or 1):06d}"
+                writer.writerow([symbol, f"Industry {i % 150}", 1.5e9 + i, '1.5B', 100000 + i, 55.5, 2.5,
+                                 40, '60B', 12.5, 'entry' if i % 2 else 'breakout'])
+
+    def measure(fn, path: str):
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            fn(f)
+        elapsed = time.perf_counter() - started
+        # Separate run for memory; tracing slows everything down
+        tracemalloc.start()
+        with open(path, 'rb') as f:
+            fn(f)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (1000, 10000, 100000):
+            path = f"{tmp}/stocks_{rows}.csv"
+            write_csv(path, rows)
+            new_time, new_peak = measure(ingest_stocks, path)
+            line = f"{rows:>7} rows  streaming: {rows / new_time:>10,.0f} rows/s, peak {new_peak / 1e6:6.1f} MB"
+            if rows <= 10000:
+                old_time, old_peak = measure(_legacy_ingest, path)
+                line += f"  |  legacy: {rows / old_time:>10,.0f} rows/s, peak {old_peak / 1e6:6.1f} MB"
+            else:
+                line += "  |  legacy: skipped (quadratic)"
+            print(line)
@@ -1,30 +1,24 @@
 import yfinance as yf
 import pandas as pd
+from bar_store import bar_store
+from screening_criteria import BULLISH_SMA_CRITERIA, screen_ohlc
 
 def download_ohlc(symbols, period='6mo', interval='1d'):
+    # Stored bars are served locally; only bars after the last stored one are downloaded
     data = {}
-    for symbol in symbols:
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period, interval=interval)
-            if not hist.empty:
-                data[symbol] = hist[['Open', 'High', 'Low', 'Close', 'Volume']]
-        except Exception as e:
-            print(f"Error downloading {symbol}: {e}")
+    try:
+        histories = bar_store.get_histories(symbols, period=period, interval=interval)
+    except Exception as e:
+        print(f"Error downloading {symbols}: {e}")
+        return data
+    for symbol, hist in histories.items():
+        if not hist.empty:
+            data[symbol] = hist[['Open', 'High', 'Low', 'Close', 'Volume']]
     return data
 
 def calculate_bullish_stocks(ohlc_data):
-    bullish = []
-    for symbol, df in ohlc_data.items():
-        if len(df) < 150:
-            continue
-        df['SMA50'] = df['Close'].rolling(window=50).mean()
-        df['SMA150'] = df['Close'].rolling(window=150).mean()
-        latest = df.iloc[-1]
-        # Bullish if price above both SMAs
-        if latest['Close'] > latest['SMA50'] and latest['Close'] > latest['SMA150']:
-            bullish.append(symbol)
-    return bullish
+    # Bullish if price above both SMAs, evaluated for all symbols in one pass
+    return screen_ohlc(ohlc_data, BULLISH_SMA_CRITERIA).passing()
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,204 @@
+"""
+Chart Downsampling for TradingGrow
+Reduces long chart series to a target point count on the server: Largest-
+Triangle-Three-Buckets for value series and min/max bucketing for OHLC bars,
+both vectorized, with results memoized per (symbol, range, resolution)
+"""
+
+import logging
+import time
+from typing import Callable, Hashable, Tuple
+
+import numpy as np
+
+from cache_layer import CacheEntry, LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+# Long series are first cut to this many rows per output point by per-bucket min/max (MinMaxLTTB)
+MINMAX_RATIO = 4
+DOWNSAMPLE_CACHE_SIZE = 4096
+# Keys carry the series identity (last bar, length, version), so entries only age out of the LRU
+DOWNSAMPLE_TTL = 86400
+
+_cache = LRUTTLCache(maxsize=DOWNSAMPLE_CACHE_SIZE)
+
+
+def stride_indices(length: int, points: int) -> np.ndarray:
+    """Evenly spaced row indexes, always including the first and last row"""
+    if points <= 0 or length <= points:
+        return np.arange(length)
+    return np.unique(np.linspace(0, length - 1, points).round().astype(int))
+
+
+def bucket_starts(length: int, points: int) -> np.ndarray:
+    """First row of each of `points` contiguous, near-equal buckets"""
+    return np.arange(points, dtype=np.int64) * length // points
+
+
+def minmax_indices(y: np.ndarray, buckets: int) -> np.ndarray:
+    """Sorted rows holding each bucket's min and max value"""
+    length = len(y)
+    starts = bucket_starts(length, buckets)
+    bucket = np.repeat(np.arange(buckets), np.diff(np.append(starts, length)))
+    rows = []
+    for reduce in (np.fmax, np.fmin):
+        extreme = reduce.reduceat(y, starts)
+        hits = np.flatnonzero(y == extreme[bucket])
+        rows.append(hits[np.unique(bucket[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(rows))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Row indexes picked by Largest-Triangle-Three-Buckets
+
+    The first and last rows are always kept; every interior bucket keeps the
+    row spanning the largest triangle with the neighbouring buckets'
+    centroids, and the series' overall peak and trough are always kept.
+    Series longer than MINMAX_RATIO x points are first reduced to their
+    per-bucket extremes, which bounds the work. NaN values are never picked
+    over real ones.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    length = len(y)
+    if points <= 0 or length <= points:
+        return np.arange(length)
+    if points < 3:
+        return stride_indices(length, points)
+    if length > MINMAX_RATIO * points:
+        keep = np.unique(np.concatenate([[0], minmax_indices(y, MINMAX_RATIO * points // 2), [length - 1]]))
+        if len(keep) <= points:
+            return keep
+        return keep[_lttb(x[keep], y[keep], points)]
+    return _lttb(x, y, points)
+
+
+def _lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    # Anchoring each bucket on the previous centroid, rather than the previously
+    # picked row, makes the buckets independent so they are solved at once
+    length = len(y)
+    edges = np.linspace(1, length - 1, points - 1).astype(np.int64)
+    starts, sizes = edges[:-1], np.diff(edges)
+    valid = ~np.isnan(y)
+    counts = np.add.reduceat(valid, starts)
+    centroid_x = np.add.reduceat(x, starts) / sizes
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centroid_y = np.add.reduceat(np.where(valid, y, 0.0), starts) / counts
+    anchor_x = np.concatenate([x[:1], centroid_x[:-1]])
+    anchor_y = np.concatenate([y[:1], centroid_y[:-1]])
+    next_x = np.concatenate([centroid_x[1:], x[-1:]])
+    next_y = np.concatenate([centroid_y[1:], y[-1:]])
+
+    # (buckets x widest bucket) candidate matrix, padded past each bucket's end
+    offsets = np.arange(sizes.max())
+    rows = np.minimum(starts[:, None] + offsets, length - 1)
+    px, py = x[rows], y[rows]
+    area = np.abs((anchor_x[:, None] - next_x[:, None]) * (py - anchor_y[:, None])
+                  - (anchor_x[:, None] - px) * (next_y[:, None] - anchor_y[:, None]))
+    area = np.where(np.isnan(py), -np.inf, np.nan_to_num(area, nan=-1.0))
+    area[offsets >= sizes[:, None]] = -np.inf
+    picked = rows[np.arange(len(starts)), area.argmax(axis=1)]
+    # The series' own peak and trough always replace their bucket's pick
+    if valid.any():
+        for extreme in (np.nanargmax(y), np.nanargmin(y)):
+            if 0 < extreme < length - 1:
+                picked[np.searchsorted(starts, extreme, side='right') - 1] = extreme
+    return np.concatenate([[0], picked, [length - 1]])
+
+
+def downsample_ohlc(hist_df, points: int):
+    """Merge consecutive bars into at most `points` bars, keeping every high and low
+
+    Each bucket opens at its first open, closes at its last close, spans the
+    max high and min low and sums the volume; it is labelled by its first date.
+    """
+    length = len(hist_df)
+    if points <= 0 or length <= points:
+        return hist_df
+    starts = bucket_starts(length, points)
+    ends = np.concatenate([starts[1:], [length]]) - 1
+    volume = np.nan_to_num(hist_df['Volume'].to_numpy(dtype='float64'))
+    return type(hist_df)({
+        'Open': hist_df['Open'].to_numpy(dtype='float64')[starts],
+        'High': np.fmax.reduceat(hist_df['High'].to_numpy(dtype='float64'), starts),
+        'Low': np.fmin.reduceat(hist_df['Low'].to_numpy(dtype='float64'), starts),
+        'Close': hist_df['Close'].to_numpy(dtype='float64')[ends],
+        'Volume': np.add.reduceat(volume, starts),
+    }, index=hist_df.index[starts])
+
+
+def cached_downsample(key: Tuple[Hashable, ...], compute: Callable):
+    """Memoize a downsampled chart under a (symbol, range, resolution, ...) key"""
+    key = repr(key)
+    entry = _cache.get(key)
+    if entry is not None and entry.fresh:
+        return entry.value
+    value = compute()
+    now = time.time()
+    _cache.set(key, CacheEntry(value, now, now + DOWNSAMPLE_TTL))
+    return value
+
+
+def cached_ohlc(symbol: str, range_name: str, interval: str, points: int, hist_df):
+    """downsample_ohlc of a symbol's history, reused until a new bar arrives"""
+    if hist_df is None or len(hist_df) <= points:
+        return hist_df
+    key = (symbol, range_name, interval, points, len(hist_df), str(hist_df.index[-1]))
+    return cached_downsample(key, lambda: downsample_ohlc(hist_df, points))
+
+
+def _sequential_lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Textbook LTTB anchored on each previously picked row, for benchmarking"""
+    length = len(y)
+    edges = np.linspace(1, length - 1, points - 1).astype(np.int64)
+    picked = [0]
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            cx, cy = x[hi:edges[b + 2]].mean(), y[hi:edges[b + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[picked[-1]], y[picked[-1]]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        picked.append(lo + int(area.argmax()))
+    picked.append(length - 1)
+    return np.array(picked)
+
+
+if __name__ == "__main__":
+    # Benchmark: downsampling cost, cached cost and how well extremes survive
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+
+    def timed(fn, repeat: int = 50):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return result, (time.perf_counter() - started) / repeat
+
+    def extremes_kept(y: np.ndarray, rows: np.ndarray) -> str:
+        return f"max {'kept' if y.argmax() in rows else 'lost'}, min {'kept' if y.argmin() in rows else 'lost'}"
+
+    points = 250
+    for label, length in (('5y daily', 1260), ('1y 5-min', 19656), ('5y 5-min', 98280)):
+        x = np.arange(length, dtype='float64')
+        y = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+        stride, stride_time = timed(lambda: stride_indices(length, points))
+        lttb, lttb_time = timed(lambda: lttb_indices(x, y, points))
+        sequential, sequential_time = timed(lambda: _sequential_lttb(x, y, points), repeat=5)
+        agreement = len(np.intersect1d(lttb, sequential)) / len(sequential)
+        print(f"{label:>9} ({length} pts -> {points})  stride {stride_time * 1e6:6.0f} us ({extremes_kept(y, stride)})"
+              f" | LTTB {lttb_time * 1e6:6.0f} us ({extremes_kept(y, lttb)}, {agreement:.0%} same rows as"
+              f" sequential LTTB at {sequential_time * 1e6:6.0f} us)")
+
+        frame = pd.DataFrame({'Open': y, 'High': y * 1.01, 'Low': y * 0.99, 'Close': y, 'Volume': 1e6},
+                             index=pd.date_range('2020-01-01', periods=length, freq='min', tz='UTC'))
+        bars, bars_time = timed(lambda: downsample_ohlc(frame, points))
+        assert bars['High'].max() == frame['High'].max() and bars['Low'].min() == frame['Low'].min()
+        assert bars['Volume'].sum() == frame['Volume'].sum()
+        _cache.clear()
+        cached_ohlc('BENCH', '5y', '5m', points, frame)
+        _, cached_time = timed(lambda: cached_ohlc('BENCH', '5y', '5m', points, frame))
+        print(f"{'':>9} OHLC min/max bucketing {bars_time * 1e6:6.0f} us, cached {cached_time * 1e6:4.1f} us")
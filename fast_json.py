@@ -0,0 +1,179 @@
+"""
+Fast JSON Responses for TradingGrow
+orjson-backed response encoding with a stdlib fallback, pass-through of JSON
+text that is already stored serialized, and gzip/brotli compression
+negotiated from Accept-Encoding
+"""
+
+import gzip
+import json
+import logging
+import re
+import secrets
+from typing import Union
+
+from flask import Response, request
+
+# Optional fast encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Optional brotli compression
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# orjson >= 3.9 embeds raw JSON natively; older versions splice it in after encoding
+FRAGMENT_AVAILABLE = ORJSON_AVAILABLE and hasattr(orjson, 'Fragment')
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if ORJSON_AVAILABLE else 0
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+# Per-process marker for spliced fragments, so user data cannot forge one
+_SPLICE_TOKEN = f"\x00raw-{secrets.token_hex(8)}:"
+_SPLICE_PATTERN = re.compile(rb'"\\u0000raw-' + _SPLICE_TOKEN[5:].encode() + rb'(\d+)"')
+
+
+class RawJSON:
+    """JSON text embedded verbatim in a response, e.g. a stored results column"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: Union[str, bytes]):
+        self.data = data.encode() if isinstance(data, str) else data
+
+
+def stored_json(text: Union[str, bytes, None], default: str = '{}') -> RawJSON:
+    """RawJSON for a stored JSON column, or `default` when the column is empty or not an object/array"""
+    if text and text.lstrip()[:1] in ('{', '[', b'{', b'['):
+        return RawJSON(text)
+    return RawJSON(default)
+
+
+def _encode_default(value):
+    """Fallback conversions shared by both encoders"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """Serialize payload to compact UTF-8 JSON, embedding RawJSON values as-is"""
+    fragments = []
+
+    def default(value):
+        if isinstance(value, RawJSON):
+            if FRAGMENT_AVAILABLE:
+                return orjson.Fragment(value.data)
+            fragments.append(value.data)
+            return f"{_SPLICE_TOKEN}{len(fragments) - 1}"
+        return _encode_default(value)
+
+    if ORJSON_AVAILABLE:
+        body = orjson.dumps(payload, default=default, option=ORJSON_OPTIONS)
+    else:
+        body = json.dumps(payload, default=default, separators=(',', ':'), ensure_ascii=False).encode()
+    if fragments:
+        body = _SPLICE_PATTERN.sub(lambda match: fragments[int(match.group(1))], body)
+    return body
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Best supported content coding for an Accept-Encoding header, or ''"""
+    offered = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip().lower()] = quality
+    if BROTLI_AVAILABLE and offered.get('br', 0) > 0:
+        return 'br'
+    if offered.get('gzip', 0) > 0:
+        return 'gzip'
+    return ''
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def json_response(payload, status: int = 200, compressed: bool = True) -> Response:
+    """jsonify for large payloads: fast encoding, RawJSON pass-through and negotiated compression"""
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    if compressed and len(body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding:
+            response.set_data(compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+if __name__ == "__main__":
+    # Benchmark: encode time and bytes for a 5,000-stock screening listing
+    import time
+
+    stocks = [{'id': str(i + 1), 'symbol': f"S{i:05d}", 'industry': f"Industry {i % 150}", 'market_cap': 1.5e9 + i,
+               'market_cap_formatted': '1.5B', 'latest_volume': 100000 + i, 'mrs_current': 55.5 + i % 7,
+               'weekly_growth': 2.5, 'total_stocks': 40, 'total_market_cap_formatted': '60B',
+               'price_vs_sma_pct': 12.5, 'watchlist_type': 'entry' if i % 2 else 'breakout'}
+              for i in range(5000)]
+    stored_results = json.dumps({'stocks': stocks, 'summary': {'total_matches': len(stocks)}})
+    stored_criteria = json.dumps({'min_market_cap': 1e9, 'sectors': ['Technology']})
+
+    def timed(fn, repeat: int = 10):
+        fn()  # Warm-up: the first orjson call imports numpy support
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return result, (time.perf_counter() - started) / repeat
+
+    def listing(results, criteria):
+        return {'success': True, 'screenings': [{'id': 'screening-1', 'name': 'Bench', 'criteria_data': criteria,
+                                                 'results_data': results, 'created_at': '2025-01-01T00:00:00Z'}]}
+
+    # What list_stock_screenings did: decode the stored text, then re-encode it (as jsonify does, sorted keys)
+    legacy, legacy_time = timed(lambda: json.dumps(
+        listing(json.loads(stored_results), json.loads(stored_criteria)), sort_keys=True, separators=(',', ':')).encode())
+    decoded, decoded_time = timed(lambda: dumps(listing(json.loads(stored_results), json.loads(stored_criteria))))
+    passthrough, passthrough_time = timed(lambda: dumps(listing(stored_json(stored_results), stored_json(stored_criteria))))
+    assert json.loads(passthrough) == json.loads(legacy) == json.loads(decoded)
+
+    encoder = 'orjson' + ('' if FRAGMENT_AVAILABLE else ' + splice') if ORJSON_AVAILABLE else 'stdlib json'
+    print(f"5,000-stock screening, {len(legacy) / 1e6:.2f} MB of JSON ({encoder})")
+    print(f"  decode + jsonify-style encode: {legacy_time * 1e3:7.2f} ms")
+    print(f"  decode + fast encode:          {decoded_time * 1e3:7.2f} ms")
+    print(f"  stored JSON passed through:    {passthrough_time * 1e3:7.2f} ms")
+    for encoding in ('gzip', 'br'):
+        if encoding == 'br' and not BROTLI_AVAILABLE:
+            print("  br: brotli not installed")
+            continue
+        body, compress_time = timed(lambda: compress(passthrough, encoding))
+        print(f"  {encoding}: {len(body) / 1e3:7.1f} KB ({len(passthrough) / len(body):.1f}x smaller) "
+              f"in {compress_time * 1e3:.2f} ms")
@@ -32,14 +32,39 @@ except ImportError:
     SectorPerformances = None
     ALPHA_VANTAGE_AVAILABLE = False
 
+from bulk_fetcher import BulkFetcher, YahooProvider, split_history
+from bar_store import bar_store
+from cache_layer import TieredCache, cached, default_cache
+from alpha_vantage_client import HTTPX_AVAILABLE, get_client
+from symbol_index import get_symbol_index
+from downsampling import cached_ohlc
+from chart_payload import bars_payload, has_bars
+
 logger = logging.getLogger(__name__)
 
+# Bars per chart returned by get_chart_histories; longer histories are merged min/max-preserving
+CHART_POINTS = 60
+
 class FinancialDataService:
-    def __init__(self):
+    def __init__(self, bulk_fetcher: Optional[BulkFetcher] = None, cache: Optional[TieredCache] = None):
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.polygon_key = os.getenv('POLYGON_API_KEY')
         self.fmp_key = os.getenv('FMP_API_KEY')
         
+        # Batched history downloader; a stub provider can be injected for tests
+        if bulk_fetcher is None and YFINANCE_AVAILABLE:
+            bulk_fetcher = BulkFetcher(YahooProvider())
+        self.bulk_fetcher = bulk_fetcher
+        
+        # Result cache for the provider-backed methods below
+        self.cache = cache if cache is not None else default_cache()
+        
+        # Pooled, rate-limited client for symbol search and sector data
+        self.av_client = get_client(self.alpha_vantage_key) if self.alpha_vantage_key and HTTPX_AVAILABLE else None
+        
+        # Local typeahead index over the universe CSV, uploads and past provider results
+        self.symbol_index = get_symbol_index()
+        
         # Initialize Alpha Vantage if key and library are available
         if self.alpha_vantage_key and ALPHA_VANTAGE_AVAILABLE:
             self.ts = TimeSeries(key=self.alpha_vantage_key, output_format='pandas')
@@ -52,12 +77,16 @@ class FinancialDataService:
             elif not self.alpha_vantage_key:
                 logger.warning("Alpha Vantage API key not found. Using fallback data sources.")
     
+    @cached('sector_performance', cache_if=lambda result: result.get('source') != 'fallback')
     def get_sector_performance(self) -> Dict:
         """Get real-time sector performance data"""
         try:
-            if self.alpha_vantage_key and self.sp:
+            if self.alpha_vantage_key and (self.av_client or self.sp):
                 # Use Alpha Vantage for sector data
-                data, meta_data = self.sp.get_sector()
+                if self.av_client:
+                    data = self.av_client.sector_performance()
+                else:
+                    data, meta_data = self.sp.get_sector()
                 
                 sectors = []
                 rank_mapping = data.get('Rank A: Real-Time Performance', {})
@@ -85,6 +114,7 @@ class FinancialDataService:
             logger.error(f"Error fetching sector data: {e}")
             return self._get_fallback_sector_data()
     
+    @cached('stock_data', cache_if=lambda result: result.get('source') != 'fallback')
     def get_stock_data(self, symbol: str, period: str = '1y') -> Dict:
         """Get real stock data for a symbol"""
         try:
@@ -95,7 +125,11 @@ class FinancialDataService:
             
             # Use Yahoo Finance as primary source (more reliable for individual stocks)
             stock = yf.Ticker(symbol)
-            hist = stock.history(period=period)
+            if bar_store is not None and self.bulk_fetcher is not None:
+                # Served from the local bar store, topped up with only the newest bars
+                hist = bar_store.get_history(symbol, period=period, fetcher=self.bulk_fetcher)
+            else:
+                hist = stock.history(period=period)
             info = stock.info
             
             if hist.empty:
@@ -129,43 +163,62 @@ class FinancialDataService:
             logger.error(f"Error fetching stock data for {symbol}: {e}")
             return self._get_fallback_stock_data(symbol)
     
+    @cached('chart_histories', cache_if=lambda result: any(map(has_bars, result.values())))
+    def get_chart_histories(self, symbols: List[str], period: str = '6mo', points: int = CHART_POINTS,
+                            chart_format: str = 'rows', date_encoding: str = 'epoch', float32: bool = False) -> Dict:
+        """Downsampled chart bars for many symbols from one batched history load, without .info calls"""
+        results = {symbol: bars_payload(None, chart_format, date_encoding) for symbol in symbols}
+        if bar_store is None or not symbols:
+            return results
+        try:
+            histories = bar_store.get_histories(symbols, period=period, fetcher=self.bulk_fetcher)
+        except Exception as e:
+            logger.error(f"Error fetching chart histories for {len(symbols)} symbols: {e}")
+            return results
+        for symbol, hist in histories.items():
+            results[symbol] = self._format_historical_data(hist, points, symbol, period,
+                                                           chart_format, date_encoding, float32)
+        return results
+    
     def get_multiple_stocks(self, symbols: List[str]) -> Dict[str, Dict]:
         """Get data for multiple stocks efficiently"""
         results = {}
         
         try:
             # Check if yfinance is available
-            if not YFINANCE_AVAILABLE:
+            if self.bulk_fetcher is None:
                 logger.warning("yfinance not available, using fallback data")
                 for symbol in symbols:
                     results[symbol] = self._get_fallback_stock_data(symbol)
                 return results
             
-            # Use Yahoo Finance for batch processing
-            tickers = yf.Tickers(' '.join(symbols))
+            # One multi-symbol history request per chunk, metadata fetched concurrently
+            history = self.bulk_fetcher.fetch_history(symbols, period='5d')
+            infos = self.bulk_fetcher.fetch_info(symbols)
             
             for symbol in symbols:
                 try:
-                    ticker = tickers.tickers[symbol]
-                    hist = ticker.history(period='5d')
-                    info = ticker.info
+                    hist = split_history(history, symbol).dropna(subset=['Close'])
+                    info = infos.get(symbol, {})
+                    
+                    if hist.empty:
+                        raise ValueError(f"No data found for symbol {symbol}")
                     
-                    if not hist.empty:
-                        current_price = hist['Close'].iloc[-1]
-                        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-                        change = current_price - prev_close
-                        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-                        
-                        results[symbol] = {
-                            'symbol': symbol,
-                            'name': info.get('longName', symbol),
-                            'price': round(current_price, 2),
-                            'change': round(change, 2),
-                            'change_percent': round(change_percent, 2),
-                            'volume': int(hist['Volume'].iloc[-1]),
-                            'market_cap': info.get('marketCap', 0),
-                            'sector': info.get('sector', 'Unknown')
-                        }
+                    current_price = hist['Close'].iloc[-1]
+                    prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
+                    change = current_price - prev_close
+                    change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
+                    
+                    results[symbol] = {
+                        'symbol': symbol,
+                        'name': info.get('longName', symbol),
+                        'price': round(current_price, 2),
+                        'change': round(change, 2),
+                        'change_percent': round(change_percent, 2),
+                        'volume': int(hist['Volume'].fillna(0).iloc[-1]),
+                        'market_cap': info.get('marketCap', 0),
+                        'sector': info.get('sector', 'Unknown')
+                    }
                 except Exception as e:
                     logger.error(f"Error processing {symbol}: {e}")
                     results[symbol] = self._get_fallback_stock_data(symbol)
@@ -182,39 +235,49 @@ class FinancialDataService:
     
     def search_stocks(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for stocks by name or symbol"""
+        # Typeahead is answered from the local index; the provider is only
+        # asked about queries the index knows nothing about
+        results = self.symbol_index.search(query, limit)
+        if results or not self.alpha_vantage_key:
+            return results
+        
         try:
-            if self.alpha_vantage_key:
-                # Use Alpha Vantage symbol search
-                url = f"https://www.alphavantage.co/query"
-                params = {
-                    'function': 'SYMBOL_SEARCH',
-                    'keywords': query,
-                    'apikey': self.alpha_vantage_key
-                }
-                
-                response = requests.get(url, params=params)
-                data = response.json()
-                
-                results = []
-                for match in data.get('bestMatches', [])[:limit]:
-                    results.append({
-                        'symbol': match['1. symbol'],
-                        'name': match['2. name'],
-                        'type': match['3. type'],
-                        'region': match['4. region'],
-                        'currency': match['8. currency']
-                    })
-                
-                return results
-            
-            else:
-                # Fallback search using a predefined list
-                return self._fallback_search(query, limit)
-                
+            results = self._provider_search(query)
+            self.symbol_index.add(results)
+            return results[:limit]
         except Exception as e:
             logger.error(f"Error searching stocks: {e}")
             return self._fallback_search(query, limit)
     
+    @cached('search_stocks')
+    def _provider_search(self, query: str) -> List[Dict]:
+        """Alpha Vantage symbol search"""
+        if self.av_client:
+            matches = self.av_client.symbol_search(query)
+        else:
+            url = f"https://www.alphavantage.co/query"
+            params = {
+                'function': 'SYMBOL_SEARCH',
+                'keywords': query,
+                'apikey': self.alpha_vantage_key
+            }
+            
+            response = requests.get(url, params=params, timeout=10)
+            matches = response.json().get('bestMatches', [])
+        
+        results = []
+        for match in matches:
+            results.append({
+                'symbol': match['1. symbol'],
+                'name': match['2. name'],
+                'type': match['3. type'],
+                'region': match['4. region'],
+                'currency': match['8. currency']
+            })
+        
+        return results
+    
+    @cached('market_overview', cache_if=lambda result: result.get('source') != 'fallback')
     def get_market_overview(self) -> Dict:
         """Get general market overview"""
         try:
@@ -302,28 +365,23 @@ class FinancialDataService:
             'source': 'yahoo_finance_etf'
         }
     
-    def _format_historical_data(self, hist_df) -> List[Dict]:
-        """Format historical data for frontend consumption"""
-        data = []
-        
+    def _format_historical_data(self, hist_df, points: Optional[int] = None, symbol: str = '', period: str = '',
+                                chart_format: str = 'rows', date_encoding: str = 'epoch', float32: bool = False):
+        """Format history for frontend consumption: the last 30 days, or the whole
+        period merged into at most `points` OHLC bars"""
         # Check if pandas is available and hist_df is a DataFrame
-        if not PANDAS_AVAILABLE or hist_df is None:
-            return data  # Return empty list if pandas not available
+        if not PANDAS_AVAILABLE or hist_df is None or hist_df.empty:
+            return bars_payload(None, chart_format, date_encoding)
         
         try:
-            for date, row in hist_df.tail(30).iterrows():  # Last 30 days
-                data.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'open': round(row['Open'], 2),
-                    'high': round(row['High'], 2),
-                    'low': round(row['Low'], 2),
-                    'close': round(row['Close'], 2),
-                    'volume': int(row['Volume'])
-                })
+            if points is None:
+                hist_df = hist_df.tail(30)  # Last 30 days
+            else:
+                hist_df = cached_ohlc(symbol, period, '1d', points, hist_df.dropna(subset=['Close']))
+            return bars_payload(hist_df, chart_format, date_encoding, float32)
         except Exception as e:
             logger.error(f"Error formatting historical data: {e}")
-        
-        return data
+            return bars_payload(None, chart_format, date_encoding)
     
     def _generate_volume(self) -> int:
         """Generate realistic volume for sectors"""
@@ -344,26 +402,8 @@ class FinancialDataService:
         return "closed"
     
     def _fallback_search(self, query: str, limit: int) -> List[Dict]:
-        """Fallback stock search with common symbols"""
-        common_stocks = [
-            {'symbol': 'AAPL', 'name': 'Apple Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-            {'symbol': 'GOOGL', 'name': 'Alphabet Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-            {'symbol': 'MSFT', 'name': 'Microsoft Corporation', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-            {'symbol': 'AMZN', 'name': 'Amazon.com Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-            {'symbol': 'TSLA', 'name': 'Tesla Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-            {'symbol': 'META', 'name': 'Meta Platforms Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-            {'symbol': 'NFLX', 'name': 'Netflix Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-            {'symbol': 'NVDA', 'name': 'NVIDIA Corporation', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
-        ]
-        
-        # Filter by query
-        query_lower = query.lower()
-        matches = [
-            stock for stock in common_stocks 
-            if query_lower in stock['symbol'].lower() or query_lower in stock['name'].lower()
-        ]
-        
-        return matches[:limit]
+        """Fallback stock search over the local symbol index"""
+        return self.symbol_index.search(query, limit)
     
     def _get_fallback_stock_data(self, symbol: str) -> Dict:
         """Fallback stock data when API fails"""
@@ -425,7 +465,8 @@ class FinancialDataService:
                 '^IXIC': {'value': 14000.0, 'change': random.uniform(-100, 100), 'change_percent': random.uniform(-2, 2)},
             },
             'last_updated': datetime.now().isoformat(),
-            'market_status': 'closed'
+            'market_status': 'closed',
+            'source': 'fallback'
         }
 
 # Global instance
@@ -132,6 +132,9 @@ def detailed_health_check():
     
     checks['external_apis'] = api_checks
     
+    # Financial data cache counters
+    checks['cache'] = financial_service.cache.stats()
+    
     # System resources
     if PSUTIL_AVAILABLE:
         memory = psutil.virtual_memory()
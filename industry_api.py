@@ -1,10 +1,17 @@
 import os
-import csv
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, session
 import pandas as pd
-import yfinance as yf
-from flask import session
+from industry_engine import REQUIRED_COLUMNS, IncrementalIndustryBenchmark, industry_benchmark_report
+from screening_criteria import parse_number
+from industry_history import DEFAULT_POINTS, industry_history_store, series_payload
+from chart_payload import chart_options
+from downsampling import cached_downsample
+from bar_store import bar_store
+from fast_json import RawJSON, json_response
+from industry_catalog import IndustryCatalog
+from screening_criteria import BULLISH_SMA_CRITERIA, screen_ohlc
+
 industry_api = Blueprint('industry_api', __name__)
 
 # API endpoint to download OHLC and screen bullish stocks
@@ -13,36 +20,20 @@ def bullish_stocks():
     symbols = request.json.get('symbols')
     if not symbols or not isinstance(symbols, list):
         return jsonify({'error': 'symbols (list) required'}), 400
-    # Download OHLC data
+    # Load OHLC data from the local bar store, downloading only missing bars
     data = {}
-    for symbol in symbols:
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period='6mo', interval='1d')
-            if not hist.empty:
-                data[symbol] = hist[['Open', 'High', 'Low', 'Close', 'Volume']]
-        except Exception as e:
-            data[symbol] = f"Error: {e}"
-    # Screen for bullish stocks
-    bullish = []
-    for symbol, df in data.items():
-        if isinstance(df, str) or len(df) < 150:
-            continue
-        df['SMA50'] = df['Close'].rolling(window=50).mean()
-        df['SMA150'] = df['Close'].rolling(window=150).mean()
-        latest = df.iloc[-1]
-        if latest['Close'] > latest['SMA50'] and latest['Close'] > latest['SMA150']:
-            bullish.append(symbol)
+    try:
+        histories = bar_store.get_histories(symbols, period='6mo', interval='1d')
+    except Exception as e:
+        histories = {symbol: f"Error: {e}" for symbol in symbols}
+    for symbol, hist in histories.items():
+        if isinstance(hist, str) or not hist.empty:
+            data[symbol] = hist
+    # Screen for bullish stocks across the whole universe in one vectorized pass
+    frames = {symbol: df for symbol, df in data.items() if not isinstance(df, str)}
+    bullish = screen_ohlc(frames, BULLISH_SMA_CRITERIA).passing()
     return jsonify({'bullish_stocks': bullish})
-import os
-import csv
-
-from flask import Blueprint, jsonify, request
-import pandas as pd
-
 
-from flask import session
-industry_api = Blueprint('industry_api', __name__)
 
 # Helper to check if user is logged in (not admin)
 def require_user_session():
@@ -53,30 +44,17 @@ def require_user_session():
 
 CSV_PATH = os.path.join(os.path.dirname(__file__), 'Stocks002025Format.csv')
 
-# Helper to read CSV and cache results
-_industry_cache = None
-_symbol_cache = None
-
-def _load_csv():
-    global _industry_cache, _symbol_cache
-    if _industry_cache is not None and _symbol_cache is not None:
-        return _industry_cache, _symbol_cache
-    industries = set()
-    symbols_by_industry = {}
-    with open(CSV_PATH, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            industry = row.get('industry')
-            symbol = row.get('symbol')
-            if industry:
-                industries.add(industry)
-                if industry not in symbols_by_industry:
-                    symbols_by_industry[industry] = set()
-                if symbol:
-                    symbols_by_industry[industry].add(symbol)
-    _industry_cache = sorted(list(industries))
-    _symbol_cache = {k: sorted(list(v)) for k, v in symbols_by_industry.items()}
-    return _industry_cache, _symbol_cache
+# Per-process live benchmark, reset by each /api/industry-benchmark upload
+live_benchmark = IncrementalIndustryBenchmark()
+
+# Industries and symbols of the CSV, reloaded when the file changes
+industry_catalog = IndustryCatalog(CSV_PATH)
+
+def _catalog_response(body: bytes, etag: str):
+    """Pre-serialized catalog JSON, answering If-None-Match with 304"""
+    response = json_response(RawJSON(body))
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 
 # Only logged-in users can list industries
@@ -84,8 +62,8 @@ def _load_csv():
 def get_industries():
     if not require_user_session():
         return jsonify({'error': 'Unauthorized'}), 401
-    industries, _ = _load_csv()
-    return jsonify({'industries': industries})
+    catalog = industry_catalog.current()
+    return _catalog_response(catalog.industries_json, catalog.digest)
 
 
 # Only logged-in users can list symbols
@@ -94,9 +72,8 @@ def get_symbols():
     if not require_user_session():
         return jsonify({'error': 'Unauthorized'}), 401
     industry = request.args.get('industry')
-    _, symbol_cache = _load_csv()
-    symbols = symbol_cache.get(industry, [])
-    return jsonify({'symbols': symbols})
+    catalog = industry_catalog.current()
+    return _catalog_response(catalog.symbols_body(industry), f"{catalog.digest}-{industry or ''}")
 
 
 # New endpoint: Upload CSV and calculate industry benchmark (skeleton)
@@ -108,67 +85,81 @@ def industry_benchmark():
     try:
         df = pd.read_csv(file)
         # Ensure required columns exist
-        required_cols = {'symbol', 'industry', 'market_cap', 'price_vs_sma_pct'}
-        if not required_cols.issubset(df.columns):
-            return jsonify({'error': f'Missing columns: {required_cols - set(df.columns)}'}), 400
-
-        # Convert market_cap to numeric
-        df['market_cap'] = pd.to_numeric(df['market_cap'], errors='coerce').fillna(0)
-        # Convert price_vs_sma_pct to numeric (remove % and convert to float)
-        df['price_vs_sma_pct'] = df['price_vs_sma_pct'].astype(str).str.replace('%','').astype(float)
-
-        # Normalize price_vs_sma_pct to 1.0 on first day (simulate with min value per symbol)
-        df['normalized_price'] = df.groupby('symbol')['price_vs_sma_pct'].transform(lambda x: x / x.iloc[0] if x.iloc[0] != 0 else 1)
-
-        # Group by industry and calculate benchmarks
-        industry_results = {}
-        industry_benchmarks = {}
-        for industry, group in df.groupby('industry'):
-            total_market_cap = group['market_cap'].sum()
-            if total_market_cap == 0:
-                continue
-            group = group.copy()
-            group['weight'] = group['market_cap'] / total_market_cap
-            # Weighted average benchmark for industry
-            benchmark = (group['weight'] * group['normalized_price']).sum()
-            industry_benchmarks[industry] = benchmark
-            industry_results[industry] = {
-                'benchmark': benchmark,
-                'symbols': group['symbol'].tolist(),
-                'weights': group['weight'].round(4).tolist(),
-                'normalized_prices': group['normalized_price'].round(4).tolist()
-            }
-
-        # Calculate MRS for each stock: (Industry_Normalized / Stock_Normalized) – 1
-        mrs_results = {}
-        for idx, row in df.iterrows():
-            industry = row['industry']
-            stock_norm = row['normalized_price']
-            industry_norm = industry_benchmarks.get(industry, None)
-            if stock_norm and industry_norm is not None and stock_norm != 0:
-                mrs = (industry_norm / stock_norm) - 1
-            else:
-                mrs = None
-            mrs_results[row['symbol']] = mrs
-
-        # Detect bullish and bearish industries
-        # Criteria: price_vs_sma_pct > 0 (i.e., price above 50SMA) OR weekly_growth > 0.2 (20%)
-        bullish_industries = set()
-        bearish_industries = set()
-        for industry, group in df.groupby('industry'):
-            above_50sma = (group['price_vs_sma_pct'] > 0).any()
-            weekly_growth = pd.to_numeric(group.get('weekly_growth', 0), errors='coerce').fillna(0)
-            strong_growth = (weekly_growth > 0.2).any()
-            if above_50sma or strong_growth:
-                bullish_industries.add(industry)
-            else:
-                bearish_industries.add(industry)
+        if not REQUIRED_COLUMNS.issubset(df.columns):
+            return jsonify({'error': f'Missing columns: {REQUIRED_COLUMNS - set(df.columns)}'}), 400
+
+        # Benchmarks are market-cap weighted averages of prices normalized to
+        # each symbol's first row; MRS = (Industry_Normalized / Stock_Normalized) - 1
+        report = industry_benchmark_report(df)
+        # Seed the live engine so later bars update it incrementally
+        live_benchmark.load_frame(df)
+        return jsonify(report)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
+# Apply intraday bars / market-cap changes to the live benchmark seeded by the last upload
+@industry_api.route('/api/industry-benchmark/bars', methods=['POST'])
+def industry_benchmark_bars():
+    data = request.get_json(silent=True) or {}
+    bars = data.get('bars')
+    if not isinstance(bars, list):
+        return jsonify({'error': 'Expected a JSON body with a "bars" list'}), 400
+    try:
+        touched = {}
+        for bar in bars:
+            symbol = bar.get('symbol')
+            price = bar.get('price_vs_sma_pct', bar.get('price'))
+            industry = live_benchmark.update(
+                symbol,
+                price=parse_number(price) if price is not None else None,
+                market_cap=parse_number(bar['market_cap']) if bar.get('market_cap') is not None else None,
+                industry=bar.get('industry')
+            )
+            touched.setdefault(industry, []).append(symbol)
         return jsonify({
-            'industry_benchmarks': industry_results,
-            'mrs': mrs_results,
-            'bullish_industries': list(bullish_industries),
-            'bearish_industries': list(bearish_industries)
+            'industry_benchmarks': {industry: live_benchmark.benchmark(industry) for industry in touched},
+            'mrs': {symbol: live_benchmark.mrs(symbol) for symbols in touched.values() for symbol in symbols}
         })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    except (ValueError, KeyError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Daily industry benchmark series for charting, from the published history snapshot
+@industry_api.route('/api/industry-history', methods=['GET'])
+def industry_history():
+    if not session.get('mock_user_data'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    history = industry_history_store.current()
+    if history is None:
+        return jsonify({'error': 'Industry history has not been built yet'}), 404
+    industry = request.args.get('industry', '')
+    range_name = request.args.get('range', '1y')
+    series = history.industry_series(industry, range_name)
+    if series is None:
+        return jsonify({'error': f'Unknown industry: {industry}'}), 404
+    points = request.args.get('points', DEFAULT_POINTS, type=int)
+    chart = chart_options(request.args)
+    key = ('industry', industry, range_name, points, history.version, sorted(chart.items()))
+    payload = cached_downsample(key, lambda: series_payload(*series, points=points, **chart))
+    return jsonify({'industry': industry, **payload})
+
+
+# Daily MRS series of one stock against its industry benchmark
+@industry_api.route('/api/mrs-history', methods=['GET'])
+def mrs_history():
+    if not session.get('mock_user_data'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    history = industry_history_store.current()
+    if history is None:
+        return jsonify({'error': 'Industry history has not been built yet'}), 404
+    symbol = request.args.get('symbol', '').upper()
+    range_name = request.args.get('range', '1y')
+    series = history.mrs_series(symbol, range_name)
+    if series is None:
+        return jsonify({'error': f'No MRS history for {symbol}'}), 404
+    points = request.args.get('points', DEFAULT_POINTS, type=int)
+    smooth = request.args.get('smooth', 0, type=int)
+    chart = chart_options(request.args)
+    key = ('mrs', symbol, range_name, points, smooth, history.version, sorted(chart.items()))
+    payload = cached_downsample(key, lambda: series_payload(*series, points=points, smooth=smooth, **chart))
+    return jsonify({'symbol': symbol, 'industry': history.industry_of(symbol), **payload})
@@ -0,0 +1,190 @@
+"""
+Industry Catalog for TradingGrow
+The industry and symbol lists of a stock CSV, cached per file version (mtime,
+size and content hash) and pre-serialized to JSON; changes to the file are
+picked up by a background reload that swaps the new catalog in atomically
+"""
+
+import csv
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+# The file is stat-ed at most this often
+CHECK_INTERVAL = 1.0
+
+
+class Catalog:
+    """Sorted industries and per-industry symbols of one version of the file"""
+
+    def __init__(self, industries: List[str], symbols: Dict[str, List[str]], digest: str,
+                 signature: Tuple[int, int]):
+        self.industries = industries
+        self.symbols = symbols
+        self.digest = digest
+        self.signature = signature
+        self.industries_json = dumps({'industries': industries})
+        self.symbols_json = {industry: dumps({'symbols': names}) for industry, names in symbols.items()}
+        self.empty_symbols_json = dumps({'symbols': []})
+
+    def symbols_body(self, industry: Optional[str]) -> bytes:
+        """Ready-to-send {'symbols': [...]} JSON for an industry"""
+        return self.symbols_json.get(industry, self.empty_symbols_json)
+
+
+def parse_catalog(content: bytes, signature: Tuple[int, int] = (0, 0)) -> Catalog:
+    """Build a Catalog from the raw bytes of a symbol,industry CSV"""
+    symbols_by_industry = {}
+    reader = csv.DictReader(io.StringIO(content.decode('utf-8-sig'), newline=''))
+    for row in reader:
+        industry = row.get('industry')
+        symbol = row.get('symbol')
+        if industry:
+            names = symbols_by_industry.setdefault(industry, set())
+            if symbol:
+                names.add(symbol)
+    return Catalog(sorted(symbols_by_industry), {k: sorted(v) for k, v in symbols_by_industry.items()},
+                   hashlib.sha1(content).hexdigest(), signature)
+
+
+def file_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class IndustryCatalog:
+    """A CSV-backed Catalog that follows changes to the file
+
+    The first read loads the file synchronously; after that a changed
+    mtime/size starts one background reload while readers keep getting the
+    previous catalog. A reload whose content hash is unchanged keeps the
+    existing catalog and its JSON.
+    """
+
+    def __init__(self, path: str, check_interval: float = CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._catalog = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._reloading = False
+
+    def current(self) -> Catalog:
+        """The catalog of the latest version of the file seen"""
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return catalog
+        if catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = self._read(None)
+                    self._checked_at = time.monotonic()
+                return self._catalog
+        self._checked_at = time.monotonic()
+        try:
+            changed = file_signature(self.path) != catalog.signature
+        except OSError as e:
+            logger.warning(f"Industry catalog {self.path} unavailable, keeping the loaded version: {e}")
+            return catalog
+        if changed:
+            self.reload_async()
+        return catalog
+
+    def reload_async(self):
+        """Re-read the file on a background thread unless a reload is already running"""
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            try:
+                catalog = self._read(self._catalog)
+                # A single reference swap: readers see the old or the new catalog, never a mix
+                self._catalog = catalog
+            except Exception as e:
+                logger.error(f"Reloading industry catalog {self.path} failed: {e}")
+            finally:
+                with self._lock:
+                    self._reloading = False
+
+        threading.Thread(target=run, name='industry-catalog-reload', daemon=True).start()
+
+    def _read(self, previous: Optional[Catalog]) -> Catalog:
+        signature = file_signature(self.path)
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        if previous is not None and hashlib.sha1(content).hexdigest() == previous.digest:
+            # Touched but unchanged: keep the catalog, remember the new stat
+            previous.signature = signature
+            return previous
+        catalog = parse_catalog(content, signature)
+        logger.info(f"Loaded industry catalog {os.path.basename(self.path)}: {len(catalog.industries)} industries "
+                    f"({catalog.digest[:12]})")
+        return catalog
+
+
+def _legacy_load_csv(path: str):
+    """The previous per-process parse of the file, for benchmarking"""
+    industries = set()
+    symbols_by_industry = {}
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            industry = row.get('industry')
+            symbol = row.get('symbol')
+            if industry:
+                industries.add(industry)
+                if industry not in symbols_by_industry:
+                    symbols_by_industry[industry] = set()
+                if symbol:
+                    symbols_by_industry[industry].add(symbol)
+    return sorted(list(industries)), {k: sorted(list(v)) for k, v in symbols_by_industry.items()}
+
+
+if __name__ == "__main__":
+    # Benchmark: parsing per worker start against serving cached bytes, and pickup of a file update
+    import json
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'stocks.csv')
+        with open(path, 'w', newline='') as f:
+            f.write('symbol,industry\n')
+            f.writelines(f"S{i:05d},Industry {i % 150}\n" for i in range(20000))
+
+        started = time.perf_counter()
+        legacy_industries, legacy_symbols = _legacy_load_csv(path)
+        legacy_time = time.perf_counter() - started
+        started = time.perf_counter()
+        legacy_body = json.dumps({'symbols': legacy_symbols['Industry 7']}).encode()
+        encode_time = time.perf_counter() - started
+
+        catalog = IndustryCatalog(path, check_interval=0)
+        started = time.perf_counter()
+        catalog.current()
+        load_time = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(1000):
+            body = catalog.current().symbols_body('Industry 7')
+        served_time = (time.perf_counter() - started) / 1000
+        assert json.loads(body) == json.loads(legacy_body)
+        assert catalog.current().industries == legacy_industries
+
+        with open(path, 'a', newline='') as f:
+            f.write('NEW01,Industry 999\n')
+        catalog.current()
+        deadline = time.monotonic() + 5
+        while 'Industry 999' not in catalog.current().industries and time.monotonic() < deadline:
+            time.sleep(0.01)
+        print(f"20,000 rows: parse {legacy_time * 1e3:.1f} ms + encode {encode_time * 1e3:.2f} ms per worker | "
+              f"catalog load {load_time * 1e3:.1f} ms, then serve {served_time * 1e6:.1f} us per request | "
+              f"update picked up: {'Industry 999' in catalog.current().industries}")
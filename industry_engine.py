@@ -0,0 +1,379 @@
+"""
+Vectorized Industry Benchmark Engine for TradingGrow
+Market-cap weighted industry benchmarks, MRS and bullish/bearish industry
+detection computed with group codes and segmented sums instead of per-group
+lambdas and iterrows
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = {'symbol', 'industry', 'market_cap', 'price_vs_sma_pct'}
+# Weekly growth above this marks an industry bullish even below its 50 SMA
+STRONG_WEEKLY_GROWTH = 0.2
+
+
+def parse_benchmark_columns(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Numeric market_cap (missing -> 0) and price_vs_sma_pct ('10.5%' -> 10.5) arrays"""
+    market_cap = pd.to_numeric(df['market_cap'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    price_vs_sma = df['price_vs_sma_pct'].astype(str).str.replace('%', '').astype(float).to_numpy()
+    return market_cap, price_vs_sma
+
+
+def normalize_by_first(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Divide each row by the first value of its group; groups starting at 0 become 1.0
+
+    Rows with code -1 (no group) are NaN.
+    """
+    normalized = np.full(len(values), np.nan)
+    valid = codes >= 0
+    if not valid.any():
+        return normalized
+    _, first_rows = np.unique(codes, return_index=True)
+    if codes[first_rows[0]] < 0:
+        first_rows = first_rows[1:]
+    first = values[first_rows][codes[valid]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized[valid] = np.where(first != 0, values[valid] / first, 1.0)
+    return normalized
+
+
+def segment_sums(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """NaN-skipping sum of each contiguous segment of values
+
+    Each segment is summed with ndarray.sum, so results match pandas'
+    per-group sums bit for bit (np.add.reduceat sums in a different order).
+    """
+    values = np.where(np.isnan(values), 0.0, values)
+    ends = np.append(starts[1:], len(values))
+    return np.array([values[start:end].sum() for start, end in zip(starts, ends)], dtype='float64')
+
+
+def industry_benchmark_report(df: pd.DataFrame) -> Dict:
+    """Benchmarks, MRS and bullish/bearish industries for an uploaded stock frame"""
+    market_cap, price_vs_sma = parse_benchmark_columns(df)
+    symbols = df['symbol'].to_numpy(dtype=object)
+    symbol_codes, symbol_values = pd.factorize(df['symbol'])
+    industry_codes, industries = pd.factorize(df['industry'], sort=True)
+    normalized = normalize_by_first(price_vs_sma, symbol_codes)
+
+    # Rows grouped by industry, keeping upload order within each industry
+    order = np.argsort(industry_codes, kind='stable')
+    order = order[industry_codes[order] >= 0]
+    sorted_codes = industry_codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) else np.array([], dtype=int)
+    group_of_row = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(order))))
+
+    total_market_cap = segment_sums(market_cap[order], starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = market_cap[order] / total_market_cap[group_of_row]
+    benchmarks = segment_sums(weights * normalized[order], starts)
+    has_benchmark = total_market_cap != 0
+
+    industry_results = {}
+    sorted_symbols = symbols[order].tolist()
+    rounded_weights = np.round(weights, 4).tolist()
+    rounded_prices = np.round(normalized[order], 4).tolist()
+    ends = np.append(starts[1:], len(order))
+    for group, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        if not has_benchmark[group]:
+            continue
+        industry_results[industries[group]] = {
+            'benchmark': float(benchmarks[group]),
+            'symbols': sorted_symbols[start:end],
+            'weights': rounded_weights[start:end],
+            'normalized_prices': rounded_prices[start:end]
+        }
+
+    # MRS: (Industry_Normalized / Stock_Normalized) - 1; the last row of a symbol wins
+    row_benchmark = np.full(len(df), np.nan)
+    row_has_benchmark = np.zeros(len(df), dtype=bool)
+    valid_industry = industry_codes >= 0
+    row_benchmark[valid_industry] = benchmarks[industry_codes[valid_industry]]
+    row_has_benchmark[valid_industry] = has_benchmark[industry_codes[valid_industry]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mrs = row_benchmark / normalized - 1
+    mrs_ok = row_has_benchmark & (normalized != 0)
+    last_rows = np.zeros(len(symbol_values), dtype=int)
+    valid_symbol = symbol_codes >= 0
+    last_rows[symbol_codes[valid_symbol]] = np.flatnonzero(valid_symbol)
+    mrs_results = {
+        symbol: value if ok else None
+        for symbol, value, ok in zip(symbol_values.tolist(), mrs[last_rows].tolist(), mrs_ok[last_rows].tolist())
+    }
+
+    # Bullish: any stock above its 50 SMA, or any weekly growth above 20%
+    if 'weekly_growth' in df.columns:
+        weekly_growth = pd.to_numeric(df['weekly_growth'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    else:
+        weekly_growth = np.zeros(len(df))
+    signal = ((price_vs_sma > 0) | (weekly_growth > STRONG_WEEKLY_GROWTH))[valid_industry]
+    bullish = np.bincount(industry_codes[valid_industry], weights=signal, minlength=len(industries)) > 0
+    industry_list = list(industries)
+
+    return {
+        'industry_benchmarks': industry_results,
+        'mrs': mrs_results,
+        'bullish_industries': [industry for industry, flag in zip(industry_list, bullish.tolist()) if flag],
+        'bearish_industries': [industry for industry, flag in zip(industry_list, bullish.tolist()) if not flag]
+    }
+
+
+class IncrementalIndustryBenchmark:
+    """Live industry benchmarks maintained from per-industry running sums
+
+    Each symbol holds its latest normalized price and market cap; an industry
+    keeps sum(market_cap) and sum(market_cap * normalized), so its benchmark is
+    their ratio. A bar or market-cap update only touches its own industry, and
+    MRS is derived on read, both in O(1).
+    """
+
+    # Recompute an industry's sums exactly after this many updates to bound float drift
+    RESYNC_EVERY = 10000
+
+    def __init__(self):
+        self._symbols = {}
+        self._industries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'IncrementalIndustryBenchmark':
+        engine = cls()
+        engine.load_frame(df)
+        return engine
+
+    def load_frame(self, df: pd.DataFrame):
+        """Reset from an uploaded frame: first row per symbol is its base, last row its current bar"""
+        market_cap, price_vs_sma = parse_benchmark_columns(df)
+        symbol_codes, symbol_values = pd.factorize(df['symbol'])
+        valid = np.flatnonzero(symbol_codes >= 0)
+        first_rows = np.zeros(len(symbol_values), dtype=int)
+        last_rows = np.zeros(len(symbol_values), dtype=int)
+        first_rows[symbol_codes[valid[::-1]]] = valid[::-1]
+        last_rows[symbol_codes[valid]] = valid
+        industries = df['industry'].to_numpy(dtype=object)
+        with self._lock:
+            self._symbols = {}
+            self._industries = {}
+            for symbol, first, last in zip(symbol_values.tolist(), first_rows.tolist(), last_rows.tolist()):
+                industry = industries[last]
+                if industry != industry:
+                    continue
+                self._add(symbol, industry, float(market_cap[last]), float(price_vs_sma[first]))
+                self._set_price(symbol, float(price_vs_sma[last]))
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def _industry(self, industry) -> Dict:
+        state = self._industries.get(industry)
+        if state is None:
+            state = self._industries[industry] = {'total_cap': 0.0, 'weighted': 0.0, 'symbols': set(), 'updates': 0}
+        return state
+
+    @staticmethod
+    def _contribution(entry: Dict) -> float:
+        normalized = entry['normalized']
+        return 0.0 if normalized != normalized else entry['market_cap'] * normalized
+
+    def _apply(self, entry: Dict, sign: float):
+        state = self._industries[entry['industry']]
+        state['total_cap'] += sign * entry['market_cap']
+        state['weighted'] += sign * self._contribution(entry)
+
+    def _add(self, symbol, industry, market_cap: float, base: float):
+        # A symbol starts at its base price, normalized to 1.0
+        entry = {'industry': industry, 'market_cap': market_cap, 'base': base,
+                 'normalized': np.nan if base != base else 1.0}
+        self._industry(industry)['symbols'].add(symbol)
+        self._symbols[symbol] = entry
+        self._apply(entry, 1)
+
+    def _set_price(self, symbol, price: float):
+        entry = self._symbols[symbol]
+        self._apply(entry, -1)
+        base = entry['base']
+        entry['normalized'] = price / base if base != 0 else 1.0
+        self._apply(entry, 1)
+        self._touch(entry['industry'])
+
+    def _touch(self, industry):
+        state = self._industries[industry]
+        state['updates'] += 1
+        if state['updates'] >= self.RESYNC_EVERY:
+            entries = [self._symbols[symbol] for symbol in state['symbols']]
+            state['total_cap'] = float(sum(entry['market_cap'] for entry in entries))
+            state['weighted'] = float(sum(self._contribution(entry) for entry in entries))
+            state['updates'] = 0
+
+    def update(self, symbol, price: Optional[float] = None, market_cap: Optional[float] = None,
+               industry=None) -> str:
+        """Apply one bar and/or market-cap change; returns the symbol's industry
+
+        A symbol seen for the first time needs an industry and takes this price as its base.
+        """
+        with self._lock:
+            entry = self._symbols.get(symbol)
+            if entry is None:
+                if industry is None or price is None:
+                    raise ValueError(f"Unknown symbol {symbol!r} needs an industry and a price")
+                self._add(symbol, industry, float(market_cap or 0), float(price))
+                self._touch(industry)
+                return industry
+            if industry is not None and industry != entry['industry']:
+                self._apply(entry, -1)
+                self._industries[entry['industry']]['symbols'].discard(symbol)
+                entry['industry'] = industry
+                self._industry(industry)['symbols'].add(symbol)
+                self._apply(entry, 1)
+            if market_cap is not None:
+                self._apply(entry, -1)
+                entry['market_cap'] = float(market_cap)
+                self._apply(entry, 1)
+                self._touch(entry['industry'])
+            if price is not None:
+                self._set_price(symbol, float(price))
+            return entry['industry']
+
+    def benchmark(self, industry) -> Optional[float]:
+        """Market-cap weighted normalized price of an industry (None when its total cap is 0)"""
+        state = self._industries.get(industry)
+        if state is None or state['total_cap'] == 0:
+            return None
+        return state['weighted'] / state['total_cap']
+
+    def mrs(self, symbol) -> Optional[float]:
+        """(Industry_Normalized / Stock_Normalized) - 1 for a symbol"""
+        entry = self._symbols.get(symbol)
+        if entry is None:
+            return None
+        benchmark = self.benchmark(entry['industry'])
+        normalized = entry['normalized']
+        if benchmark is None or normalized == 0:
+            return None
+        return benchmark / normalized - 1
+
+    def benchmarks(self) -> Dict:
+        return {industry: self.benchmark(industry) for industry in sorted(self._industries)}
+
+
+def _legacy_industry_benchmark(df: pd.DataFrame) -> Dict:
+    """The previous pandas groupby/iterrows handler body, for benchmarking"""
+    df = df.copy()
+    df['market_cap'] = pd.to_numeric(df['market_cap'], errors='coerce').fillna(0)
+    df['price_vs_sma_pct'] = df['price_vs_sma_pct'].astype(str).str.replace('%', '').astype(float)
+    df['normalized_price'] = df.groupby('symbol')['price_vs_sma_pct'].transform(lambda x: x / x.iloc[0] if x.iloc[0] != 0 else 1)
+    industry_results = {}
+    industry_benchmarks = {}
+    for industry, group in df.groupby('industry'):
+        total_market_cap = group['market_cap'].sum()
+        if total_market_cap == 0:
+            continue
+        group = group.copy()
+        group['weight'] = group['market_cap'] / total_market_cap
+        benchmark = (group['weight'] * group['normalized_price']).sum()
+        industry_benchmarks[industry] = benchmark
+        industry_results[industry] = {
+            'benchmark': benchmark,
+            'symbols': group['symbol'].tolist(),
+            'weights': group['weight'].round(4).tolist(),
+            'normalized_prices': group['normalized_price'].round(4).tolist()
+        }
+    mrs_results = {}
+    for idx, row in df.iterrows():
+        stock_norm = row['normalized_price']
+        industry_norm = industry_benchmarks.get(row['industry'], None)
+        if stock_norm and industry_norm is not None and stock_norm != 0:
+            mrs = (industry_norm / stock_norm) - 1
+        else:
+            mrs = None
+        mrs_results[row['symbol']] = mrs
+    bullish_industries = set()
+    bearish_industries = set()
+    for industry, group in df.groupby('industry'):
+        above_50sma = (group['price_vs_sma_pct'] > 0).any()
+        weekly_growth = pd.to_numeric(group.get('weekly_growth', 0), errors='coerce').fillna(0)
+        strong_growth = (weekly_growth > 0.2).any()
+        if above_50sma or strong_growth:
+            bullish_industries.add(industry)
+        else:
+            bearish_industries.add(industry)
+    return {
+        'industry_benchmarks': industry_results,
+        'mrs': mrs_results,
+        'bullish_industries': list(bullish_industries),
+        'bearish_industries': list(bearish_industries)
+    }
+
+
+def _same_report(a: Dict, b: Dict) -> bool:
+    def normalize(report):
+        report = dict(report)
+        report['bullish_industries'] = sorted(report['bullish_industries'])
+        report['bearish_industries'] = sorted(report['bearish_industries'])
+        report['mrs'] = {k: None if v is None else ('nan' if v != v else float(v)) for k, v in report['mrs'].items()}
+        report['industry_benchmarks'] = {
+            k: {**v, 'benchmark': float(v['benchmark']),
+                'normalized_prices': ['nan' if p != p else p for p in v['normalized_prices']]}
+            for k, v in report['industry_benchmarks'].items()
+        }
+        return report
+    return normalize(a) == normalize(b)
+
+
+if __name__ == "__main__":
+    # Benchmark: vectorized engine vs the previous handler at 1k/10k/100k rows
+    import time
+
+    rng = np.random.default_rng(0)
+
+    def make_frame(rows: int) -> pd.DataFrame:
+        symbols = max(1, rows // 5)
+        symbol_ids = rng.integers(0, symbols, rows)
+        price_vs_sma = np.round(rng.normal(3, 10, rows), 2)
+        price_vs_sma[rng.random(rows) < 0.02] = 0
+        market_cap = rng.integers(1e7, 1e12, rows).astype(float)
+        market_cap[rng.random(rows) < 0.01] = np.nan
+        return pd.DataFrame({
+            'symbol': [f"S{i:06d}" for i in symbol_ids],
+            'industry': [f"Industry {i % 150:03d}" for i in symbol_ids],
+            'market_cap': market_cap,
+            'price_vs_sma_pct': [f"{v:.2f}%" for v in price_vs_sma],
+            'weekly_growth': np.round(rng.normal(0, 0.15, rows), 3),
+        })
+
+    for rows in (1000, 10000, 100000):
+        df = make_frame(rows)
+        started = time.perf_counter()
+        legacy = _legacy_industry_benchmark(df)
+        legacy_time = time.perf_counter() - started
+        started = time.perf_counter()
+        report = industry_benchmark_report(df)
+        engine_time = time.perf_counter() - started
+        print(f"{rows:>7} rows  legacy {legacy_time * 1e3:9.1f} ms  vectorized {engine_time * 1e3:7.1f} ms  "
+              f"speedup {legacy_time / engine_time:6.1f}x  identical={_same_report(legacy, report)}")
+
+    # Incremental updates: one bar at a time vs recomputing the whole report
+    df = make_frame(100000)
+    started = time.perf_counter()
+    live = IncrementalIndustryBenchmark.from_frame(df)
+    seed_time = time.perf_counter() - started
+    symbols = list(live._symbols)
+    updates = 100000
+    started = time.perf_counter()
+    for i in range(updates):
+        symbol = symbols[i % len(symbols)]
+        live.update(symbol, price=float(rng.normal(3, 10)))
+        live.mrs(symbol)
+    per_update = (time.perf_counter() - started) / updates
+    started = time.perf_counter()
+    industry_benchmark_report(df)
+    full = time.perf_counter() - started
+    print(f"incremental: seed {seed_time * 1e3:.0f} ms, {per_update * 1e6:.2f} us per bar + MRS read, "
+          f"vs {full * 1e3:.0f} ms full recompute")
@@ -0,0 +1,234 @@
+"""
+Industry Benchmark History for TradingGrow
+Daily market-cap weighted industry benchmark series and per-stock MRS series,
+computed in bulk from the local bar store and published as a memory-mapped
+snapshot so a chart is one array slice
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bar_store import DAY_NS, bar_store
+from chart_payload import columnar_series, encode_days, json_floats
+from downsampling import lttb_indices
+from screening_engine import rolling_mean
+from universe_snapshot import CHECK_INTERVAL, SNAPSHOT_DIR, load_snapshot, read_pointer, write_snapshot, writer_lock
+
+logger = logging.getLogger(__name__)
+
+INDUSTRY_HISTORY_DIR = os.path.join(SNAPSHOT_DIR, 'industry_history')
+HISTORY_DAYS = 366
+# Chart ranges, in calendar days back from the latest bar
+RANGE_DAYS = {'1m': 31, '3m': 92, '6m': 183, '1y': 366, 'all': None}
+DEFAULT_POINTS = 250
+
+
+class IndustryHistory:
+    """Aligned daily benchmark (days x industries) and MRS (days x symbols) matrices"""
+
+    def __init__(self, days: np.ndarray, industries: List[str], symbols: List[str],
+                 benchmarks: np.ndarray, mrs: np.ndarray, symbol_industry: np.ndarray, version: int = 0):
+        self.days = days
+        self.industries = list(industries)
+        self.symbols = list(symbols)
+        self.benchmarks = benchmarks
+        self.mrs = mrs
+        self.symbol_industry = symbol_industry
+        self.version = version
+        self._industry_col = {industry: i for i, industry in enumerate(self.industries)}
+        self._symbol_col = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def _start_row(self, range_name: str) -> int:
+        span = RANGE_DAYS.get(range_name)
+        if span is None or not len(self.days):
+            return 0
+        return int(np.searchsorted(self.days, self.days[-1] - span + 1))
+
+    def industry_series(self, industry: str, range_name: str = '1y') -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(epoch days, benchmark values) for an industry over a chart range"""
+        col = self._industry_col.get(industry)
+        if col is None:
+            return None
+        start = self._start_row(range_name)
+        return self.days[start:], self.benchmarks[start:, col]
+
+    def mrs_series(self, symbol: str, range_name: str = '1y') -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(epoch days, MRS values) for a symbol over a chart range"""
+        col = self._symbol_col.get(str(symbol).upper())
+        if col is None:
+            return None
+        start = self._start_row(range_name)
+        return self.days[start:], self.mrs[start:, col]
+
+    def industry_of(self, symbol: str) -> Optional[str]:
+        col = self._symbol_col.get(str(symbol).upper())
+        return None if col is None else self.industries[int(self.symbol_industry[col])]
+
+    def export(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        arrays = {'days': self.days, 'benchmarks': self.benchmarks, 'mrs': self.mrs,
+                  'symbol_industry': self.symbol_industry}
+        return arrays, {'version': self.version, 'industries': self.industries, 'symbols': self.symbols}
+
+    @classmethod
+    def from_columns(cls, arrays: Dict[str, np.ndarray], meta: Dict) -> 'IndustryHistory':
+        return cls(arrays['days'], meta['industries'], meta['symbols'], arrays['benchmarks'], arrays['mrs'],
+                   arrays['symbol_industry'], meta['version'])
+
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Column-wise forward fill of NaN gaps via a running max of valid row indexes"""
+    rows = np.where(~np.isnan(matrix), np.arange(len(matrix))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return matrix[rows, np.arange(matrix.shape[1])]
+
+
+def close_matrix(symbols: Sequence[str], store=bar_store, days: int = HISTORY_DAYS) -> Tuple[np.ndarray, np.ndarray]:
+    """Date-aligned (days x symbols) closes from locally stored daily bars"""
+    day_parts, col_parts, close_parts = [], [], []
+    for col, symbol in enumerate(symbols):
+        bars = store.read(symbol, '1d')
+        if bars is None or not len(bars):
+            continue
+        day_parts.append(bars['ts'] // DAY_NS)
+        col_parts.append(np.full(len(bars), col))
+        close_parts.append(bars['close'])
+    if not day_parts:
+        return np.array([], dtype=np.int64), np.full((0, len(symbols)), np.nan)
+    bar_days = np.concatenate(day_parts)
+    cols = np.concatenate(col_parts)
+    closes = np.concatenate(close_parts)
+    recent = bar_days > bar_days.max() - days
+    bar_days, cols, closes = bar_days[recent], cols[recent], closes[recent]
+    calendar = np.unique(bar_days)
+    matrix = np.full((len(calendar), len(symbols)), np.nan)
+    matrix[np.searchsorted(calendar, bar_days), cols] = closes
+    return calendar.astype(np.int64), matrix
+
+
+def build_industry_history(symbols: Sequence[str], industries: Sequence[str], market_caps: Sequence[float],
+                           store=bar_store, days: int = HISTORY_DAYS) -> IndustryHistory:
+    """Compute benchmark and MRS series for a universe from the local bar store
+
+    Each close series is forward-filled and normalized to its first bar.
+    Industry benchmarks are market-cap weighted means of the normalized
+    series of the stocks trading on each day; MRS = benchmark / stock - 1.
+    """
+    keep = [i for i, industry in enumerate(industries) if industry]
+    symbols = [str(symbols[i]).upper() for i in keep]
+    industry_names = [industries[i] for i in keep]
+    caps = np.nan_to_num(np.asarray([market_caps[i] for i in keep], dtype='float64'))
+
+    calendar, closes = close_matrix(symbols, store, days)
+    closes = forward_fill(closes)
+    valid = ~np.isnan(closes)
+    if len(closes):
+        base = closes[valid.argmax(axis=0), np.arange(closes.shape[1])]
+    else:
+        base = np.full(closes.shape[1], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = np.where(base != 0, closes / base, np.where(valid, 1.0, np.nan))
+
+    industry_list = sorted(set(industry_names))
+    codes = np.searchsorted(industry_list, industry_names).astype(np.int32)
+    # One-hot market-cap weights: (symbols x industries)
+    weights = np.zeros((len(symbols), len(industry_list)))
+    weights[np.arange(len(symbols)), codes] = caps
+    trading = ~np.isnan(normalized)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        benchmarks = (np.where(trading, normalized, 0.0) @ weights) / (trading @ weights)
+        mrs = benchmarks[:, codes] / normalized - 1
+    mrs[normalized == 0] = np.nan
+
+    return IndustryHistory(calendar, industry_list, symbols, benchmarks, mrs.astype(np.float32), codes,
+                           version=int(time.time()))
+
+
+def series_payload(days: np.ndarray, values: np.ndarray, points: int = DEFAULT_POINTS, smooth: int = 0,
+                   chart_format: str = 'rows', date_encoding: str = 'epoch', float32: bool = False) -> Dict:
+    """JSON-ready {'dates', 'values'} for a series, optionally smoothed and LTTB-downsampled"""
+    values = np.asarray(values, dtype='float64')
+    if smooth > 1:
+        values = rolling_mean(values[:, None], smooth)[:, 0]
+    rows = lttb_indices(days, values, points)
+    if chart_format == 'columnar':
+        return columnar_series(days[rows], values[rows], date_encoding, float32)
+    return {'dates': encode_days(days[rows], 'iso'), 'values': json_floats(values[rows])}
+
+
+class IndustryHistoryStore:
+    """Publishes IndustryHistory snapshots and maps the current one in every worker"""
+
+    def __init__(self, path: str = INDUSTRY_HISTORY_DIR, check_interval: float = CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._history = None
+        self._pointer = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[IndustryHistory]:
+        """The latest published history, or None if none was built yet"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self._history
+        with self._lock:
+            pointer = read_pointer(self.path)
+            if pointer is not None and pointer != self._pointer:
+                self._history = IndustryHistory.from_columns(*load_snapshot(self.path, pointer))
+                self._pointer = pointer
+            self._checked_at = time.monotonic()
+            return self._history
+
+    def publish(self, history: IndustryHistory) -> str:
+        arrays, meta = history.export()
+        with writer_lock(self.path):
+            pointer = write_snapshot(self.path, arrays, meta, history.version)
+        self._checked_at = 0.0
+        logger.info(f"Published industry history {pointer} ({len(history.days)} days, "
+                    f"{len(history.industries)} industries, {len(history.symbols)} symbols)")
+        return pointer
+
+
+industry_history_store = IndustryHistoryStore()
+
+
+if __name__ == "__main__":
+    # Benchmark: build a year of history for 5,000 stocks from a scratch bar store
+    import tempfile
+
+    import pandas as pd
+
+    from bar_store import BarStore, frame_to_bars
+
+    rng = np.random.default_rng(0)
+    size = 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BarStore(root=tmp)
+        index = pd.date_range('2025-01-01', periods=252, freq='B', tz='UTC')
+        for i in range(size):
+            start = int(rng.integers(0, 60))
+            closes = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, 252 - start)))
+            frame = pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+                                  'Volume': 1e6}, index=index[start:])
+            store.write(f"S{i:05d}", '1d', frame_to_bars(frame), {})
+        symbols = [f"S{i:05d}" for i in range(size)]
+        industries = [f"Industry {i % 150:03d}" for i in range(size)]
+        caps = rng.integers(1e8, 1e12, size).astype(float)
+
+        started = time.perf_counter()
+        history = build_industry_history(symbols, industries, caps, store=store)
+        build_time = time.perf_counter() - started
+        history_store = IndustryHistoryStore(path=os.path.join(tmp, 'history'))
+        history_store.publish(history)
+        loaded = history_store.current()
+
+        started = time.perf_counter()
+        for i in range(1000):
+            series_payload(*loaded.industry_series(f"Industry {i % 150:03d}", '1y'))
+        serve_time = (time.perf_counter() - started) / 1000
+        print(f"build {size} stocks x {len(history.days)} days: {build_time * 1e3:.0f} ms; "
+              f"serve one 1y industry chart: {serve_time * 1e6:.0f} us")
@@ -0,0 +1,182 @@
+"""
+Industry Tree for TradingGrow
+Sector -> industry -> stocks grouping of the stock universe with per-industry
+aggregates (count, total market cap, median MRS), built once per universe
+version and kept as pre-serialized JSON for the full tree and each subtree
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from fast_json import RawJSON, dumps
+from stock_universe import MISSING, StockUniverse
+from universe_query import universe_index
+
+logger = logging.getLogger(__name__)
+
+# Label fallbacks per view: the user tree falls back to the industry, the admin tree to 'Other'
+USER_VIEW = 'user'
+ADMIN_VIEW = 'admin'
+
+
+def _labels(universe: StockUniverse, field: str, fallback: Optional[np.ndarray], default: str) -> np.ndarray:
+    """Per-row category text of a field, filled from fallback labels, then a default"""
+    codes = universe.column(field)
+    categories = np.array(universe.categories(field) + [''], dtype=object)
+    labels = categories[np.where(codes == MISSING, len(categories) - 1, codes)]
+    missing = labels == ''
+    if fallback is not None:
+        labels = np.where(missing, fallback, labels)
+        missing = labels == ''
+    return np.where(missing, default, labels)
+
+
+def _user_stocks(universe: StockUniverse) -> List[Dict]:
+    """Slim stock entries of the user tree per row, with its name/price/change fallbacks applied column-wise"""
+    symbols = universe.symbols()
+    price = universe.column('price')
+    price = np.where(np.isnan(price), np.nan_to_num(universe.column('market_cap')), price)
+    change = universe.column('change_percent')
+    change = np.where(np.isnan(change), np.nan_to_num(universe.column('weekly_growth')), change)
+    return [
+        {'symbol': symbol, 'name': name or symbol, 'price': p, 'change_percent': c}
+        for symbol, name, p, c in zip(symbols, universe.names(), price.tolist(), change.tolist())
+    ]
+
+
+class IndustryTree:
+    """Grouped, aggregated view of one universe version"""
+
+    def __init__(self, universe: StockUniverse, view: str = USER_VIEW):
+        self.view = view
+        self.total_stocks = len(universe)
+        if view == ADMIN_VIEW:
+            sectors = _labels(universe, 'sector', None, 'Other')
+            industries = _labels(universe, 'industry_type', None, 'Other')
+        else:
+            industry = _labels(universe, 'industry', None, '')
+            sectors = _labels(universe, 'sector', industry, 'Unknown')
+            industries = _labels(universe, 'industry_type', industry, 'Unknown')
+        codes = _labels(universe, 'industry_code', None, 'N/A')
+
+        # Group rows by (sector, industry), keeping row order inside each group
+        sector_names, sector_ids = np.unique(sectors.astype(str), return_inverse=True)
+        industry_names, industry_ids = np.unique(industries.astype(str), return_inverse=True)
+        group_ids = sector_ids * len(industry_names) + industry_ids
+        order = np.argsort(group_ids, kind='stable')
+        starts = np.flatnonzero(np.diff(group_ids[order], prepend=-1)) if len(order) else np.array([], dtype=int)
+        groups = np.split(order, starts[1:])
+
+        user_stocks = _user_stocks(universe) if view == USER_VIEW else None
+        market_cap = np.nan_to_num(universe.column('market_cap'))
+        mrs = universe.column('mrs_current')
+        self.nodes = {}
+        self.node_json = {}
+        for rows in groups if len(order) else []:
+            first = rows[0]
+            sector = str(sector_names[sector_ids[first]])
+            industry = str(industry_names[industry_ids[first]])
+            group_mrs = mrs[rows]
+            group_mrs = group_mrs[~np.isnan(group_mrs)]
+            stocks = universe.to_records(rows) if user_stocks is None else [user_stocks[row] for row in rows.tolist()]
+            node = {
+                'industry_code': str(codes[first]),
+                'count': len(rows),
+                'total_market_cap': float(market_cap[rows].sum()),
+                'median_mrs': float(np.median(group_mrs)) if len(group_mrs) else None,
+                'stocks': stocks,
+            }
+            self.nodes.setdefault(sector, {})[industry] = node
+            self.node_json[(sector, industry)] = dumps(node)
+
+        # Summary nodes (aggregates without the stock lists) for lazy clients
+        self.summary = {
+            sector: {industry: {key: value for key, value in node.items() if key != 'stocks'}
+                     for industry, node in industries_by_name.items()}
+            for sector, industries_by_name in self.nodes.items()
+        }
+        self.tree_json = dumps({
+            sector: {industry: RawJSON(self.node_json[(sector, industry)]) for industry in industries_by_name}
+            for sector, industries_by_name in self.nodes.items()
+        })
+        self.summary_json = dumps(self.summary)
+        logger.debug(f"Built {view} industry tree: {len(self.node_json)} industries, {self.total_stocks} stocks")
+
+    def industries(self, include_stocks: bool = True) -> RawJSON:
+        """The whole {sector: {industry: node}} tree, optionally without stock lists"""
+        return RawJSON(self.tree_json if include_stocks else self.summary_json)
+
+    def subtree(self, industry: str) -> Optional[RawJSON]:
+        """{sector: node} for every sector holding the industry, or None"""
+        matches = {sector: RawJSON(self.node_json[(sector, industry)])
+                   for sector, industries_by_name in self.nodes.items() if industry in industries_by_name}
+        return RawJSON(dumps(matches)) if matches else None
+
+
+def industry_tree(universe: StockUniverse, view: str = USER_VIEW) -> IndustryTree:
+    """The cached IndustryTree of a universe's current version"""
+    return universe_index(universe).derived(('industry_tree', view), lambda u: IndustryTree(u, view))
+
+
+def _legacy_user_tree(records: List[Dict]) -> Dict:
+    """The previous per-request grouping of /api/stocks/by-industry, for benchmarking"""
+    from collections import defaultdict
+    industries = defaultdict(lambda: defaultdict(lambda: {'industry_code': '', 'stocks': []}))
+    for stock in records:
+        sector = stock.get('sector') or stock.get('industry') or 'Unknown'
+        industry_type = stock.get('industry_type') or stock.get('industry') or 'Unknown'
+        industry_code = stock.get('industry_code', 'N/A')
+        symbol = stock.get('symbol', '')
+        if not industries[sector][industry_type]['industry_code']:
+            industries[sector][industry_type]['industry_code'] = industry_code
+        industries[sector][industry_type]['stocks'].append({
+            'symbol': symbol,
+            'name': stock.get('name', symbol),
+            'price': stock.get('price', stock.get('market_cap', 0)),
+            'change_percent': stock.get('change_percent', stock.get('weekly_growth', 0))
+        })
+    result = {}
+    for sector, sector_industries in industries.items():
+        result[sector] = {}
+        for industry, industry_data in sector_industries.items():
+            result[sector][industry] = {'industry_code': industry_data['industry_code'],
+                                        'stocks': industry_data['stocks']}
+    return result
+
+
+if __name__ == "__main__":
+    # Benchmark: per-request regrouping against the versioned tree, and subtree payload size
+    import json
+    import time
+
+    size = 20000
+    rng = np.random.default_rng(0)
+    records = [{'id': str(i + 1), 'symbol': f"S{i:05d}", 'name': f"Stock {i}", 'industry': f"Industry {i % 150}",
+                'sector': f"Sector {i % 11}" if i % 3 else '', 'market_cap': float(rng.integers(1e8, 3e12)),
+                'mrs_current': float(rng.normal(1, 0.3)), 'weekly_growth': float(rng.normal(0, 3))}
+               for i in range(size)]
+    universe = StockUniverse.from_records(records)
+
+    started = time.perf_counter()
+    legacy = json.dumps({'industries': _legacy_user_tree(universe.to_records())}, sort_keys=True).encode()
+    legacy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tree = industry_tree(universe)
+    build_time = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(100):
+        body = dumps({'industries': industry_tree(universe).industries()})
+    served_time = (time.perf_counter() - started) / 100
+
+    fresh = json.loads(body)['industries']
+    for sector, industries_by_name in json.loads(legacy)['industries'].items():
+        for industry, node in industries_by_name.items():
+            assert fresh[sector][industry]['stocks'] == node['stocks']
+            assert fresh[sector][industry]['industry_code'] == node['industry_code']
+    subtree = dumps({'industry': 'Industry 7', 'sectors': tree.subtree('Industry 7')})
+    print(f"{size} stocks: regroup per request {legacy_time * 1e3:.1f} ms | build once {build_time * 1e3:.1f} ms, "
+          f"then serve {served_time * 1e3:.2f} ms ({len(body) / 1e6:.2f} MB) | "
+          f"one-industry subtree {len(subtree) / 1e3:.1f} KB, summary tree {len(tree.summary_json) / 1e3:.1f} KB")
@@ -0,0 +1,118 @@
+"""
+Startup Schema/Data Migrations for TradingGrow
+db.create_all() only creates missing tables, so column/index additions and
+data moves for existing databases are applied here (idempotently)
+"""
+
+import json
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import undefer
+from sqlalchemy.orm.attributes import flag_modified
+
+import models
+
+logger = logging.getLogger(__name__)
+
+
+def run_migrations(db):
+    """Apply all pending migrations; safe to run on every startup"""
+    ensure_watchlist_type_index(db)
+    migrate_watchlist_json(db)
+    ensure_screening_summary_columns(db)
+    backfill_screening_summaries(db)
+
+
+def ensure_watchlist_type_index(db):
+    """Index watchlists.watchlist_type on tables created before it was declared"""
+    db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_watchlists_watchlist_type ON watchlists (watchlist_type)'))
+    db.session.commit()
+
+
+def migrate_watchlist_json(db):
+    """Move stocks stored in Watchlist.stocks_json into watchlist_items rows"""
+    Watchlist = models.Watchlist
+    pending = Watchlist.query.filter(
+        Watchlist.stocks_json.isnot(None),
+        Watchlist.stocks_json != '',
+        Watchlist.stocks_json != '[]'
+    ).all()
+    if not pending:
+        return 0
+
+    migrated = 0
+    try:
+        for watchlist in pending:
+            try:
+                stocks = json.loads(watchlist.stocks_json)
+            except (json.JSONDecodeError, TypeError):
+                stocks = []
+            # Keep anything already written to items; JSON entries only fill gaps
+            existing = {item.symbol for item in watchlist.items}
+            new_stocks = [s for s in stocks if isinstance(s, dict) and (s.get('symbol') or '') not in existing]
+            watchlist.stocks = watchlist.stocks + new_stocks
+            watchlist.stocks_json = '[]'
+            migrated += len(new_stocks)
+        db.session.commit()
+        logger.info(f"Migrated {migrated} watchlist stocks from JSON into watchlist_items")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error migrating watchlist JSON: {e}")
+    return migrated
+
+
+# Summary columns added to stock_screenings after its creation
+SCREENING_SUMMARY_COLUMNS = {
+    'row_count': 'INTEGER',
+    'results_size': 'INTEGER',
+    'top_symbols': 'TEXT',
+}
+# Screenings decoded per commit while backfilling summaries
+BACKFILL_BATCH = 100
+
+
+def ensure_screening_summary_columns(db):
+    """Add the summary columns and listing index to stock_screenings tables created before them"""
+    existing = {column['name'] for column in inspect(db.engine).get_columns('stock_screenings')}
+    for name, sql_type in SCREENING_SUMMARY_COLUMNS.items():
+        if name not in existing:
+            db.session.execute(text(f'ALTER TABLE stock_screenings ADD COLUMN {name} {sql_type}'))
+    db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_stock_screenings_created_at_id '
+                            'ON stock_screenings (created_at, id)'))
+    db.session.commit()
+
+
+def backfill_screening_summaries(db):
+    """Compute summary columns for screenings stored before they existed (row_count IS NULL)"""
+    StockScreening = models.StockScreening
+    ScreeningRow = models.ScreeningRow
+    backfilled = 0
+    try:
+        while True:
+            # Each batch is committed, so it drops out of the IS NULL filter
+            batch = (StockScreening.query.options(undefer(StockScreening.results))
+                     .filter(StockScreening.row_count.is_(None))
+                     .limit(BACKFILL_BATCH).all())
+            if not batch:
+                break
+            for screening in batch:
+                results = screening.results or ''
+                stocks = screening.results_data.get('stocks', [])
+                stocks = stocks if isinstance(stocks, list) else []
+                rows = ScreeningRow.query.filter_by(screening_id=screening.id)
+                row_count = rows.count()
+                if row_count:
+                    # Uploaded universes: the stored rows are the results
+                    stocks = [row.stock for row in rows.order_by(ScreeningRow.position).limit(models.SUMMARY_SYMBOLS)]
+                screening.summarize(stocks, len(results.encode('utf-8')), row_count=row_count or len(stocks))
+                # Keep updated_at as it was: writing it explicitly suppresses its onupdate default
+                flag_modified(screening, 'updated_at')
+            db.session.commit()
+            backfilled += len(batch)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error backfilling screening summaries: {e}")
+    if backfilled:
+        logger.info(f"Backfilled summary columns for {backfilled} stock screenings")
+    return backfilled
@@ -4,6 +4,27 @@ from datetime import datetime
 import uuid
 from db import db
 import json
+import math
+import threading
+import time
+from sqlalchemy.orm import deferred, validates
+
+_position_lock = threading.Lock()
+_last_position = 0
+
+# Rows per executemany batch when storing an uploaded screening universe
+SCREENING_ROW_BATCH = 1000
+# Leading symbols kept in a screening's summary columns
+SUMMARY_SYMBOLS = 5
+
+
+def _next_position(count=1):
+    """Reserve `count` increasing watchlist item positions (microsecond clock based)"""
+    global _last_position
+    with _position_lock:
+        base = max(time.time_ns() // 1000, _last_position + 1)
+        _last_position = base + max(count, 1) - 1
+        return base
 
 
 def init_models(db):
@@ -89,10 +110,14 @@ def init_models(db):
         id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
         name = db.Column(db.String(100), nullable=False)
         user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-        watchlist_type = db.Column(db.String(20), default='normal')  # 'breakout', 'speculative', 'normal'
-        stocks_json = db.Column(db.Text, default='[]')  # JSON string to store stocks data
+        watchlist_type = db.Column(db.String(20), default='normal', index=True)  # 'breakout', 'speculative', 'normal'
+        stocks_json = db.Column(db.Text, default='[]')  # Legacy JSON storage, migrated into watchlist_items
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+        
+        # One row per stock, ordered as added
+        items = db.relationship('WatchlistItem', backref='watchlist', lazy=True,
+                                cascade='all, delete-orphan', order_by='WatchlistItem.position')
 
         def __init__(self, name, user_id, watchlist_type='normal', **kwargs):
             super().__init__(**kwargs)
@@ -103,29 +128,41 @@ def init_models(db):
 
         @property
         def stocks(self):
-            """Get stocks as a list from JSON string"""
-            try:
-                return json.loads(self.stocks_json or '[]')
-            except (json.JSONDecodeError, TypeError):
-                return []
+            """Get stocks as a list from the watchlist items"""
+            return [item.stock for item in self.items]
 
         @stocks.setter
         def stocks(self, value):
-            """Set stocks as JSON string from list"""
-            self.stocks_json = json.dumps(value or [])
+            """Replace all stocks in the watchlist"""
+            by_symbol = {}
+            for stock_data in value or []:
+                by_symbol[stock_data.get('symbol') or ''] = stock_data
+            position = _next_position(len(by_symbol))
+            self.items = [
+                WatchlistItem(symbol=symbol, position=position + i, data=json.dumps(stock_data))
+                for i, (symbol, stock_data) in enumerate(by_symbol.items())
+            ]
+            self.updated_at = datetime.utcnow()
 
         def add_stock(self, stock_data):
-            """Add a stock to the watchlist"""
-            current_stocks = self.stocks
-            current_stocks.append(stock_data)
-            self.stocks = current_stocks
+            """Add a stock to the watchlist, replacing any entry with the same symbol"""
+            symbol = stock_data.get('symbol') or ''
+            if self.id is None:
+                self.stocks = self.stocks + [stock_data]
+                return
+            item = db.session.get(WatchlistItem, (self.id, symbol))
+            if item:
+                item.data = json.dumps(stock_data)
+            else:
+                db.session.add(WatchlistItem(watchlist_id=self.id, symbol=symbol,
+                                             position=_next_position(), data=json.dumps(stock_data)))
+            db.session.expire(self, ['items'])
             self.updated_at = datetime.utcnow()
 
         def remove_stock(self, symbol):
             """Remove a stock from the watchlist by symbol"""
-            current_stocks = self.stocks
-            current_stocks = [stock for stock in current_stocks if stock.get('symbol') != symbol]
-            self.stocks = current_stocks
+            WatchlistItem.query.filter_by(watchlist_id=self.id, symbol=symbol).delete(synchronize_session=False)
+            db.session.expire(self, ['items'])
             self.updated_at = datetime.utcnow()
 
         def save(self):
@@ -153,6 +190,37 @@ def init_models(db):
             return f'<Watchlist {self.name} ({self.watchlist_type})>'
     
     
+    class WatchlistItem(db.Model):
+        __tablename__ = 'watchlist_items'
+        
+        watchlist_id = db.Column(db.String(36), db.ForeignKey('watchlists.id', ondelete='CASCADE'), primary_key=True)
+        symbol = db.Column(db.String(20), primary_key=True)
+        position = db.Column(db.BigInteger, nullable=False, default=0)  # Insertion order within the watchlist
+        data = db.Column(db.Text, nullable=False, default='{}')  # JSON string for the stock fields
+        created_at = db.Column(db.DateTime, default=datetime.utcnow)
+        
+        @property
+        def stock(self):
+            """Get the stock fields as a dict"""
+            try:
+                return json.loads(self.data or '{}')
+            except (json.JSONDecodeError, TypeError):
+                return {'symbol': self.symbol}
+        
+        @staticmethod
+        def stocks_for_type(watchlist_type):
+            """Get stocks from every watchlist of a type with one indexed query"""
+            items = (WatchlistItem.query
+                     .join(Watchlist, Watchlist.id == WatchlistItem.watchlist_id)
+                     .filter(Watchlist.watchlist_type == watchlist_type)
+                     .order_by(Watchlist.created_at, Watchlist.id, WatchlistItem.position)
+                     .all())
+            return [item.stock for item in items]
+        
+        def __repr__(self):
+            return f'<WatchlistItem {self.watchlist_id}:{self.symbol}>'
+    
+    
     class SubscriptionRequest(db.Model):
         __tablename__ = 'subscription_requests'
         
@@ -220,10 +288,22 @@ def init_models(db):
         id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
         name = db.Column(db.String(100), nullable=False)
         criteria = db.Column(db.Text, nullable=False)  # JSON string for screening criteria
-        results = db.Column(db.Text, nullable=False)   # JSON string for screening results
+        results = deferred(db.Column(db.Text, nullable=False))  # JSON string for screening results, loaded on access
         created_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+        # Summary of the results, maintained on write so listings never decode them
+        row_count = db.Column(db.Integer, nullable=True)
+        results_size = db.Column(db.Integer, nullable=True)  # Bytes of the results JSON
+        top_symbols = db.Column(db.Text, nullable=True)  # JSON list of the first result symbols
+        
+        __table_args__ = (
+            db.Index('ix_stock_screenings_created_at_id', 'created_at', 'id'),
+        )
+        
+        # Uploaded universes are stored as rows rather than in the results JSON
+        rows = db.relationship('ScreeningRow', lazy='dynamic', passive_deletes=True,
+                               order_by='ScreeningRow.position')
         
         def __init__(self, name, criteria, results, created_by, **kwargs):
             super().__init__(**kwargs)
@@ -240,6 +320,12 @@ def init_models(db):
             except (json.JSONDecodeError, TypeError):
                 return {}
         
+        @property
+        def criteria_plan(self):
+            """Get the compiled evaluation plan for the stored criteria"""
+            from screening_criteria import compile_criteria
+            return compile_criteria(self.criteria_data)
+        
         @property
         def results_data(self):
             """Get results as dict from JSON string"""
@@ -248,6 +334,39 @@ def init_models(db):
             except (json.JSONDecodeError, TypeError):
                 return {}
         
+        @validates('results')
+        def _summarize_results(self, key, value):
+            """Refresh the summary columns whenever results are assigned"""
+            try:
+                stocks = json.loads(value or '{}').get('stocks', [])
+            except (json.JSONDecodeError, TypeError, AttributeError):
+                stocks = []
+            self.summarize(stocks if isinstance(stocks, list) else [], len((value or '').encode('utf-8')))
+            return value
+        
+        def summarize(self, stocks, results_size, row_count=None):
+            """Set the summary columns from the leading stocks and the total row count"""
+            symbols = [stock.get('symbol') for stock in stocks[:SUMMARY_SYMBOLS] if isinstance(stock, dict)]
+            self.row_count = len(stocks) if row_count is None else row_count
+            self.results_size = results_size
+            self.top_symbols = json.dumps([symbol for symbol in symbols if symbol])
+        
+        @property
+        def summary(self):
+            """Listing fields of the screening, read from the summary columns only"""
+            try:
+                top_symbols = json.loads(self.top_symbols or '[]')
+            except (json.JSONDecodeError, TypeError):
+                top_symbols = []
+            return {
+                'id': self.id,
+                'name': self.name,
+                'row_count': self.row_count or 0,
+                'results_size': self.results_size or 0,
+                'top_symbols': top_symbols,
+                'created_at': self.created_at.isoformat() + 'Z'
+            }
+        
         def save(self):
             try:
                 db.session.add(self)
@@ -261,12 +380,26 @@ def init_models(db):
         def get_all():
             return StockScreening.query.order_by(StockScreening.created_at.desc()).all()
         
+        @staticmethod
+        def page(after=None, limit=50):
+            """Up to `limit` screenings, newest first, after an (created_at, id) keyset position"""
+            query = StockScreening.query
+            if after is not None:
+                created_at, screening_id = after
+                query = query.filter(db.or_(
+                    StockScreening.created_at < created_at,
+                    db.and_(StockScreening.created_at == created_at, StockScreening.id < screening_id)
+                ))
+            return query.order_by(StockScreening.created_at.desc(), StockScreening.id.desc()).limit(limit).all()
+        
         @staticmethod
         def get(screening_id):
             return StockScreening.query.filter_by(id=screening_id).first()
         
         def delete(self):
             try:
+                # Bulk delete; SQLite does not enforce the ON DELETE CASCADE by default
+                ScreeningRow.query.filter_by(screening_id=self.id).delete(synchronize_session=False)
                 db.session.delete(self)
                 db.session.commit()
                 return True
@@ -276,12 +409,93 @@ def init_models(db):
         
         def __repr__(self):
             return f'<StockScreening {self.name}>'
+    
+    
+    class ScreeningRow(db.Model):
+        __tablename__ = 'screening_rows'
+        
+        screening_id = db.Column(db.String(36), db.ForeignKey('stock_screenings.id', ondelete='CASCADE'),
+                                 primary_key=True)
+        position = db.Column(db.Integer, primary_key=True)  # Row order within the upload
+        symbol = db.Column(db.String(20), nullable=False, default='')
+        name = db.Column(db.String(200), nullable=False, default='')
+        sector = db.Column(db.String(100), nullable=False, default='')
+        industry = db.Column(db.String(100), nullable=False, default='')
+        price = db.Column(db.Float, nullable=True)
+        market_cap = db.Column(db.Float, nullable=True)
+        latest_volume = db.Column(db.BigInteger, nullable=True)
+        
+        __table_args__ = (
+            db.Index('ix_screening_rows_screening_symbol', 'screening_id', 'symbol'),
+            db.Index('ix_screening_rows_screening_industry', 'screening_id', 'industry'),
+        )
+        
+        FIELDS = ('symbol', 'name', 'sector', 'industry', 'price', 'market_cap', 'latest_volume')
+        
+        @property
+        def stock(self):
+            """Get the row as a stock dict"""
+            return {field: getattr(self, field) for field in ScreeningRow.FIELDS}
+        
+        @staticmethod
+        def values(stock):
+            """Typed column values for a stock dict; unparseable numbers become NULL"""
+            from screening_criteria import parse_number
+            row = {field: str(stock.get(field) or '').strip() for field in ('symbol', 'name', 'sector', 'industry')}
+            row['symbol'] = row['symbol'].upper()
+            for field in ('price', 'market_cap', 'latest_volume'):
+                number = parse_number(stock.get(field) or 'nan')
+                row[field] = number if math.isfinite(number) else None
+            if row['latest_volume'] is not None:
+                row['latest_volume'] = int(row['latest_volume'])
+            return row
+        
+        @staticmethod
+        def bulk_insert(screening_id, stocks, start=0, batch_size=SCREENING_ROW_BATCH):
+            """Insert stock dicts as rows after `start` with executemany batches; returns the next position"""
+            table = ScreeningRow.__table__
+            batch = []
+            position = start
+            for stock in stocks:
+                row = ScreeningRow.values(stock)
+                row['screening_id'] = screening_id
+                row['position'] = position
+                position += 1
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    db.session.execute(table.insert(), batch)
+                    batch = []
+            if batch:
+                db.session.execute(table.insert(), batch)
+            return position
+        
+        @staticmethod
+        def page(screening_id, after=None, limit=100):
+            """Up to `limit` rows of a screening after position `after`, by keyset on the primary key"""
+            query = ScreeningRow.query.filter(ScreeningRow.screening_id == screening_id)
+            if after is not None:
+                query = query.filter(ScreeningRow.position > after)
+            return query.order_by(ScreeningRow.position).limit(limit).all()
+        
+        @staticmethod
+        def latest_screening_id():
+            """Id of the most recent screening that has stored rows, or None"""
+            row = (db.session.query(StockScreening.id)
+                   .filter(StockScreening.rows.any())
+                   .order_by(StockScreening.created_at.desc())
+                   .first())
+            return row[0] if row else None
+        
+        def __repr__(self):
+            return f'<ScreeningRow {self.screening_id}:{self.position} {self.symbol}>'
 
-    return User, Watchlist, StockScreening, SubscriptionRequest
+    return User, Watchlist, StockScreening, SubscriptionRequest, WatchlistItem, ScreeningRow
 
 
 # Placeholder for models - will be set by init_models()
 User = None
 Watchlist = None
 StockScreening = None
-SubscriptionRequest = None
\ No newline at end of file
+SubscriptionRequest = None
+WatchlistItem = None
+ScreeningRow = None
\ No newline at end of file
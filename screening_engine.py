@@ -0,0 +1,125 @@
+"""
+Vectorized Screening Engine for TradingGrow
+Aligns the whole universe into one (bars x symbols) close matrix and evaluates
+moving-average screens for every symbol in a single NumPy pass
+"""
+
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Optional import for pandas-backed inputs
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    pd = None
+    PANDAS_AVAILABLE = False
+
+SMA_WINDOWS = (50, 150)
+
+
+class ScreeningResult:
+    """Boolean pass mask plus the indicator values it was computed from"""
+
+    def __init__(self, symbols: np.ndarray, mask: np.ndarray, indicators: Dict[str, np.ndarray]):
+        self.symbols = symbols
+        self.mask = mask
+        self.indicators = indicators
+
+    def passing(self) -> List[str]:
+        """Symbols that passed the screen, in input order"""
+        return self.symbols[self.mask].tolist()
+
+
+def align_closes(ohlc_data, bars: int):
+    """Right-align the last `bars` closes of every symbol into one matrix
+
+    Accepts a {symbol: OHLC DataFrame} dict or a wide (symbol, field) frame
+    from BulkFetcher. Symbols with fewer bars are NaN-padded at the top.
+    """
+    if PANDAS_AVAILABLE and isinstance(ohlc_data, pd.DataFrame):
+        closes = ohlc_data.xs('Close', level='field', axis=1)
+        symbols = np.asarray(closes.columns, dtype=object)
+        matrix = closes.to_numpy(dtype='float64')
+        # Compact each column's bars to the bottom so gaps from date alignment disappear
+        order = np.argsort(~np.isnan(matrix), axis=0, kind='stable')
+        matrix = np.take_along_axis(matrix, order, axis=0)[-bars:]
+        if len(matrix) < bars:
+            matrix = np.vstack([np.full((bars - len(matrix), len(symbols)), np.nan), matrix])
+        return symbols, matrix
+
+    symbols = np.asarray(list(ohlc_data.keys()), dtype=object)
+    matrix = np.full((bars, len(symbols)), np.nan)
+    for col, df in enumerate(ohlc_data.values()):
+        closes = np.asarray(df['Close'], dtype='float64')[-bars:]
+        if len(closes):
+            matrix[bars - len(closes):, col] = closes
+    return symbols, matrix
+
+
+def rolling_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Column-wise simple moving average via cumulative sums; NaN until `window` bars exist"""
+    out = np.full(matrix.shape, np.nan)
+    if len(matrix) < window:
+        return out
+    valid = ~np.isnan(matrix)
+    sums = np.cumsum(np.where(valid, matrix, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums = np.vstack([np.zeros((1, matrix.shape[1])), sums])
+    counts = np.vstack([np.zeros((1, matrix.shape[1]), dtype=counts.dtype), counts])
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    # Like pandas rolling(window).mean(), any missing bar in the window yields NaN
+    out[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return out
+
+
+def compute_indicators(ohlc_data, windows: Sequence[int] = SMA_WINDOWS):
+    """Latest close and trailing SMA values for every symbol"""
+    bars = max(windows) if windows else 1
+    symbols, matrix = align_closes(ohlc_data, bars)
+    indicators = {'close': matrix[-1]}
+    for window in windows:
+        # Only the latest value is needed, so average the trailing window directly
+        indicators[f'sma{window}'] = matrix[-window:].mean(axis=0)
+    return symbols, indicators
+
+
+def screen_above_sma(ohlc_data, windows: Sequence[int] = SMA_WINDOWS) -> ScreeningResult:
+    """Flag symbols whose latest close is above every given SMA"""
+    symbols, indicators = compute_indicators(ohlc_data, windows)
+    close = indicators['close']
+    mask = np.ones(len(symbols), dtype=bool)
+    for window in windows:
+        # Symbols without a full window have a NaN SMA and never pass
+        mask &= close > indicators[f'sma{window}']
+    return ScreeningResult(symbols, mask, indicators)
+
+
+if __name__ == "__main__":
+    # Benchmark: screen 5,000 symbols with 200 bars each
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=200)
+    universe = {
+        f"S{i:05d}": pd.DataFrame({'Close': 100 + rng.standard_normal(200).cumsum()}, index=index)
+        for i in range(5000)
+    }
+
+    started = time.perf_counter()
+    result = screen_above_sma(universe)
+    elapsed = time.perf_counter() - started
+    print(f"Vectorized: {elapsed * 1000:8.1f} ms  ({len(result.passing())} bullish)")
+
+    started = time.perf_counter()
+    legacy = []
+    for symbol, df in universe.items():
+        df = df.copy()
+        df['SMA50'] = df['Close'].rolling(window=50).mean()
+        df['SMA150'] = df['Close'].rolling(window=150).mean()
+        latest = df.iloc[-1]
+        if latest['Close'] > latest['SMA50'] and latest['Close'] > latest['SMA150']:
+            legacy.append(symbol)
+    elapsed = time.perf_counter() - started
+    print(f"Per-symbol: {elapsed * 1000:8.1f} ms  ({len(legacy)} bullish, match={legacy == result.passing()})")
@@ -0,0 +1,399 @@
+"""
+Columnar Stock Universe for TradingGrow
+Typed NumPy columns for the numeric stock fields, interned category codes for
+industry/sector-style fields and a symbol -> row index, replacing the list of
+string dicts the admin and API routes used to re-parse on every request
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from screening_criteria import parse_number
+
+logger = logging.getLogger(__name__)
+
+# Numeric fields, parsed once on the way in ('+2.5%' -> 2.5); missing is NaN
+NUMERIC_FIELDS = ('market_cap', 'latest_volume', 'mrs_current', 'weekly_growth', 'total_stocks',
+                  'price_vs_sma_pct', 'price', 'change_percent')
+# Numeric fields rendered back as ints
+INTEGER_FIELDS = {'latest_volume', 'total_stocks'}
+# Low-cardinality text fields stored as int32 codes into a per-field category list; missing is -1
+CATEGORICAL_FIELDS = ('industry', 'sector', 'industry_type', 'industry_code', 'watchlist_type',
+                      'market_cap_formatted', 'total_market_cap_formatted')
+# Field order of rendered records
+RECORD_FIELDS = ('id', 'symbol', 'name', 'industry', 'sector', 'industry_type', 'industry_code', 'market_cap',
+                 'market_cap_formatted', 'latest_volume', 'mrs_current', 'weekly_growth', 'total_stocks',
+                 'total_market_cap_formatted', 'price_vs_sma_pct', 'price', 'change_percent', 'watchlist_type')
+
+MISSING = -1
+
+
+class StockUniverse:
+    """Columnar, symbol-indexed store of stock rows
+
+    Every mutation bumps `version`, so derived views can be cached per version.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._lock = threading.RLock()
+        self.version = 0
+        self._size = 0
+        self._capacity = capacity
+        self._ids = np.empty(capacity, dtype=object)
+        self._symbols = np.empty(capacity, dtype=object)
+        self._names = np.empty(capacity, dtype=object)
+        self._numeric = {field: np.full(capacity, np.nan) for field in NUMERIC_FIELDS}
+        self._codes = {field: np.full(capacity, MISSING, dtype=np.int32) for field in CATEGORICAL_FIELDS}
+        self._categories = {field: [] for field in CATEGORICAL_FIELDS}
+        self._category_index = {field: {} for field in CATEGORICAL_FIELDS}
+        # Rarely used fields (price history, bullish reasons, ...) per row
+        self._extras = {}
+        self._by_symbol = {}
+        # Set on read-only universes mapped from a snapshot
+        self._symbol_order = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'StockUniverse':
+        records = list(records)
+        universe = cls(capacity=max(64, len(records)))
+        universe.extend(records)
+        return universe
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, symbol: str):
+        return self.row_of(symbol) is not None
+
+    # Lookup
+
+    @property
+    def frozen(self) -> bool:
+        return self._symbol_order is not None
+
+    def row_of(self, symbol: str) -> Optional[int]:
+        symbol = str(symbol).upper()
+        if not self.frozen:
+            return self._by_symbol.get(symbol)
+        # Snapshot universes binary-search the mapped symbol column instead of building a dict
+        i = int(np.searchsorted(self._symbols, symbol, sorter=self._symbol_order))
+        if i < self._size:
+            row = int(self._symbol_order[i])
+            if self._symbols[row] == symbol:
+                return row
+        return None
+
+    def row_of_id(self, stock_id: str) -> Optional[int]:
+        # Ids are only used by the rare admin edit/delete calls, so they are scanned, not indexed
+        rows = np.flatnonzero(self._ids[:self._size] == str(stock_id))
+        return int(rows[0]) if len(rows) else None
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Record for a symbol (case-insensitive), or None"""
+        row = self.row_of(symbol)
+        return None if row is None else self.record(row)
+
+    def record(self, row: int) -> Dict:
+        """Render one row as a stock dict, omitting missing fields"""
+        record = {}
+        for field in RECORD_FIELDS:
+            if field in self._numeric:
+                value = self._numeric[field][row]
+                if value == value:
+                    record[field] = int(value) if field in INTEGER_FIELDS else float(value)
+            elif field in self._codes:
+                code = self._codes[field][row]
+                if code != MISSING:
+                    record[field] = self._categories[field][code]
+            else:
+                value = {'id': self._ids, 'symbol': self._symbols, 'name': self._names}[field][row]
+                if value:
+                    record[field] = str(value)
+        extras = self._extras.get(row)
+        if extras:
+            record.update(extras)
+        return record
+
+    def to_records(self, rows: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Render all rows, or the given row positions, as stock dicts"""
+        with self._lock:
+            if rows is None:
+                rows = range(self._size)
+            return [self.record(int(row)) for row in rows]
+
+    # Columns
+
+    def column(self, field: str) -> np.ndarray:
+        """Numeric values, or category codes, of the live rows (read-only view)"""
+        source = self._numeric.get(field)
+        if source is None:
+            source = self._codes[field]
+        view = source[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def categories(self, field: str) -> List[str]:
+        return list(self._categories[field])
+
+    def numeric_columns(self) -> Dict[str, np.ndarray]:
+        """Copies of every numeric column, e.g. for screening criteria"""
+        with self._lock:
+            return {field: values[:self._size].copy() for field, values in self._numeric.items()}
+
+    def symbols(self) -> List[str]:
+        return self._symbols[:self._size].tolist()
+
+    def names(self) -> List[Optional[str]]:
+        return self._names[:self._size].tolist()
+
+    def category_code(self, field: str, value: str) -> Optional[int]:
+        """Code of a categorical field value, or None if no row has it"""
+        return self._category_index[field].get(value)
+
+    def where(self, field: str, value: str) -> np.ndarray:
+        """Boolean mask of rows whose categorical field equals value"""
+        code = self.category_code(field, value)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+        return self._codes[field][:self._size] == code
+
+    # Mutation
+
+    def _intern(self, field: str, value) -> int:
+        if value is None or value == '':
+            return MISSING
+        value = str(value)
+        index = self._category_index[field]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(self._categories[field])
+            self._categories[field].append(value)
+        return code
+
+    def _grow(self, needed: int):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        for name in ('_ids', '_symbols', '_names'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=object)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+        for columns, fill in ((self._numeric, np.nan), (self._codes, MISSING)):
+            for field, old in columns.items():
+                new = np.full(capacity, fill, dtype=old.dtype)
+                new[:self._size] = old[:self._size]
+                columns[field] = new
+        self._capacity = capacity
+
+    def _write_row(self, row: int, record: Dict):
+        for field, value in record.items():
+            if field in self._numeric:
+                self._numeric[field][row] = parse_number(value) if value not in (None, '') else np.nan
+            elif field in self._codes:
+                self._codes[field][row] = self._intern(field, value)
+            elif field == 'id':
+                self._ids[row] = str(value)
+            elif field == 'name':
+                self._names[row] = value or None
+            elif field != 'symbol':
+                self._extras.setdefault(row, {})[field] = value
+
+    def upsert(self, record: Dict) -> int:
+        """Insert a stock, or update the row with the same symbol; returns the row"""
+        symbol = str(record.get('symbol', '')).strip().upper()
+        if not symbol:
+            raise ValueError("Stock record has no symbol")
+        with self._lock:
+            self._check_writable()
+            row = self._by_symbol.get(symbol)
+            if row is None:
+                self._grow(self._size + 1)
+                row = self._size
+                self._size += 1
+                self._symbols[row] = symbol
+                self._by_symbol[symbol] = row
+            self._write_row(row, record)
+            self.version += 1
+            return row
+
+    def extend(self, records: Iterable[Dict]):
+        with self._lock:
+            for record in records:
+                self.upsert(record)
+
+    def replace(self, records: Iterable[Dict]):
+        """Swap the whole universe for new records"""
+        with self._lock:
+            self._check_writable()
+            self._size = 0
+            self._ids[:] = None
+            self._names[:] = None
+            for values in self._numeric.values():
+                values[:] = np.nan
+            for codes in self._codes.values():
+                codes[:] = MISSING
+            self._extras.clear()
+            self._by_symbol.clear()
+            self.extend(records)
+            self.version += 1
+
+    def set_value(self, row: int, field: str, value):
+        with self._lock:
+            self._check_writable()
+            self._write_row(row, {field: value})
+            self.version += 1
+
+    def delete_rows(self, mask: np.ndarray) -> int:
+        """Drop the rows where mask is True, keeping the others in order"""
+        with self._lock:
+            self._check_writable()
+            mask = np.asarray(mask, dtype=bool)
+            keep = np.flatnonzero(~mask)
+            removed = self._size - len(keep)
+            if not removed:
+                return 0
+            size = len(keep)
+            for name in ('_ids', '_symbols', '_names'):
+                values = getattr(self, name)
+                values[:size] = values[keep]
+                values[size:self._size] = None
+            for columns, fill in ((self._numeric, np.nan), (self._codes, MISSING)):
+                for values in columns.values():
+                    values[:size] = values[keep]
+                    values[size:self._size] = fill
+            new_rows = {int(old): new for new, old in enumerate(keep)}
+            self._extras = {new_rows[row]: extras for row, extras in self._extras.items() if row in new_rows}
+            self._size = size
+            self._by_symbol = {symbol: row for row, symbol in enumerate(self._symbols[:size].tolist())}
+            self.version += 1
+            return removed
+
+    def _check_writable(self):
+        if self.frozen:
+            raise RuntimeError("Snapshot universes are read-only; use thaw() for a writable copy")
+
+    def delete_id(self, stock_id: str) -> bool:
+        """Drop the stock with the given id"""
+        with self._lock:
+            row = self.row_of_id(stock_id)
+            if row is None:
+                return False
+            mask = np.zeros(self._size, dtype=bool)
+            mask[row] = True
+            return self.delete_rows(mask) > 0
+
+    # Snapshots
+
+    def export(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """Fixed-width column arrays and JSON metadata for writing a snapshot"""
+        with self._lock:
+            size = self._size
+            symbols = np.array([str(v) for v in self._symbols[:size]], dtype=str)
+            arrays = {
+                'ids': np.array([str(v or '') for v in self._ids[:size]], dtype=str),
+                'symbols': symbols,
+                'names': np.array([str(v or '') for v in self._names[:size]], dtype=str),
+                'symbol_order': np.argsort(symbols, kind='stable').astype(np.int64),
+            }
+            arrays.update({f"num_{field}": values[:size] for field, values in self._numeric.items()})
+            arrays.update({f"code_{field}": codes[:size] for field, codes in self._codes.items()})
+            meta = {
+                'version': self.version,
+                'size': size,
+                'categories': {field: list(values) for field, values in self._categories.items()},
+                'extras': {str(row): extras for row, extras in self._extras.items()},
+            }
+            return arrays, meta
+
+    @classmethod
+    def from_columns(cls, arrays: Dict[str, np.ndarray], meta: Dict) -> 'StockUniverse':
+        """Read-only universe over exported (typically memory-mapped) arrays, without copying"""
+        universe = cls(capacity=0)
+        universe.version = meta['version']
+        universe._size = universe._capacity = meta['size']
+        universe._ids = arrays['ids']
+        universe._symbols = arrays['symbols']
+        universe._names = arrays['names']
+        universe._numeric = {field: arrays[f"num_{field}"] for field in NUMERIC_FIELDS}
+        universe._codes = {field: arrays[f"code_{field}"] for field in CATEGORICAL_FIELDS}
+        universe._categories = {field: list(meta['categories'].get(field, [])) for field in CATEGORICAL_FIELDS}
+        universe._category_index = {field: {value: code for code, value in enumerate(values)}
+                                    for field, values in universe._categories.items()}
+        universe._extras = {int(row): extras for row, extras in meta.get('extras', {}).items()}
+        universe._by_symbol = None
+        universe._symbol_order = arrays['symbol_order']
+        return universe
+
+    def thaw(self) -> 'StockUniverse':
+        """Writable in-memory copy, e.g. of a snapshot universe"""
+        with self._lock:
+            size = self._size
+            universe = StockUniverse(capacity=max(64, size))
+            universe._size = size
+            for name in ('_ids', '_symbols', '_names'):
+                values = [str(v) if v else None for v in getattr(self, name)[:size].tolist()]
+                getattr(universe, name)[:size] = values
+            for field, values in self._numeric.items():
+                universe._numeric[field][:size] = values[:size]
+            for field, codes in self._codes.items():
+                universe._codes[field][:size] = codes[:size]
+            universe._categories = {field: list(values) for field, values in self._categories.items()}
+            universe._category_index = {field: dict(index) for field, index in self._category_index.items()}
+            universe._extras = {row: dict(extras) for row, extras in self._extras.items()}
+            universe._by_symbol = {symbol: row for row, symbol in enumerate(universe._symbols[:size].tolist())}
+            universe.version = self.version
+            return universe
+
+
+if __name__ == "__main__":
+    # Benchmark: memory, lookup and filtering against a list of string dicts
+    import time
+    import tracemalloc
+
+    size = 20000
+    rng = np.random.default_rng(0)
+
+    def make_records():
+        return [{
+            'id': str(i + 1), 'symbol': f"S{i:05d}", 'industry': f"Industry {i % 150}",
+            'market_cap': str(int(rng.integers(1e8, 3e12))), 'market_cap_formatted': '$1.2B',
+            'latest_volume': str(int(rng.integers(1e4, 1e8))), 'mrs_current': f"{rng.normal(1, 0.3):.2f}",
+            'weekly_growth': f"{rng.normal(0, 3):+.1f}%", 'total_stocks': '500',
+            'total_market_cap_formatted': '$10T', 'price_vs_sma_pct': f"{rng.normal(5, 8):.2f}%"
+        } for i in range(size)]
+
+    tracemalloc.start()
+    records = make_records()
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    universe = StockUniverse.from_records(records)
+    columnar_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{size} stocks: dicts {dict_bytes / 1e6:.1f} MB, columnar {columnar_bytes / 1e6:.1f} MB")
+
+    started = time.perf_counter()
+    for i in range(1000):
+        next(s for s in records if s['symbol'] == f"S{(i * 37) % size:05d}")
+    linear = (time.perf_counter() - started) / 1000
+    started = time.perf_counter()
+    for i in range(1000):
+        universe.get(f"S{(i * 37) % size:05d}")
+    indexed = (time.perf_counter() - started) / 1000
+    print(f"lookup: linear scan {linear * 1e6:.0f} us, index {indexed * 1e6:.1f} us")
+
+    started = time.perf_counter()
+    matched = [s for s in records if parse_number(s['weekly_growth']) > 2 and s['industry'] == 'Industry 7']
+    scan = time.perf_counter() - started
+    started = time.perf_counter()
+    mask = (universe.column('weekly_growth') > 2) & universe.where('industry', 'Industry 7')
+    vectorized = time.perf_counter() - started
+    assert int(mask.sum()) == len(matched)
+    print(f"filter: dict scan {scan * 1e3:.2f} ms, columnar {vectorized * 1e3:.3f} ms ({len(matched)} rows)")
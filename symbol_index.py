@@ -0,0 +1,236 @@
+"""
+Typeahead Symbol Search Index for TradingGrow
+In-memory symbol-prefix, name-word-prefix and trigram index over the CSV
+universe, uploaded screening files and cached provider search results
+"""
+
+import csv
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+UNIVERSE_CSV_PATH = os.path.join(os.path.dirname(__file__), 'Stocks002025Format.csv')
+
+# Scores per match kind; ties are broken by shorter symbol, then alphabetically
+EXACT_SYMBOL = 1000
+SYMBOL_PREFIX = 800
+NAME_PREFIX = 600
+NAME_WORD_PREFIX = 500
+FUZZY = 400
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.5
+FUZZY_MIN_LENGTH = 4
+
+ENTRY_DEFAULTS = {'type': 'Equity', 'region': 'United States', 'currency': 'USD'}
+
+# Well-known names indexed even when no universe CSV or provider is available
+COMMON_STOCKS = [
+    {'symbol': 'AAPL', 'name': 'Apple Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+    {'symbol': 'GOOGL', 'name': 'Alphabet Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+    {'symbol': 'MSFT', 'name': 'Microsoft Corporation', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+    {'symbol': 'AMZN', 'name': 'Amazon.com Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+    {'symbol': 'TSLA', 'name': 'Tesla Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+    {'symbol': 'META', 'name': 'Meta Platforms Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+    {'symbol': 'NFLX', 'name': 'Netflix Inc.', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+    {'symbol': 'NVDA', 'name': 'NVIDIA Corporation', 'type': 'Equity', 'region': 'United States', 'currency': 'USD'},
+]
+
+_word_split = re.compile(r'[^a-z0-9]+')
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in _word_split.split(text.lower()) if w]
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {' '.join(_words(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """Ranked prefix/fuzzy lookup over symbols and company names"""
+
+    def __init__(self):
+        self._entries = {}
+        self._symbols = []
+        self._words = []
+        self._word_symbols = defaultdict(set)
+        self._name_words = {}
+        self._trigram_symbols = defaultdict(set)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entries: Iterable[Dict]) -> int:
+        """Add or update entries (dicts with at least 'symbol'); returns how many changed"""
+        changed = 0
+        new_symbols = False
+        new_words = False
+        with self._lock:
+            for raw in entries:
+                symbol = str(raw.get('symbol') or '').strip().upper()
+                if not symbol:
+                    continue
+                existing = self._entries.get(symbol)
+                entry = dict(existing or {'symbol': symbol, 'name': symbol, **ENTRY_DEFAULTS})
+                for key, value in raw.items():
+                    if key != 'symbol' and value not in (None, ''):
+                        entry[key] = value
+                # A placeholder name never overrides a real company name
+                if existing and raw.get('name') in (None, '', symbol):
+                    entry['name'] = existing['name']
+                if entry == existing:
+                    continue
+
+                if existing is None:
+                    new_symbols = True
+                elif existing['name'] != entry['name']:
+                    self._unindex_name(symbol, existing['name'])
+                if existing is None or existing['name'] != entry['name']:
+                    new_words |= self._index_name(symbol, entry['name'])
+                self._entries[symbol] = entry
+                changed += 1
+
+            if new_symbols:
+                self._symbols = sorted(self._entries)
+            if new_words:
+                self._words = sorted(self._word_symbols)
+        return changed
+
+    def _index_name(self, symbol: str, name: str) -> bool:
+        added_word = False
+        words = _words(name)
+        for word in words:
+            if word not in self._word_symbols:
+                added_word = True
+            self._word_symbols[word].add(symbol)
+        self._name_words[symbol] = tuple(words)
+        for gram in _trigrams(f"{symbol} {name}"):
+            self._trigram_symbols[gram].add(symbol)
+        return added_word
+
+    def _unindex_name(self, symbol: str, name: str):
+        for word in _words(name):
+            symbols = self._word_symbols.get(word)
+            if symbols is not None:
+                symbols.discard(symbol)
+                if not symbols:
+                    del self._word_symbols[word]
+        for gram in _trigrams(f"{symbol} {name}"):
+            symbols = self._trigram_symbols.get(gram)
+            if symbols is not None:
+                symbols.discard(symbol)
+        self._words = sorted(self._word_symbols)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Ranked matches for a typeahead query"""
+        query = (query or '').strip()
+        if not query or limit <= 0:
+            return []
+        upper = query.upper()
+        lower = query.lower()
+        scores = {}
+
+        with self._lock:
+            entries = self._entries
+            if upper in entries:
+                scores[upper] = EXACT_SYMBOL
+
+            # Symbol prefix: contiguous run in the sorted symbol list
+            symbols = self._symbols
+            i = bisect_left(symbols, upper)
+            while i < len(symbols) and symbols[i].startswith(upper) and len(scores) < limit * 4:
+                scores.setdefault(symbols[i], SYMBOL_PREFIX - len(symbols[i]))
+                i += 1
+
+            # Company-name word prefixes: every query word must start some name word
+            query_words = _words(lower)
+            if query_words:
+                first, rest = query_words[0], query_words[1:]
+                words = self._words
+                j = bisect_left(words, first)
+                found = 0
+                while j < len(words) and words[j].startswith(first) and found < limit * 4:
+                    for symbol in self._word_symbols[words[j]]:
+                        name_words = self._name_words[symbol]
+                        if not all(any(w.startswith(q) for w in name_words) for q in rest):
+                            continue
+                        score = NAME_PREFIX if name_words[0].startswith(first) else NAME_WORD_PREFIX
+                        if scores.get(symbol, 0) < score:
+                            scores[symbol] = score
+                            found += 1
+                            if found >= limit * 4:
+                                break
+                    j += 1
+
+            # Fuzzy trigram containment when prefix matching came up short
+            if len(scores) < limit and len(lower) >= FUZZY_MIN_LENGTH:
+                grams = _trigrams(lower)
+                shared = defaultdict(int)
+                for gram in grams:
+                    for symbol in self._trigram_symbols.get(gram, ()):
+                        shared[symbol] += 1
+                for symbol, count in shared.items():
+                    similarity = count / len(grams)
+                    if similarity >= FUZZY_THRESHOLD and symbol not in scores:
+                        scores[symbol] = FUZZY * similarity
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], len(item[0]), item[0]))[:limit]
+            return [dict(entries[symbol]) for symbol, _ in ranked]
+
+    def load_csv(self, path: str) -> int:
+        """Index the symbols (and names/industries, if present) in a universe CSV"""
+        with open(path, newline='', encoding='utf-8') as csvfile:
+            return self.add(
+                {'symbol': row.get('symbol'), 'name': row.get('name'), 'industry': row.get('industry')}
+                for row in csv.DictReader(csvfile)
+            )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    """Process-wide index, built from the universe CSV on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = SymbolIndex()
+            index.add(COMMON_STOCKS)
+            try:
+                index.load_csv(UNIVERSE_CSV_PATH)
+            except (OSError, csv.Error) as e:
+                logger.warning(f"Could not index {UNIVERSE_CSV_PATH}: {e}")
+            _index = index
+        return _index
+
+
+if __name__ == "__main__":
+    # Benchmark: query latency over a 10,000-symbol index
+    import random
+    import string
+
+    rng = random.Random(0)
+    index = SymbolIndex()
+    words = ['Global', 'Holdings', 'Technologies', 'Pharma', 'Energy', 'Capital', 'Systems', 'Bancorp', 'Apple', 'Micro']
+    index.add({
+        'symbol': ''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 5))),
+        'name': f"{rng.choice(words)} {rng.choice(words)} Inc."
+    } for _ in range(10000))
+
+    for query in ['A', 'AB', 'ABC', 'micro', 'tech hold', 'pharam']:
+        runs = 2000
+        started = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(query, 10)
+        elapsed = (time.perf_counter() - started) / runs
+        print(f"{query!r:12} {elapsed * 1e6:8.1f} us  top: {[r['symbol'] for r in results[:3]]}")
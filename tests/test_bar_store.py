@@ -0,0 +1,64 @@
+import threading
+import time
+
+from bar_store import BarStore
+from bulk_fetcher import BulkFetcher, StubProvider
+
+
+def test_first_read_fetches_then_serves_from_disk(tmp_path):
+    store = BarStore(root=str(tmp_path), refresh_interval=3600)
+    stub = StubProvider()
+    fetcher = BulkFetcher(stub)
+
+    first = store.get_histories(['AAPL', 'MSFT'], period='6mo', fetcher=fetcher)
+    assert stub.history_calls == 1
+    assert len(first['AAPL']) > 100
+
+    again = store.get_histories(['AAPL', 'MSFT'], period='6mo', fetcher=fetcher)
+    assert stub.history_calls == 1
+    assert again['MSFT']['Close'].tolist() == first['MSFT']['Close'].tolist()
+
+
+def test_stale_symbols_are_topped_up_incrementally(tmp_path):
+    store = BarStore(root=str(tmp_path), refresh_interval=0)
+    stub = StubProvider()
+    fetcher = BulkFetcher(stub)
+    store.get_histories(['AAPL'], period='1mo', fetcher=fetcher)
+    before = len(store.read('AAPL'))
+
+    store.get_histories(['AAPL'], period='1mo', fetcher=fetcher)
+    assert stub.history_calls == 2
+    # The top-up overlaps the last stored bar instead of refetching the period
+    assert len(store.read('AAPL')) == before
+    assert store.read_meta('AAPL')['covered_from'] > 0
+
+
+def test_fetches_for_different_symbols_run_in_parallel(tmp_path):
+    store = BarStore(root=str(tmp_path))
+    fetcher = BulkFetcher(StubProvider(history_latency=0.3, max_concurrency=8))
+    threads = [threading.Thread(target=store.get_histories, args=([symbol],), kwargs={'fetcher': fetcher})
+               for symbol in ('AAA', 'BBB', 'CCC', 'DDD')]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - started < 0.9
+
+
+def test_concurrent_requests_for_one_symbol_fetch_once(tmp_path):
+    store = BarStore(root=str(tmp_path))
+    stub = StubProvider(history_latency=0.2)
+    fetcher = BulkFetcher(stub)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_histories(['AAPL'], fetcher=fetcher)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub.history_calls == 1
+    assert all(len(result['AAPL']) == len(results[0]['AAPL']) > 0 for result in results)
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from bulk_fetcher import BulkFetcher, StubProvider, split_history
+from cache_layer import TieredCache
+from financial_data_service import FinancialDataService
+
+
+class CountingProvider(StubProvider):
+    """StubProvider that records the most history requests in flight at once"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak = 0
+        self._flight_lock = threading.Lock()
+
+    def history(self, symbols, **kwargs):
+        with self._flight_lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            return super().history(symbols, **kwargs)
+        finally:
+            with self._flight_lock:
+                self.in_flight -= 1
+
+
+def test_fetch_history_chunks_and_skips_missing_symbols():
+    stub = StubProvider(chunk_size=10, missing=['S003'])
+    symbols = [f"S{i:03d}" for i in range(35)]
+    frame = BulkFetcher(stub).fetch_history(symbols + ['S001'], period='1mo')
+
+    assert stub.history_calls == 4
+    returned = set(frame.columns.get_level_values(0))
+    assert returned == set(symbols) - {'S003'}
+    assert split_history(frame, 'S003').empty
+    assert not split_history(frame, 'S010').dropna().empty
+
+
+def test_fetch_info_maps_failures_to_empty_dicts():
+    infos = BulkFetcher(StubProvider(missing=['BAD'])).fetch_info(['AAPL', 'BAD'])
+    assert infos['AAPL']['longName'] == 'AAPL Inc.'
+    assert infos['BAD'] == {}
+
+
+def test_each_provider_limit_is_respected():
+    # Same provider name, different limits: each fetcher keeps its own
+    for limit in (1, 3):
+        stub = CountingProvider(history_latency=0.02, max_concurrency=limit, chunk_size=1)
+        BulkFetcher(stub, max_workers=8).fetch_history([f"S{i}" for i in range(12)], period='5d')
+        assert stub.peak == limit
+
+
+def test_get_multiple_stocks_batches_requests():
+    stub = StubProvider(history_latency=0.05, chunk_size=100)
+    service = FinancialDataService(bulk_fetcher=BulkFetcher(stub), cache=TieredCache())
+    symbols = [f"S{i:03d}" for i in range(20)]
+
+    started = time.perf_counter()
+    stocks = service.get_multiple_stocks(symbols)
+    elapsed = time.perf_counter() - started
+
+    assert set(stocks) == set(symbols)
+    assert stocks['S005']['name'] == 'S005 Inc.'
+    assert stub.history_calls == 1
+    assert stub.info_calls == 20
+    assert elapsed < 1.0
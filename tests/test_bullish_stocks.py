@@ -0,0 +1,33 @@
+import pytest
+
+import bar_store as bar_store_module
+from bulk_fetcher import BulkFetcher, StubProvider
+
+
+@pytest.fixture
+def stub_fetcher(monkeypatch):
+    stub = StubProvider()
+    monkeypatch.setattr(bar_store_module, '_default_fetcher', BulkFetcher(stub))
+    return stub
+
+
+def test_route_is_registered(app):
+    rules = {rule.rule: rule.methods for rule in app.url_map.iter_rules()}
+    assert 'POST' in rules['/api/bullish-stocks']
+
+
+def test_requires_a_symbol_list(user_client):
+    response = user_client.post('/api/bullish-stocks', json={'symbols': 'AAPL'})
+    assert response.status_code == 400
+
+
+def test_screens_symbols_from_the_bar_store(user_client, stub_fetcher):
+    response = user_client.post('/api/bullish-stocks', json={'symbols': ['AAPL', 'MSFT', 'NVDA']})
+    assert response.status_code == 200
+    bullish = response.get_json()['bullish_stocks']
+    assert isinstance(bullish, list) and set(bullish) <= {'AAPL', 'MSFT', 'NVDA'}
+    assert stub_fetcher.history_calls == 1
+
+    # Bars are now stored, so a repeat request makes no provider call
+    user_client.post('/api/bullish-stocks', json={'symbols': ['AAPL', 'MSFT', 'NVDA']})
+    assert stub_fetcher.history_calls == 1
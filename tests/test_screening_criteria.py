@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from screening_criteria import compile_criteria, parse_number
+
+
+COLUMNS = {
+    'mrs_current': np.array([1.2, 0.4, 0.9, np.nan]),
+    'weekly_growth': np.array([3.0, 1.0, 0.5, 4.0]),
+    'price_vs_sma_pct': np.array([1.0, 15.0, 2.0, 20.0]),
+}
+
+
+def test_nested_groups_evaluate_over_columns():
+    plan = compile_criteria({'all': [
+        {'field': 'mrs_current', 'op': '>=', 'value': 0.4},
+        {'any': [{'field': 'weekly_growth', 'op': '>', 'value': 2},
+                 {'field': 'price_vs_sma_pct', 'op': '>', 'value': 10}]},
+    ]})
+    assert plan.evaluate(COLUMNS, 4).tolist() == [True, True, False, False]
+    assert not plan.needs_indicators
+
+
+def test_empty_criteria_match_every_row():
+    assert compile_criteria({}).evaluate(COLUMNS, 4).tolist() == [True] * 4
+    assert compile_criteria('').evaluate(COLUMNS, 4).tolist() == [True] * 4
+
+
+def test_identical_criteria_share_a_plan():
+    first = compile_criteria({'field': 'mrs_current', 'op': '>', 'value': 1})
+    second = compile_criteria('{"value": 1, "op": ">", "field": "mrs_current"}')
+    assert first is second
+
+
+def test_indicator_references_report_their_windows():
+    plan = compile_criteria({'all': [{'field': 'close', 'op': '>', 'ref': 'sma150'},
+                                     {'field': 'close', 'op': '>', 'ref': 'sma50'}]})
+    assert plan.needs_indicators
+    assert plan.sma_windows == [50, 150]
+    with pytest.raises(ValueError):
+        plan.evaluate(COLUMNS, 4)
+
+
+@pytest.mark.parametrize('criteria', [
+    {'field': 'password', 'op': '>', 'value': 1},
+    {'field': 'mrs_current', 'op': '=~', 'value': 1},
+    {'field': 'mrs_current', 'op': '>'},
+    {'all': {'field': 'mrs_current'}},
+])
+def test_invalid_criteria_raise_value_error(criteria):
+    with pytest.raises(ValueError):
+        compile_criteria(criteria)
+
+
+def test_parse_number_reads_display_strings():
+    assert parse_number('+2.5%') == 2.5
+    assert parse_number('1,200') == 1200.0
+    assert np.isnan(parse_number('n/a'))
+
+
+def test_run_saved_screening_against_the_universe(admin_client, stock_universe):
+    created = admin_client.post('/admin/stock-screening/create', json={
+        'name': 'High MRS', 'criteria': {'field': 'mrs_current', 'op': '>=', 'value': 1.2}})
+    screening_id = created.get_json()['screening']['id']
+
+    response = admin_client.post(f'/admin/api/stock-screenings/{screening_id}/run')
+    assert response.status_code == 200
+    assert sorted(stock['symbol'] for stock in response.get_json()['stocks']) == ['AAPL', 'MSFT']
+
+
+def test_run_rejects_invalid_stored_criteria(admin_client, stock_universe):
+    created = admin_client.post('/admin/stock-screening/create', json={
+        'name': 'Broken', 'criteria': {'field': 'nope', 'op': '>', 'value': 1}})
+    screening_id = created.get_json()['screening']['id']
+    assert admin_client.post(f'/admin/api/stock-screenings/{screening_id}/run').status_code == 400
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from bulk_fetcher import BulkFetcher, StubProvider
+from screening_engine import rolling_mean, screen_above_sma
+
+
+def legacy_bullish(universe):
+    """The per-symbol pandas screen the engine replaced"""
+    bullish = []
+    for symbol, df in universe.items():
+        if len(df) < 150:
+            continue
+        latest_close = df['Close'].iloc[-1]
+        if latest_close > df['Close'].rolling(50).mean().iloc[-1] and \
+                latest_close > df['Close'].rolling(150).mean().iloc[-1]:
+            bullish.append(symbol)
+    return bullish
+
+
+def test_matches_the_per_symbol_pandas_screen():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range('2024-01-01', periods=220)
+    universe = {f"S{i:03d}": pd.DataFrame({'Close': 100 + rng.standard_normal(220).cumsum()}, index=index)
+                for i in range(200)}
+    # Too short for SMA150: never passes
+    universe['SHORT'] = pd.DataFrame({'Close': np.arange(1.0, 101.0)}, index=index[:100])
+
+    result = screen_above_sma(universe)
+    assert result.passing() == legacy_bullish(universe)
+    assert 'SHORT' not in result.passing()
+    assert np.isnan(result.indicators['sma150'][list(universe).index('SHORT')])
+
+
+def test_accepts_a_wide_bulk_fetcher_frame():
+    frame = BulkFetcher(StubProvider()).fetch_history(['AAPL', 'MSFT', 'NVDA'], period='2y')
+    from_dict = screen_above_sma({symbol: frame[symbol].dropna() for symbol in ('AAPL', 'MSFT', 'NVDA')})
+    from_frame = screen_above_sma(frame)
+    assert from_frame.passing() == from_dict.passing()
+
+
+def test_rolling_mean_matches_pandas_with_gaps():
+    matrix = np.arange(40, dtype='float64').reshape(20, 2)
+    matrix[5, 1] = np.nan
+    expected = pd.DataFrame(matrix).rolling(4).mean().to_numpy()
+    np.testing.assert_allclose(rolling_mean(matrix, 4), expected, equal_nan=True)
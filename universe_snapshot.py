@@ -0,0 +1,239 @@
+"""
+Shared Stock Universe Snapshots for TradingGrow
+Publishes a StockUniverse as an immutable, versioned directory of .npy columns
+that every gunicorn worker memory-maps read-only; a CURRENT pointer file is
+swapped atomically, and workers pick up new versions within a second
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from stock_universe import StockUniverse
+
+# Cross-process lock for writers; unavailable on Windows, where only one process runs
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv('UNIVERSE_SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'snapshots'))
+# Workers re-read the CURRENT pointer at most this often
+CHECK_INTERVAL = 0.5
+# Superseded versions kept on disk for workers that still map them
+KEEP_VERSIONS = 3
+
+
+class SharedUniverse:
+    """A named StockUniverse shared by all worker processes through snapshot files
+
+    Reads return a read-only, memory-mapped universe; writes go through
+    `mutate`, which serializes writers across processes and publishes a new
+    version.
+    """
+
+    def __init__(self, name: str, seed: Iterable[Dict] = (), root: str = SNAPSHOT_DIR,
+                 check_interval: float = CHECK_INTERVAL):
+        self.name = name
+        self.seed = list(seed)
+        self.path = os.path.join(root, name)
+        self.check_interval = check_interval
+        self._universe = None
+        self._pointer = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        # Set when the snapshot directory is unusable; the universe then stays process-local
+        self._local_only = False
+
+    def current(self) -> StockUniverse:
+        """The latest published universe"""
+        if self._universe is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return self._universe
+        with self._lock:
+            if self._local_only:
+                return self._universe
+            try:
+                pointer = self._read_pointer()
+                if pointer is None:
+                    with self._writer():
+                        pointer = self._read_pointer()
+                        if pointer is None:
+                            pointer = self._publish(StockUniverse.from_records(self.seed))
+                if pointer != self._pointer:
+                    self._universe = self._load(pointer)
+                    self._pointer = pointer
+            except OSError as e:
+                logger.warning(f"Universe snapshot {self.name} unavailable, keeping it in-process: {e}")
+                if self._universe is None:
+                    self._universe = StockUniverse.from_records(self.seed)
+                self._local_only = True
+            self._checked_at = time.monotonic()
+            return self._universe
+
+    def mutate(self, fn: Callable[[StockUniverse], object]):
+        """Apply fn to a writable copy of the latest universe and publish it; returns fn's result"""
+        with self._lock:
+            if self._local_only:
+                return fn(self._universe)
+            with self._writer():
+                # Another worker may have published since our last check
+                self._checked_at = 0.0
+                universe = self.current().thaw()
+                result = fn(universe)
+                universe.version += 1
+                self._pointer = self._publish(universe)
+                self._universe = self._load(self._pointer)
+                self._checked_at = time.monotonic()
+                return result
+
+    def replace(self, records: Iterable[Dict]):
+        """Publish a universe holding exactly these records"""
+        records = list(records)
+        return self.mutate(lambda universe: universe.replace(records))
+
+    # Files
+
+    def _read_pointer(self) -> Optional[str]:
+        return read_pointer(self.path)
+
+    def _load(self, pointer: str) -> StockUniverse:
+        arrays, meta = load_snapshot(self.path, pointer)
+        logger.debug(f"Mapped universe snapshot {self.name}/{pointer} ({meta['size']} stocks)")
+        return StockUniverse.from_columns(arrays, meta)
+
+    def _publish(self, universe: StockUniverse) -> str:
+        """Write a new version and swap CURRENT to it (caller holds the writer lock)"""
+        arrays, meta = universe.export()
+        pointer = write_snapshot(self.path, arrays, meta, meta['version'])
+        logger.info(f"Published universe snapshot {self.name}/{pointer} ({meta['size']} stocks)")
+        return pointer
+
+    def _writer(self):
+        return writer_lock(self.path)
+
+
+def read_pointer(path: str) -> Optional[str]:
+    """Name of the current version directory under path, or None"""
+    try:
+        with open(os.path.join(path, 'CURRENT')) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot(path: str, pointer: str) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Memory-map every column of a version directory, plus its metadata"""
+    directory = os.path.join(path, pointer)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    arrays = {
+        column: np.load(os.path.join(directory, f"{column}.npy"), mmap_mode='r', allow_pickle=False)
+        for column in meta['columns']
+    }
+    return arrays, meta
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], meta: Dict, version: int) -> str:
+    """Write arrays as a new version directory, then atomically point CURRENT at it
+
+    Callers serialize writers with writer_lock(path). Returns the new pointer.
+    """
+    os.makedirs(path, exist_ok=True)
+    meta = dict(meta, columns=sorted(arrays))
+    pointer = f"v{version:010d}-{os.getpid()}-{int(time.time() * 1000)}"
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=path)
+    try:
+        for column, values in arrays.items():
+            np.save(os.path.join(staging, f"{column}.npy"), np.ascontiguousarray(values), allow_pickle=False)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        os.rename(staging, os.path.join(path, pointer))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    fd, tmp_path = tempfile.mkstemp(prefix='.CURRENT-', dir=path)
+    with os.fdopen(fd, 'w') as f:
+        f.write(pointer)
+    os.replace(tmp_path, os.path.join(path, 'CURRENT'))
+    _prune(path, pointer)
+    return pointer
+
+
+def _prune(path: str, pointer: str):
+    versions = sorted(entry for entry in os.listdir(path) if entry.startswith('v'))
+    for old in versions[:-KEEP_VERSIONS]:
+        if old != pointer:
+            # Workers still mapping these keep their open inodes on POSIX
+            shutil.rmtree(os.path.join(path, old), ignore_errors=True)
+
+
+@contextmanager
+def writer_lock(path: str):
+    """Exclusive cross-process lock for publishing under path"""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, '.lock'), 'a') as lock_file:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+if __name__ == "__main__":
+    # Benchmark: publish cost, per-worker load cost and cross-process visibility
+    import multiprocessing
+
+    size = 20000
+    records = [{'id': str(i + 1), 'symbol': f"S{i:05d}", 'industry': f"Industry {i % 150}",
+                'market_cap': 1e9 + i, 'weekly_growth': (i % 13) - 6.0, 'watchlist_type': 'entry'}
+               for i in range(size)]
+
+    def watch(root, seen):
+        shared = SharedUniverse('bench', root=root)
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            universe = shared.current()
+            if len(universe) == size + 1:
+                seen.put(time.time())
+                return
+            time.sleep(0.01)
+
+    with tempfile.TemporaryDirectory() as root:
+        shared = SharedUniverse('bench', seed=records, root=root)
+        started = time.perf_counter()
+        shared.current()
+        print(f"seed publish + map ({size} stocks): {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+        started = time.perf_counter()
+        universe = SharedUniverse('bench', root=root).current()
+        print(f"worker map of an existing snapshot: {(time.perf_counter() - started) * 1e3:.2f} ms, "
+              f"lookup {universe.get('S01234')['symbol']}")
+
+        seen = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=watch, args=(root, seen)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        # Let the workers map the current version first
+        time.sleep(2)
+        published_at = time.time()
+        shared.mutate(lambda u: u.upsert({'symbol': 'NEW', 'industry': 'Industry 1'}))
+        publish_time = time.time() - published_at
+        lags = [seen.get(timeout=10) - published_at for _ in workers]
+        for worker in workers:
+            worker.join()
+        print(f"upsert published in {publish_time * 1e3:.0f} ms; "
+              f"visible in 3 other processes after {max(lags) * 1e3:.0f} ms (max)")
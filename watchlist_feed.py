@@ -0,0 +1,118 @@
+"""
+Materialized Watchlist Feeds for TradingGrow
+Keeps the entry-zone/breakout stock lists pre-serialized as JSON bytes and
+rebuilds them only when a watchlist of that type changes
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Response, request
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+import models
+from db import db
+
+logger = logging.getLogger(__name__)
+
+# Other gunicorn workers can change watchlists too, so a cached feed is
+# re-checked against the database at most this often
+REVALIDATE_SECONDS = 2.0
+
+
+class WatchlistFeed:
+    """Pre-serialized stock feed for one watchlist type"""
+
+    def __init__(self, watchlist_type: str, revalidate_seconds: float = REVALIDATE_SECONDS):
+        self.watchlist_type = watchlist_type
+        self.revalidate_seconds = revalidate_seconds
+        self.payload = None
+        self.etag = None
+        self.last_modified = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force the next read to re-check the database"""
+        self._checked_at = 0.0
+        self._version = None
+
+    def current(self):
+        """Get (payload, etag, last_modified), rebuilding only if the data changed"""
+        if self.payload is not None and time.monotonic() - self._checked_at < self.revalidate_seconds:
+            return self.payload, self.etag, self.last_modified
+        with self._lock:
+            if self.payload is None or time.monotonic() - self._checked_at >= self.revalidate_seconds:
+                version = self._read_version()
+                if version != self._version or self.payload is None:
+                    self._rebuild(version)
+                self._checked_at = time.monotonic()
+        return self.payload, self.etag, self.last_modified
+
+    def _read_version(self):
+        Watchlist = models.Watchlist
+        return db.session.query(func.max(Watchlist.updated_at), func.count(Watchlist.id)).filter(
+            Watchlist.watchlist_type == self.watchlist_type
+        ).one()
+
+    def _rebuild(self, version):
+        stocks = models.WatchlistItem.stocks_for_type(self.watchlist_type)
+        self.payload = json.dumps({'success': True, 'stocks': stocks}, sort_keys=True,
+                                  separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.payload).hexdigest()
+        updated_at = version[0] or datetime.utcnow()
+        self.last_modified = updated_at.replace(microsecond=0, tzinfo=timezone.utc)
+        self._version = version
+        logger.debug(f"Rebuilt {self.watchlist_type} watchlist feed ({len(stocks)} stocks)")
+
+    def response(self) -> Response:
+        """Serve the feed, answering conditional requests with 304"""
+        payload, etag, last_modified = self.current()
+        not_modified = False
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        elif request.if_modified_since:
+            not_modified = last_modified <= request.if_modified_since
+
+        response = Response(b'' if not_modified else payload, status=304 if not_modified else 200,
+                            mimetype='application/json')
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response
+
+
+feeds = {
+    'entry': WatchlistFeed('entry'),
+    'breakout': WatchlistFeed('breakout'),
+}
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_types(session, flush_context):
+    Watchlist = models.Watchlist
+    changed = session.info.setdefault('changed_watchlist_types', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if Watchlist is not None and isinstance(obj, Watchlist):
+            changed.add(obj.watchlist_type)
+        elif models.WatchlistItem is not None and isinstance(obj, models.WatchlistItem):
+            # The item's watchlist may not be loaded; refresh every feed
+            changed.update(feeds.keys())
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_feeds(session):
+    for watchlist_type in session.info.pop('changed_watchlist_types', ()):
+        if watchlist_type in feeds:
+            feeds[watchlist_type].invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_types(session):
+    session.info.pop('changed_watchlist_types', None)